@@ -5,8 +5,9 @@ import os
 # 将项目根目录加入 python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from src.dashboard.database import initialize_database, check_database_initialized, load_papers, process_uploaded_pdf
+from src.dashboard.database import initialize_database, check_database_initialized, load_paper_page, load_paper_detail, search_paper_index, load_analysis_report, process_uploaded_pdf, get_db_revision
 from src.dashboard.config import init_config_form
+from src.research_agent.config.settings import get_settings
 
 import streamlit as st
 from pathlib import Path
@@ -17,8 +18,14 @@ st.set_page_config(page_title="AI Research Agent", layout="wide", page_icon="
 st.title("🎓 自动化学术情报局")
 st.caption("Your Best Research Assistant")
 
-# Create database tables on app startup
-initialize_database()
+PAGE_SIZE = 50  # 列表每页显示的论文数
+
+# Create database tables on app startup (每个进程只需执行一次)
+@st.cache_resource
+def _initialize_database_once() -> bool:
+    return initialize_database()
+
+_initialize_database_once()
 
 # Check if database is initialized
 if not check_database_initialized():
@@ -28,7 +35,8 @@ if not check_database_initialized():
 # --- Sidebar: 侧边栏过滤器 ---
 with st.sidebar:
     st.header("🔍 筛选控制")
-    filter_source = st.multiselect("来源平台", ["arxiv", "sciencedirect", "asce"], default=["arxiv"])
+    search_query = st.text_input("🔎 全文搜索", placeholder="标题 / 摘要 / 分析报告关键词")
+    filter_source = st.multiselect("来源平台", ["arxiv", "sciencedirect", "asce", "uploaded_pdf"], default=["arxiv", "sciencedirect", "uploaded_pdf"])
     show_only_relevant = st.checkbox("只看高相关 (Relevant)", value=True)
     
     st.divider()
@@ -56,47 +64,75 @@ with st.sidebar:
             st.success(result["message"])
             st.info("解析结果已存储到数据库，刷新页面查看。")
 
-    st.info("数据每24小时自动更新。")
-
-papers = load_papers()
+    st.info(f"数据更新频率: {get_settings().user.get().update_frequency} (由 `python -m src.scheduler` 调度)")
 
-if not papers:
+# 数据库变更计数不变时，列表与详情都直接命中缓存
+revision = get_db_revision()
+if search_query.strip():
+    # 搜索模式：按 bm25 相关度排序，不分页
+    papers = search_paper_index(revision, search_query.strip(), show_only_relevant, tuple(filter_source))
+    total, total_pages = len(papers), 1
+else:
+    page = st.session_state.get("paper_page", 1)
+    papers, total = load_paper_page(revision, page, PAGE_SIZE, show_only_relevant, tuple(filter_source))
+    total_pages = max(1, -(-total // PAGE_SIZE))
+    if page > total_pages:
+        # 过滤条件变化后当前页可能越界
+        page = st.session_state["paper_page"] = 1
+        papers, total = load_paper_page(revision, page, PAGE_SIZE, show_only_relevant, tuple(filter_source))
+
+if not papers and search_query.strip():
+    st.warning("没有找到匹配的论文。")
+elif not papers:
     st.warning("暂无数据，请先运行 main_demo.py 抓取论文。")
 else:
     # --- 布局：左侧列表，右侧详情 ---
     col1, col2 = st.columns([1, 2])
     
     with col1:
-        st.subheader(f"📄 最新论文 ({len(papers)})")
+        if search_query.strip():
+            st.subheader(f"🔎 搜索结果 ({total})")
+        else:
+            st.subheader(f"📄 最新论文 ({total})")
+            st.number_input(f"页码 (共 {total_pages} 页)", min_value=1, max_value=total_pages, step=1, key="paper_page")
+        titles = {p["id"]: p["title"] for p in papers}
         selected_paper_id = st.radio(
             "选择论文查看详情:",
-            options=[p.id for p in papers],
-            format_func=lambda x: next((p.title for p in papers if p.id == x), x)
+            options=list(titles),
+            format_func=lambda x: titles.get(x, x)
         )
         
-        # 获取选中的论文对象
-        current_paper = next(p for p in papers if p.id == selected_paper_id)
+        # 获取选中的论文 (只加载元数据)
+        current_paper = load_paper_detail(revision, selected_paper_id)
+
+        # 搜索模式下显示命中片段
+        snippet = next((p.get("snippet") for p in papers if p["id"] == selected_paper_id), None)
+        if snippet:
+            st.markdown(f"> {snippet}")
 
     with col2:
         if current_paper:
             # 标题区
-            st.markdown(f"## {current_paper.title}")
-            st.markdown(f"**作者**: {', '.join(current_paper.authors)} | **日期**: {current_paper.published_date.date()}")
+            st.markdown(f"## {current_paper['title']}")
+            st.markdown(f"**作者**: {', '.join(current_paper['authors'])} | **日期**: {current_paper['published_date'].date()}")
+            if current_paper.get('canonical_id'):
+                st.caption(f"🔗 与 {current_paper['canonical_id']} 为同一工作的不同版本，筛选结果与报告沿用自该论文")
             
             # 链接按钮
-            if current_paper.url:
-                st.link_button("🔗 原文链接", current_paper.url)
+            if current_paper['url']:
+                st.link_button("🔗 原文链接", current_paper['url'])
             
             # 选项卡：分析报告 vs 原始摘要
             tab1, tab2 = st.tabs(["📊 深度分析报告", "📝 原始摘要"])
             
             with tab1:
-                if current_paper.analysis_report:
-                    st.markdown(current_paper.analysis_report)
+                analysis_report = load_analysis_report(current_paper['id'], current_paper.get('canonical_id'))
+                if analysis_report:
+                    st.markdown(analysis_report)
                 else:
                     st.info("🚧 该论文尚未生成详细报告 (等待 Analyst Agent 处理...)")
                     # 这里可以加一个手动触发按钮
                     # if st.button("立即分析"): ...
             
             with tab2:
-                st.write(current_paper.abstract)
\ No newline at end of file
+                st.write(current_paper['abstract'])
\ No newline at end of file
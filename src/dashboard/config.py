@@ -5,22 +5,18 @@ import os
 # 将项目根目录加入 python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-import yaml
 from pathlib import Path
 from loguru import logger
 import streamlit as st
 from src.research_agent.agents.prompt.prompt_agent import PromptAgent
+from src.research_agent.config.settings import get_settings, UserConfig, PromptConfig, USER_CONFIG_FILE, PROMPT_FILE
 
-CONFIG_DIR = Path(__file__).parent.parent / "research_agent" / "config"
-CONFIG_FILE = CONFIG_DIR / "user_config.yaml"
-PROMPT_FILE = CONFIG_DIR / "analysis_prompt.yaml"
+CONFIG_FILE = USER_CONFIG_FILE
 
 def save_config(config: dict) -> bool:
     """Save configuration to YAML file"""
     try:
-        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            yaml.dump(config, f, default_flow_style=False, allow_unicode=True)
+        get_settings().user.save(UserConfig.from_dict(config))
         logger.info(f"✅ Configuration saved to {CONFIG_FILE}")
         return True
     except Exception as e:
@@ -30,9 +26,7 @@ def save_config(config: dict) -> bool:
 def save_prompt_template(prompt_data: dict) -> bool:
     """Save generated prompt template to YAML file"""
     try:
-        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-        with open(PROMPT_FILE, "w", encoding="utf-8") as f:
-            yaml.dump(prompt_data, f, default_flow_style=False, allow_unicode=True)
+        get_settings().prompt.save(PromptConfig.from_dict(prompt_data))
         logger.info(f"✅ Prompt template saved to {PROMPT_FILE}")
         return True
     except Exception as e:
@@ -40,18 +34,8 @@ def save_prompt_template(prompt_data: dict) -> bool:
         return False
 
 def load_config() -> dict:
-    """Load configuration from YAML file"""
-    try:
-        if CONFIG_FILE.exists():
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                config = yaml.safe_load(f) or {}
-                logger.info(f"✅ Configuration loaded from {CONFIG_FILE}")
-                return config
-        logger.warning(f"⚠️ Config file not found at {CONFIG_FILE}")
-        return {}
-    except Exception as e:
-        logger.error(f"Error loading configuration: {e}")
-        return {}
+    """Load configuration (cached by the shared config service, re-read only when the file changes)"""
+    return get_settings().user.get().to_dict() if config_exists() else {}
 
 def config_exists() -> bool:
     """Check if configuration file exists"""
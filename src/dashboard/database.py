@@ -5,11 +5,17 @@ import os
 # 将项目根目录加入 python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from sqlmodel import Session, select, SQLModel
-from src.research_agent.storage.models import Paper, engine
+from sqlmodel import Session, select
+from src.research_agent.storage.models import Paper, engine, create_db_and_tables, ANALYSIS_REPORT
+from src.research_agent.storage.blobs import load_blob, save_blob
+from src.research_agent.storage.repository import list_papers, get_paper, get_db_revision
+from src.research_agent.storage.search import search_papers
+from src.research_agent.telemetry.store import load_runs, load_stage_history
+from src.research_agent.pipeline.jobs import queue_stats
 from src.research_agent.agents.analysis.extracter import PDFUploadParser
 from src.research_agent.agents.analysis.reviewer import PaperReviewer
 from loguru import logger
+import streamlit as st
 
 def process_uploaded_pdf(file_path: str) -> dict:
     parser = PDFUploadParser()
@@ -21,10 +27,9 @@ def process_uploaded_pdf(file_path: str) -> dict:
             return {"error": "PDF 解析失败，无法提取论文信息。"}
         # 这里可以直接调用 reviewer 进行分析，生成初步的分析报告
         analysis_report = reviewer.analyze_paper(paper, pdf_path=file_path)
-        paper.analysis_report = analysis_report
         logger.info(f"✅ 论文分析完成: {paper.title}")
-        # 将解析和分析结果存储到数据库中
-        parser.refresh_database(paper)
+        # 将分析结果存储到数据库中 (论文信息已由 parse_info 入库)
+        save_blob(paper.id, ANALYSIS_REPORT, analysis_report)
         return {"message": "PDF 解析和分析完成，并已存储到数据库。", "paper_id": paper.id}
     except Exception as e:
         logger.error(f"处理上传 PDF 时出错: {e}")
@@ -33,7 +38,7 @@ def process_uploaded_pdf(file_path: str) -> dict:
 def initialize_database() -> bool:
     """Create all database tables"""
     try:
-        SQLModel.metadata.create_all(engine)
+        create_db_and_tables()
         logger.info("✅ Database tables initialized")
         return True
     except Exception as e:
@@ -54,23 +59,77 @@ def check_database_initialized() -> bool:
         logger.error(f"Database connection error: {e}")
         return False
 
-def load_papers(show_only_relevant: bool = True, filter_sources: list = None):
-    """Load papers from database with optional filtering"""
+def load_analysis_report(paper_id: str, canonical_id: str | None = None) -> str | None:
+    """详情页按需加载分析报告，列表视图不会读取大字段；重复论文没有自己的报告时读取 canonical 论文的报告"""
     try:
-        with Session(engine) as session:
-            statement = select(Paper).order_by(Paper.published_date.desc())
-            
-            if show_only_relevant:
-                statement = statement.where(Paper.is_relevant == True)
-            
-            # Add source filtering if provided
-            if filter_sources:
-                # Assuming Paper model has a 'source' field
-                statement = statement.where(Paper.source.in_(filter_sources))
-            
-            papers = session.exec(statement).all()
-            logger.info(f"✅ Loaded {len(papers)} papers from database")
-            return papers
+        report = load_blob(paper_id, ANALYSIS_REPORT)
+        if report is None and canonical_id:
+            report = load_blob(canonical_id, ANALYSIS_REPORT)
+        return report
+    except Exception as e:
+        logger.error(f"Error loading analysis report: {e}")
+        return None
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_paper_page(revision: int, page: int, page_size: int, show_only_relevant: bool = True,
+                    filter_sources: tuple = ()) -> tuple[list[dict], int]:
+    """
+    Load one page of the paper listing (id / title / published_date / source only).
+    `revision` is the DB change counter; the cached page is reused until it changes.
+    """
+    try:
+        rows, total = list_papers(page, page_size, show_only_relevant, list(filter_sources))
+        logger.info(f"✅ Loaded page {page} ({len(rows)}/{total} papers) from database")
+        return rows, total
     except Exception as e:
         logger.error(f"Error loading papers: {e}")
-        return []
\ No newline at end of file
+        return [], 0
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def search_paper_index(revision: int, query: str, show_only_relevant: bool = True, filter_sources: tuple = (),
+                       limit: int = 50) -> list[dict]:
+    """Full-text search (FTS5 / bm25) over titles, abstracts and analysis reports, with the listing's source filter"""
+    try:
+        results = search_papers(query, limit=limit, only_relevant=show_only_relevant, sources=list(filter_sources))
+        logger.info(f"🔎 Search '{query}' returned {len(results)} papers")
+        return results
+    except Exception as e:
+        logger.error(f"Error searching papers: {e}")
+        return []
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def load_paper_detail(revision: int, paper_id: str) -> dict | None:
+    """Load metadata of the selected paper (heavy blobs are loaded separately)"""
+    try:
+        paper = get_paper(paper_id)
+        return paper.model_dump() if paper else None
+    except Exception as e:
+        logger.error(f"Error loading paper {paper_id}: {e}")
+        return None
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_pipeline_runs(limit: int = 50) -> list[dict]:
+    """Most recent pipeline runs (pipeline_runs), newest first"""
+    try:
+        return load_runs(limit)
+    except Exception as e:
+        logger.error(f"Error loading pipeline runs: {e}")
+        return []
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_job_queue() -> dict[str, dict[str, int]]:
+    """Paper job counts per state (paper_jobs): ready / leased / waiting / dead"""
+    try:
+        return queue_stats()
+    except Exception as e:
+        logger.error(f"Error loading job queue: {e}")
+        return {}
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_stage_metrics(limit_runs: int = 50) -> list[dict]:
+    """Per-stage metrics (stage_metrics) of the most recent runs, oldest first"""
+    try:
+        return load_stage_history(limit_runs)
+    except Exception as e:
+        logger.error(f"Error loading stage metrics: {e}")
+        return []
@@ -0,0 +1,99 @@
+# src/dashboard/pages/1_Pipeline_health.py
+import sys
+import os
+
+# 将项目根目录加入 python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
+
+from src.dashboard.database import load_pipeline_runs, load_stage_metrics, load_job_queue
+
+import pandas as pd
+import streamlit as st
+
+st.set_page_config(page_title="Pipeline health", layout="wide", page_icon="🩺")
+
+st.title("🩺 Pipeline health")
+st.caption("每次运行各阶段的耗时、吞吐与 token 消耗 (来自 pipeline_runs / stage_metrics)")
+
+with st.sidebar:
+    limit_runs = st.slider("最近运行次数", min_value=5, max_value=200, value=30, step=5)
+    if st.button("🔄 刷新"):
+        load_pipeline_runs.clear()
+        load_stage_metrics.clear()
+        load_job_queue.clear()
+
+# --- 任务队列 (paper_jobs) ---
+queue = load_job_queue()
+if queue:
+    with st.expander("🧾 任务队列", expanded=True):
+        st.dataframe(pd.DataFrame.from_dict(queue, orient="index")[["ready", "leased", "waiting", "dead"]],
+                     use_container_width=True)
+
+runs = pd.DataFrame(load_pipeline_runs(limit_runs))
+metrics = pd.DataFrame(load_stage_metrics(limit_runs))
+
+if runs.empty:
+    st.warning("暂无运行记录，请先运行 main_demo.py。")
+    st.stop()
+
+# --- 最近一次运行 ---
+latest = runs.iloc[0]
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("最近运行", latest["name"], latest["status"])
+col2.metric("耗时", f"{latest['duration']:.0f}s" if pd.notna(latest["duration"]) else "运行中")
+col3.metric("开始时间 (UTC)", latest["started_at"].strftime("%m-%d %H:%M"))
+col4.metric("失败次数", int((runs["status"] == "failed").sum()), help=f"最近 {len(runs)} 次运行中")
+if latest["status"] == "failed" and latest["error"]:
+    st.error(latest["error"])
+
+if metrics.empty:
+    st.info("还没有阶段指标。")
+    st.stop()
+
+metrics["avg"] = metrics["seconds"] / metrics["calls"].where(metrics["calls"] > 0)
+metrics["tokens"] = metrics["prompt_tokens"] + metrics["completion_tokens"]
+timed = metrics[metrics["calls"] > 0]
+stages = sorted(timed["stage"].unique())
+
+# --- 各阶段延迟趋势 ---
+st.subheader("⏱️ 各阶段延迟趋势")
+left, right = st.columns([1, 3])
+with left:
+    statistic = st.radio("统计量", ["p95", "p50", "avg", "max_seconds", "seconds"],
+                         format_func=lambda s: {"seconds": "累计耗时", "max_seconds": "最大值"}.get(s, s))
+    default = [s for s in stages if not s.startswith("llm.")] or stages
+    selected = st.multiselect("阶段", stages, default=default)
+with right:
+    trend = timed[timed["stage"].isin(selected)].pivot_table(
+        index="started_at", columns="stage", values=statistic, aggfunc="sum")
+    if trend.empty:
+        st.info("请选择至少一个阶段。")
+    else:
+        st.line_chart(trend, y_label="秒")
+
+# --- token 与流量 ---
+col1, col2 = st.columns(2)
+with col1:
+    st.subheader("🤖 每次运行的 token")
+    tokens = metrics[metrics["tokens"] > 0].pivot_table(index="started_at", columns="stage", values="tokens", aggfunc="sum")
+    if tokens.empty:
+        st.info("暂无 LLM 调用。")
+    else:
+        st.bar_chart(tokens)
+with col2:
+    st.subheader("📦 每次运行的处理量")
+    items = metrics[metrics["items"] > 0].pivot_table(index="started_at", columns="stage", values="items", aggfunc="sum")
+    st.bar_chart(items)
+
+# --- 最近一次运行的明细 ---
+st.subheader("📋 最近一次运行的阶段明细")
+detail = metrics[metrics["run_id"] == latest["id"]].copy()
+detail["MB"] = detail["bytes"] / 2 ** 20
+st.dataframe(
+    detail[["stage", "calls", "errors", "items", "MB", "prompt_tokens", "completion_tokens",
+            "seconds", "avg", "p50", "p95", "max_seconds"]].set_index("stage"),
+    use_container_width=True,
+)
+
+st.subheader("🗂️ 运行历史")
+st.dataframe(runs[["id", "name", "status", "started_at", "duration", "error"]].set_index("id"), use_container_width=True)
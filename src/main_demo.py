@@ -1,18 +1,23 @@
-from sqlmodel import Session, select
-from src.research_agent.storage.models import Paper, create_db_and_tables, engine
+from src.research_agent.storage.models import create_db_and_tables
+from src.research_agent.storage.repository import drop_known_papers, bulk_upsert_papers
 from src.research_agent.agents.scout.arxiv_scout import ArxivScout
 from src.research_agent.agents.scout.elsevier_scout import ElsevierScout
 from src.research_agent.agents.filter.triage_agent import RelevanceFilter
+from src.research_agent.agents.filter.dedupe import DuplicateDetector, inherit_from_canonical
+from src.research_agent.pipeline.analysis import AnalysisPipeline
 from src.research_agent.acquisition.downloader import DownloadManager
-from src.research_agent.agents.analysis.reviewer import PaperReviewer
+from src.research_agent.pipeline.jobs import enqueue_new_papers
+from src.research_agent.llm.gateway import get_gateway
+from src.research_agent.telemetry.spans import get_telemetry
 from loguru import logger
 import asyncio
 
-def run_ingestion_pipeline():
-    # 1. 初始化数据库
-    create_db_and_tables()
-    
-    # 2. 配置你的研究兴趣 (这是高度定制化的部分)
+COMMIT_BATCH_SIZE = 500  # 入库时每个事务写入的论文数
+
+def build_ingestion_agents(arxiv_scout: ArxivScout | None = None, elsevier_scout: ElsevierScout | None = None,
+                           triage: RelevanceFilter | None = None) -> tuple[ArxivScout, ElsevierScout, RelevanceFilter]:
+    """入库阶段的各 Agent；未传入的使用下面的默认配置"""
+    # 配置你的研究兴趣 (这是高度定制化的部分)
     # 结合了 AI 和 土木/隧道工程 [cite: 244]
     my_interests = """
     1. 人工智能在土木工程中的应用。
@@ -23,98 +28,108 @@ def run_ingestion_pipeline():
     6. 音乐生成
     7. 视频生成模型和计算机视觉
     """
-    
-    # 3. 初始化 Agents
-    # 3.1 搜索 arXiv 的土木工程(cs.CE) 和 人工智能(cs.AI) 板块
-    arxiv_scout = ArxivScout(query="cat:cs.CE OR cat:cs.AI", max_results=10)
-    # 3.2 搜索 Elsevier 的指定期刊
-    elsevier_scout = ElsevierScout(
+
+    # 搜索 arXiv 的土木工程(cs.CE) 和 人工智能(cs.AI) 板块
+    # 增量模式：只翻页到上次的水位线 (首次运行可用 backfill_pages 回填)
+    arxiv_scout = arxiv_scout or ArxivScout(query="cat:cs.CE OR cat:cs.AI", max_results=10)
+    # 搜索 Elsevier 的指定期刊 (只抓取元数据，相关论文的全文在分析阶段按需抓取)
+    elsevier_scout = elsevier_scout or ElsevierScout(
         max_results=5,
-        year=2026
+        year=2026,
+        concurrency=8
     )
+    triage = triage or RelevanceFilter(research_interests=my_interests)
+    return arxiv_scout, elsevier_scout, triage
 
-    # 4. 初始化 Filter
-    triage = RelevanceFilter(research_interests=my_interests)
-    
-    # 5. 运行 Scout (侦察)
-    new_papers = []
-    new_papers += arxiv_scout.fetch_papers()
-    new_papers += elsevier_scout.fetch_papers()
-
-
-    with Session(engine) as session:
-        for paper in new_papers:
-            # 5.1 去重检查 (检查数据库是否已存在)
-            existing_paper = session.get(Paper, paper.id)
-            if existing_paper:
-                logger.info(f"⏭️  跳过已存在的论文: {paper.id}")
-                continue
-            
-            # 5.2 运行 Filter (筛选)
-            logger.info(f"🧠 正在分析论文相关性: {paper.title[:50]}...")
-            result = triage.check_relevance(paper.title, paper.abstract)
-            
-            # 5.3 更新结果
-            paper.is_relevant = result['is_relevant']
-            paper.relevance_reason = result['reason']
-            
-            # 5.4 存入数据库
-            session.add(paper)
-            session.commit()
-            
-            icon = "✅" if paper.is_relevant else "❌"
-            print(f"{icon} [{paper.id}] 判定结果: {paper.is_relevant}")
-            print(f"   理由: {paper.relevance_reason}\n")
+async def ingest(arxiv_scout: ArxivScout, elsevier_scout: ElsevierScout, triage: RelevanceFilter) -> list:
+    """
+    一轮入库：抓取 -> 去重 -> 跨来源去重 -> 筛选 -> 入库，返回本轮入库的新论文。
+    不关闭各 Agent 的连接池，常驻进程 (scheduler) 可以在多轮之间复用。
+    """
+    # 1. 运行 Scout (侦察)：arXiv 客户端是同步的，放到线程中与 Elsevier 并行
+    arxiv_papers, elsevier_papers = await asyncio.gather(
+        asyncio.to_thread(arxiv_scout.fetch_papers),
+        elsevier_scout.fetch_papers_async(),
+    )
+    new_papers = arxiv_papers + elsevier_papers
 
-async def run_analysis_phase():
+    # 2. 去重检查 (一次 IN 查询去掉数据库中已存在的论文)
+    candidates = await asyncio.to_thread(drop_known_papers, new_papers)
+
+    # 3. 跨来源去重 (DOI + MinHash/LSH)：同一工作的其他版本不再筛选，入库后继承原论文的结果
+    detector = DuplicateDetector()
+    links = await asyncio.to_thread(detector.link, candidates)
+    originals = [paper for paper in candidates if paper.id not in links]
+
+    # 4. 运行 Filter (异步并发 + 限速的批量筛选)
+    verdicts = await triage.check_relevance_batch_async(originals, concurrency=4)
+
+    for paper in originals:
+        # 4.1 更新结果；LLM 调用失败的论文不写判定 (is_relevant 为空)，任务从 discovered 开始，由 worker 退避重试
+        result = verdicts[paper.id]
+        paper.is_relevant = result['is_relevant']  # 失败时 (result['error']) 为 None
+        paper.relevance_reason = result['reason']
+
+        icon = {True: "✅", False: "❌", None: "⏸️"}[paper.is_relevant]
+        print(f"{icon} [{paper.id}] 判定结果: {paper.is_relevant}")
+        print(f"   理由: {paper.relevance_reason}\n")
+
+    for paper_id, canonical_id in links.items():
+        print(f"🔗 [{paper_id}] 与 [{canonical_id}] 为同一工作，沿用其筛选结果\n")
+
+    # 5. 批量存入数据库 (每 COMMIT_BATCH_SIZE 篇一个事务)
+    await asyncio.to_thread(bulk_upsert_papers, candidates, batch_size=COMMIT_BATCH_SIZE)
+    # 5.1 写入去重指纹，重复论文继承原论文的筛选结果与报告
+    await asyncio.to_thread(detector.index, candidates)
+    await asyncio.to_thread(inherit_from_canonical, set(links.values()))
+    # 5.2 为新论文建任务 (相关的进入分析队列，不相关的直接终止，重复的不再处理)
+    await asyncio.to_thread(enqueue_new_papers)
+
+    # 6. 所有论文入库后再推进 arXiv 水位线
+    await asyncio.to_thread(arxiv_scout.commit_watermark)
+
+    stats = triage.cache_stats()
+    logger.info(f"♻️ 筛选缓存命中率: {stats['hit_rate']:.1%} (命中 {stats['hits']} / 未命中 {stats['misses']})")
+    return candidates
+
+def run_ingestion_pipeline(arxiv_scout: ArxivScout | None = None, elsevier_scout: ElsevierScout | None = None,
+                           triage: RelevanceFilter | None = None) -> list:
+    """
+    单次运行的入库阶段，返回本轮入库的新论文。
+    各 Agent 可从外部传入 (例如基准测试中指向本地替身服务)，默认使用 build_ingestion_agents 的配置。
+    """
+    create_db_and_tables()
+    agents = build_ingestion_agents(arxiv_scout, elsevier_scout, triage)
+
+    async def _run():
+        try:
+            return await ingest(*agents)
+        finally:
+            await agents[1].aclose()
+            await get_gateway().aclose()  # LLM 客户端的连接池绑定在本次 asyncio.run 的事件循环上
+
+    return asyncio.run(_run())
+
+def build_analysis_pipeline(elsevier_scout: ElsevierScout | None = None) -> AnalysisPipeline:
     '''
-    Docstring for run_analysis_phase
+    下载、解析、评审、入库四个阶段流水线并行执行 (见 pipeline/analysis.py)，
+    各阶段的 worker 数可按网络、CPU 与 LLM 配额分别调整。
+    elsevier_scout: 下载阶段抓取 Elsevier 全文 XML 时复用的 Scout (常驻进程与入库阶段共用连接池)
     '''
-    reviewer = PaperReviewer()
-    downloader = DownloadManager()
-
-    with Session(engine) as session:
-        # 1. 获取所有已下载且相关的论文
-        papers = session.exec(
-            select(Paper).where(
-                Paper.is_relevant == True,
-            )
-        ).all()
-
-        for paper in papers:
-            if paper.analysis_report:
-                logger.info(f"跳过已分析的论文: {paper.id}")
-                continue
-            logger.info(f"开始分析论文: {paper.id} ...")
-
-            # 2. 确认 PDF 已下载
-            save_path = f"data/papers/{paper.id}.pdf".replace(":", "_")
-            if paper.download_status != "downloaded":
-                status = await downloader.process_download(
-                    paper_id=paper.id,
-                    url=paper.url,
-                    source=paper.source
-                )
-                if status != "downloaded":
-                    logger.error(f"论文 {paper.id} 下载失败，跳过分析。")
-                    continue
-                paper.download_status = status
-                session.add(paper)
-                session.commit()
-
-            # 3. 运行分析
-            if paper.download_status == "downloaded":
-                if paper.source == "arxiv":
-                    report = reviewer.analyze_paper(paper, pdf_path=save_path)
-                else:
-                    report = reviewer.analyze_paper(paper, xml_content=paper.full_text_content)
-                paper.analysis_report = report
-                session.add(paper)
-                session.commit()
-                logger.success(f"论文 {paper.id} 分析完成。")
+    return AnalysisPipeline(downloader=DownloadManager(elsevier=elsevier_scout),
+                            download_workers=4, review_workers=4, queue_size=8)
+
+async def run_analysis_phase():
+    try:
+        await build_analysis_pipeline().run()
+    finally:
+        await get_gateway().aclose()
 
 
 if __name__ == "__main__":
-    run_ingestion_pipeline()
-    
-    asyncio.run(run_analysis_phase())
\ No newline at end of file
+    create_db_and_tables()
+    # 各阶段的耗时、流量与 token 在运行结束时写入 pipeline_runs / stage_metrics (Dashboard 的 Pipeline health 页)
+    with get_telemetry().run("main_demo"):
+        run_ingestion_pipeline()
+        asyncio.run(run_analysis_phase())
+    get_gateway().metrics.log_summary()  # 各任务的 LLM 调用次数、token 与延迟
@@ -1,96 +1,252 @@
 import os
-import requests
+import re
+import asyncio
+from urllib.parse import urlparse
+import httpx
+from loguru import logger
+from sqlmodel import Session, select
+from src.research_agent.storage.models import Paper, FULL_TEXT, engine
+from src.research_agent.storage.blobs import save_blob
+from src.research_agent.agents.scout.elsevier_scout import ElsevierScout
+from src.research_agent.telemetry.spans import get_telemetry, span
 # from src.research_agents.acquisition.browser_engine import BrowserEngine
 
+PDF_MAGIC = b"%PDF"
+PDF_EOF = b"%%EOF"
+# 与 PDF 阅读器一致，只在文件最后 1 KB 内查找结束标记
+PDF_TAIL_BYTES = 1024
+CONTENT_RANGE_PATTERN = re.compile(r"bytes (\d+)-")
+
 class DownloadManager:
-    def __init__(self, storage_dir="data/papers"):
+    def __init__(self, storage_dir="data/papers", per_host_limit: int = 2, chunk_size: int = 64 * 1024,
+                 timeout: float = 60.0, max_retries: int = 3, elsevier: ElsevierScout | None = None):
+        """
+        per_host_limit: 同一主机的并发下载上限 (对 arxiv.org 保持礼貌)
+        chunk_size: 流式写盘的块大小
+        max_retries: 网络中断时基于 Range 续传的重试次数
+        elsevier: 抓取 Elsevier 全文 XML 用的 Scout (复用其 API Key 与连接池)，None 表示按需创建默认实例
+        """
         self.storage_dir = storage_dir
         os.makedirs(self.storage_dir, exist_ok=True)
+        self.per_host_limit = per_host_limit
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._client: httpx.AsyncClient | None = None
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self._elsevier = elsevier
+        self._owns_elsevier = elsevier is None
         # self.browser_engine = BrowserEngine()
 
+    def _get_client(self) -> httpx.AsyncClient:
+        # 延迟创建，保证客户端绑定在调用方的事件循环上
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout, follow_redirects=True)
+        return self._client
+
+    @property
+    def elsevier(self) -> ElsevierScout:
+        if self._elsevier is None:
+            self._elsevier = ElsevierScout()
+        return self._elsevier
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._owns_elsevier and self._elsevier is not None:
+            await self._elsevier.aclose()  # 外部传入的 Scout 由调用方关闭
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
     def _is_valid_pdf(self, file_path: str) -> bool:
-        """简单的 PDF 文件头校验"""
+        """PDF 文件头与结束标记校验，截断或拼接错位的文件没有 %%EOF"""
         try:
             with open(file_path, "rb") as f:
                 header = f.read(4)
-                return header == b"%PDF"
+                f.seek(max(0, os.path.getsize(file_path) - PDF_TAIL_BYTES))
+                return header == PDF_MAGIC and PDF_EOF in f.read()
         except:
             return False
 
-    def download_arxiv_direct(self, url: str, save_path: str) -> bool:
-        """策略 A: arXiv 直接下载 (快速)"""
-        try:
-            # 将 /abs/ 替换为 /pdf/
-            pdf_url = url.replace("/abs/", "/pdf/") + ".pdf"
-            response = requests.get(pdf_url, timeout=30)
-            if response.status_code == 200:
-                with open(save_path, "wb") as f:
-                    f.write(response.content)
-                return True
+    async def _stream_to_part(self, pdf_url: str, part_path: str) -> bool:
+        """
+        把响应流式写入 .part 临时文件。已有部分内容时用 HTTP Range 续传。
+        返回 True 表示完整下载；内容不是 PDF 时删除临时文件并返回 False。
+        续传请求返回 416，或 206 的 Content-Range 不是从已有长度开始时，删除临时文件从头下载。
+        """
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        async with self._get_client().stream("GET", pdf_url, headers=headers) as response:
+            restart = None
+            if response.status_code == 416 and offset:
+                # .part 可能来自已变化的文件或本身已损坏，不能据此认为下载完整
+                restart = "HTTP 416"
+            elif response.status_code == 206:
+                content_range = response.headers.get("content-range", "")
+                match = CONTENT_RANGE_PATTERN.match(content_range)
+                if not match or int(match.group(1)) != offset:
+                    restart = f"Content-Range 为 {content_range!r}，期望从 {offset} 开始"
+            if restart is None:
+                return await self._write_part(response, pdf_url, part_path, offset)
+        if not offset:
+            logger.warning(f"⚠️ 下载失败 {pdf_url}: {restart}")
+            return False
+        logger.warning(f"⚠️ 无法续传 ({restart})，从头重新下载: {pdf_url}")
+        os.remove(part_path)
+        return await self._stream_to_part(pdf_url, part_path)
+
+    async def _write_part(self, response: httpx.Response, pdf_url: str, part_path: str, offset: int) -> bool:
+        """把 200 / 206 响应的内容写入 .part (206 时追加在已有内容之后)"""
+        if response.status_code == 200:
+            offset = 0  # 服务器不支持 Range，从头写
+        elif response.status_code != 206:
+            logger.warning(f"⚠️ 下载失败 {pdf_url}: HTTP {response.status_code}")
             return False
-        except Exception as e:
-            print(f"Arxiv 下载错误: {e}")
+
+        expected = response.headers.get("content-length")
+        written = 0
+        head = b""
+        with open(part_path, "ab" if offset else "wb") as f:
+            async for chunk in response.aiter_bytes(self.chunk_size):
+                if offset == 0 and len(head) < len(PDF_MAGIC):
+                    # 边下载边校验文件头，登录页 / 验证码页尽早放弃
+                    head += chunk[:len(PDF_MAGIC) - len(head)]
+                    if len(head) >= len(PDF_MAGIC) and head != PDF_MAGIC:
+                        f.close()
+                        os.remove(part_path)
+                        logger.warning(f"⚠️ 返回的内容不是 PDF: {pdf_url}")
+                        return False
+                f.write(chunk)
+                written += len(chunk)
+        if expected is not None and written != int(expected):
+            raise httpx.ReadError(f"响应不完整: {written}/{expected} bytes")
+        return True
+
+    async def download_arxiv_direct(self, url: str, save_path: str) -> bool:
+        """策略 A: arXiv 直接下载 (流式 + 断点续传 + 原子重命名)"""
+        # 将 /abs/ 替换为 /pdf/
+        pdf_url = url.replace("/abs/", "/pdf/") + ".pdf"
+        part_path = save_path + ".part"
+        async with self._host_limit(pdf_url):
+            for attempt in range(self.max_retries + 1):
+                try:
+                    if not await self._stream_to_part(pdf_url, part_path):
+                        return False
+                    if not self._is_valid_pdf(part_path):
+                        os.remove(part_path)
+                        return False
+                    os.replace(part_path, save_path)  # 原子重命名，save_path 要么不存在要么完整
+                    return True
+                except (httpx.TransportError, OSError) as e:
+                    if attempt == self.max_retries:
+                        logger.error(f"Arxiv 下载错误: {e}")
+                        return False
+                    logger.warning(f"⏳ 下载中断 ({e})，第 {attempt + 1} 次续传: {pdf_url}")
+                    await asyncio.sleep(2 ** attempt)
+        return False
+
+    async def fetch_elsevier_full_text(self, paper_id: str, doi: str) -> bool:
+        """元数据优先模式入库的 Elsevier 论文：抓取全文 XML 存入 PaperBlob (代替 PDF)"""
+        async with self._host_limit(self.elsevier.article_base_url):
+            xml = await self.elsevier.fetch_full_text_async(doi)
+        if not xml:
             return False
+        await asyncio.to_thread(save_blob, paper_id, FULL_TEXT, xml)
+        return True
 
-    async def process_download(self, paper_id: str, url: str, source: str) -> str:
+    async def process_download(self, paper_id: str, url: str, source: str, doi: str | None = None) -> str:
         """
         主入口。返回: 'downloaded', 'failed', 'login_required'
+        Elsevier 论文 (需要 doi) 抓取的是全文 XML，存入数据库而不是 PDF 文件。
         """
+        if source.startswith("elsevier") and doi:
+            async with span("download.elsevier") as s:
+                logger.info(f"📄 抓取 Elsevier 全文 XML: {paper_id}")
+                if await self.fetch_elsevier_full_text(paper_id, doi):
+                    s.add(items=1)
+                    return "downloaded"
+                s.fail()
+                return "failed"
+
         filename = f"{paper_id.replace(':', '_')}.pdf"
         save_path = os.path.join(self.storage_dir, filename)
-        
-        if os.path.exists(save_path):
-            print(f"📦 文件已存在: {filename}")
-            return "downloaded"
 
-        success = False
-        
-        # === 路由逻辑 ===
-        if "arxiv" in source.lower():
-            print("🚀 使用 HTTP 直接下载策略 (Arxiv)")
-            success = self.download_arxiv_direct(url, save_path)
-        else:
-            print("🕵️ 使用 浏览器 仿真下载策略 (Auth/External)")
-            # 只有非 arXiv 才启动浏览器，节省资源
-            # success = await self.browser_engine.download_pdf(url, save_path)
-
-        # === 结果校验 ===
-        if success and self._is_valid_pdf(save_path):
+        if self._is_valid_pdf(save_path):
+            logger.info(f"📦 文件已存在: {filename}")
+            get_telemetry().record("download.existing", items=1)
             return "downloaded"
-        else:
-            # 下载了但不是PDF（可能是登录页或验证码页）
-            if os.path.exists(save_path): os.remove(save_path) 
-            return "failed"
-            
 
-async def main():
-    downloarder = DownloadManager()
-    with Session(engine) as session:
-        statement = select(Paper).where(Paper.is_relevant == True).\
-            where(Paper.download_status == "pending")
-        papers_to_download = session.exec(statement).all()
-        logger.info(f"找到 {len(papers_to_download)} 篇待下载论文。")
-
-        for paper in papers_to_download:
-            logger.info(f"开始下载论文: {paper.id} ...")
-
-            status = await downloarder.process_download(
-                paper_id=paper.id,
-                url=paper.url,
-                source=paper.source
-            )
-
-            paper.download_status = status
-            session.add(paper)
+        async with span("download") as s:
+            success = False
+
+            # === 路由逻辑 ===
+            if "arxiv" in source.lower():
+                logger.info(f"🚀 使用 HTTP 直接下载策略 (Arxiv): {paper_id}")
+                success = await self.download_arxiv_direct(url, save_path)
+            else:
+                logger.info("🕵️ 使用 浏览器 仿真下载策略 (Auth/External)")
+                # 只有非 arXiv 才启动浏览器，节省资源
+                # success = await self.browser_engine.download_pdf(url, save_path)
+
+            # === 结果校验 ===
+            if success and self._is_valid_pdf(save_path):
+                s.add(items=1, nbytes=os.path.getsize(save_path))
+                return "downloaded"
+            else:
+                # 下载了但不是PDF（可能是登录页或验证码页）
+                s.fail()
+                if os.path.exists(save_path): os.remove(save_path)
+                return "failed"
+
+    async def download_pending(self, limit: int | None = None, concurrency: int = 8) -> dict[str, str]:
+        """
+        并行清空 download_status == "pending" 的相关论文队列，返回 {paper_id: status}。
+        总并发受 concurrency 限制，同一主机再受 per_host_limit 限制。
+        """
+        with Session(engine) as session:
+            statement = select(Paper.id, Paper.url, Paper.source, Paper.doi).where(Paper.is_relevant == True).\
+                where(Paper.download_status == "pending")
+            if limit:
+                statement = statement.limit(limit)
+            pending = session.exec(statement).all()
+        logger.info(f"找到 {len(pending)} 篇待下载论文。")
+
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _download(paper_id: str, url: str, source: str, doi: str | None) -> str:
+            async with sem:
+                try:
+                    return await self.process_download(paper_id=paper_id, url=url, source=source, doi=doi)
+                except Exception as e:
+                    logger.error(f"论文 {paper_id} 下载异常: {e}")
+                    return "failed"
+
+        statuses = await asyncio.gather(*(_download(*row) for row in pending))
+        results = {row[0]: status for row, status in zip(pending, statuses)}
+
+        with Session(engine) as session:
+            for paper_id, status in results.items():
+                paper = session.get(Paper, paper_id)
+                if paper:
+                    paper.download_status = status
+                    session.add(paper)
             session.commit()
-    
-            logger.info(f"论文 {paper.id} 下载状态: {status}")
+        done = sum(1 for status in results.values() if status == "downloaded")
+        logger.info(f"下载完成: 成功 {done} 篇，失败 {len(results) - done} 篇")
+        return results
+
+
+async def main():
+    downloader = DownloadManager()
+    try:
+        await downloader.download_pending()
+    finally:
+        await downloader.aclose()
 
 if __name__ == "__main__":
-    from src.research_agent.storage.models import Paper, engine
-    from sqlmodel import Session, select
-    from loguru import logger
-    import asyncio
-    
     asyncio.run(main())
-    
\ No newline at end of file
@@ -0,0 +1,257 @@
+# src/research_agent/agents/analysis/batch_parser.py
+import asyncio
+import math
+import os
+import signal
+import time
+import weakref
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Iterator
+import pymupdf4llm
+from loguru import logger
+from src.research_agent.agents.analysis.parse_cache import ParseCache
+from src.research_agent.agents.analysis.parser import PARSER_VERSION, PDFParser, get_default_cache
+from src.research_agent.telemetry.spans import get_telemetry
+
+try:
+    import resource  # 仅 Unix 可用
+except ImportError:
+    resource = None
+
+
+@dataclass
+class ParseResult:
+    pdf_path: str
+    markdown: str | None = None
+    error: str | None = None
+    elapsed: float = 0.0
+    cached: bool = False
+    interrupted: bool = False  # 所在进程池因其他文档卡死被终止，文档本身没有问题，可直接重试
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and bool(self.markdown)
+
+
+PARENT_GRACE = 10.0  # SIGALRM 之外父进程再多等的秒数
+
+
+class ParseTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise ParseTimeout()
+
+
+def _init_worker(memory_limit_mb: int | None):
+    """子进程初始化：设置地址空间上限，超出时解析抛 MemoryError 而不是拖垮整机"""
+    if memory_limit_mb and resource is not None:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _parse_in_worker(pdf_path: str, timeout: float, pages_per_chunk: int | None, options: dict) -> tuple[str, float]:
+    """在子进程中执行解析；用 SIGALRM 实现单文档的墙钟超时"""
+    start = time.perf_counter()
+    use_alarm = hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.alarm(max(1, math.ceil(timeout)))
+    try:
+        if pages_per_chunk:
+            parser = PDFParser(use_cache=False)
+            markdown = "\n\n".join(parser.iter_markdown_chunks(pdf_path, pages_per_chunk, **options))
+        else:
+            # 直接调用 pymupdf4llm：PDFParser.parse_to_markdown 会吞掉异常，超时和内存错误将无法区分
+            markdown = pymupdf4llm.to_markdown(pdf_path, **options)
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+    return markdown, time.perf_counter() - start
+
+
+class BatchPDFParser:
+    """
+    多进程批量解析 PDF。每个文档有独立的墙钟超时和内存上限，失败只记录在结果里，不会中断整批。
+    结果按完成顺序产出，调用方可以边解析边把结果交给 LLM 阶段 (parse-ahead)。
+    """
+
+    def __init__(self, workers: int | None = None, timeout: float = 180.0, memory_limit_mb: int | None = 2048,
+                 pages_per_chunk: int | None = None, cache: ParseCache | None = None, use_cache: bool = True):
+        """
+        workers: 进程数，默认等于 CPU 核数
+        timeout: 单个文档的解析超时 (秒)
+        memory_limit_mb: 单个工作进程的地址空间上限，None 表示不限制
+        pages_per_chunk: 按页分块解析，降低超长文档的峰值内存
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.pages_per_chunk = pages_per_chunk
+        self.cache = (cache or get_default_cache()) if use_cache else None
+        self._pool: ProcessPoolExecutor | None = None
+        self._killed_pools = weakref.WeakSet()  # 被 _kill_pool 终止的进程池，其上在途的文档不算解析失败
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.memory_limit_mb,)
+            )
+        return self._pool
+
+    def _kill_pool(self):
+        """卡死在 C 代码里、连 SIGALRM 都无法打断的进程只能整体终止后重建进程池"""
+        if self._pool is None:
+            return
+        self._killed_pools.add(self._pool)
+        for process in list(getattr(self._pool, "_processes", {}).values()):
+            process.terminate()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _options_for_key(self, options: dict) -> dict:
+        return {**options, "pages_per_chunk": self.pages_per_chunk} if self.pages_per_chunk else options
+
+    def iter_parse(self, pdf_paths: list[str], **options) -> Iterator[ParseResult]:
+        """按完成顺序逐个产出 ParseResult；在途文档数不超过 workers，保证每个在途文档都占有一个进程"""
+        queue = deque()
+        for pdf_path in pdf_paths:
+            if not os.path.exists(pdf_path):
+                yield ParseResult(pdf_path, error="PDF 文件不存在")
+                continue
+            key = ParseCache.make_key(pdf_path, PARSER_VERSION, self._options_for_key(options)) if self.cache else None
+            cached = self.cache.get(key) if key else None
+            if cached is not None:
+                get_telemetry().record("parse.cache_hit", items=1)
+                yield ParseResult(pdf_path, markdown=cached, cached=True)
+            else:
+                queue.append((pdf_path, key))
+
+        in_flight: dict[Future, tuple[str, str | None, float | None]] = {}
+        pools: dict[Future, ProcessPoolExecutor] = {}
+        while queue or in_flight:
+            while queue and len(in_flight) < self.workers:
+                pdf_path, key = queue.popleft()
+                pool = self._get_pool()
+                future = pool.submit(_parse_in_worker, pdf_path, self.timeout, self.pages_per_chunk, options)
+                in_flight[future] = (pdf_path, key, None)
+                pools[future] = pool
+
+            done, _ = wait(list(in_flight), timeout=1.0, return_when=FIRST_COMPLETED)
+            for future in done:
+                pdf_path, key, _ = in_flight.pop(future)
+                yield self._collect(future, pdf_path, key, pools.pop(future))
+
+            # 父进程兜底：超过 timeout + grace 仍未返回的文档视为卡死。
+            # 计时从父进程首次看到 running 开始
+            now = time.monotonic()
+            hung = []
+            for future, (pdf_path, key, started) in list(in_flight.items()):
+                if started is None:
+                    if future.running():
+                        in_flight[future] = (pdf_path, key, now)
+                elif now - started > self.timeout + PARENT_GRACE:
+                    hung.append(future)
+            if hung:
+                for future in hung:
+                    pdf_path, key, _ = in_flight.pop(future)
+                    yield ParseResult(pdf_path, error=f"解析超时 (>{self.timeout:.0f}s，工作进程无响应)")
+                # 同一进程池中其余在途文档重新排队
+                queue.extendleft(reversed([(p, k) for p, k, _ in in_flight.values()]))
+                in_flight.clear()
+                pools.clear()
+                self._kill_pool()
+
+    def _collect(self, future: Future, pdf_path: str, key: str | None, pool: ProcessPoolExecutor) -> ParseResult:
+        try:
+            markdown, elapsed = future.result()
+        except BaseException as e:
+            return self._finish(pdf_path, key, error=e, pool=pool)
+        return self._finish(pdf_path, key, markdown, elapsed)
+
+    def _finish(self, pdf_path: str, key: str | None, markdown: str | None = None, elapsed: float = 0.0,
+                error: BaseException | None = None, pool: ProcessPoolExecutor | None = None) -> ParseResult:
+        if isinstance(error, ParseTimeout):
+            result = ParseResult(pdf_path, error=f"解析超时 (>{self.timeout:.0f}s)")
+        elif isinstance(error, MemoryError):
+            result = ParseResult(pdf_path, error=f"超出内存上限 ({self.memory_limit_mb} MB)")
+        elif isinstance(error, BrokenProcessPool) and pool in self._killed_pools:
+            # 同池的其他文档卡死，进程池被主动终止：不是本文档的问题
+            logger.info(f"🔁 解析被中断 (同池其他文档超时，进程池已重建): {pdf_path}")
+            get_telemetry().record("parse.interrupted", items=1)
+            return ParseResult(pdf_path, error="进程池被终止，解析被中断", interrupted=True)
+        elif isinstance(error, BrokenProcessPool):
+            # 工作进程被系统杀死 (如 OOM)，进程池需要重建；此时可能已经换了新池，只重置出错的那个
+            if pool is not None and self._pool is pool:
+                self._pool = None
+                pool.shutdown(wait=False, cancel_futures=True)
+            result = ParseResult(pdf_path, error="工作进程异常退出")
+        elif isinstance(error, Exception):
+            result = ParseResult(pdf_path, error=f"{type(error).__name__}: {error}")
+        elif error is not None:
+            raise error
+        else:
+            result = ParseResult(pdf_path, markdown=markdown, elapsed=elapsed,
+                                 error=None if markdown else "解析结果为空")
+            if self.cache and markdown:
+                try:
+                    self.cache.put(key, markdown)
+                except OSError as e:
+                    logger.warning(f"⚠️ 写入解析缓存失败: {e}")
+        if result.error:
+            logger.warning(f"⚠️ 解析失败 {pdf_path}: {result.error}")
+        # elapsed 为工作进程内的解析耗时，不含排队时间
+        get_telemetry().record("parse.pdf", elapsed, error=bool(result.error), items=int(result.ok),
+                               nbytes=len(markdown.encode("utf-8")) if result.ok else 0)
+        return result
+
+    async def parse_async(self, pdf_path: str, **options) -> ParseResult:
+        """
+        在事件循环中解析单个文档 (供流水线使用)。同时等待的调用数应不超过 workers，
+        否则排队时间也会计入父进程侧的超时。
+        """
+        if not os.path.exists(pdf_path):
+            return ParseResult(pdf_path, error="PDF 文件不存在")
+        key = ParseCache.make_key(pdf_path, PARSER_VERSION, self._options_for_key(options)) if self.cache else None
+        cached = await asyncio.to_thread(self.cache.get, key) if key else None
+        if cached is not None:
+            get_telemetry().record("parse.cache_hit", items=1)
+            return ParseResult(pdf_path, markdown=cached, cached=True)
+
+        pool = self._get_pool()
+        future = pool.submit(_parse_in_worker, pdf_path, self.timeout, self.pages_per_chunk, options)
+        try:
+            markdown, elapsed = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout + PARENT_GRACE)
+        except asyncio.TimeoutError:
+            # 工作进程卡死且无法被 SIGALRM 打断，只能重建进程池 (同池在途的文档以 interrupted 结果返回)
+            if self._pool is pool:
+                self._kill_pool()
+            logger.warning(f"⚠️ 解析失败 {pdf_path}: 工作进程无响应")
+            get_telemetry().record("parse.pdf", self.timeout + PARENT_GRACE, error=True)
+            return ParseResult(pdf_path, error=f"解析超时 (>{self.timeout:.0f}s，工作进程无响应)")
+        except BaseException as e:
+            return self._finish(pdf_path, key, error=e, pool=pool)
+        return self._finish(pdf_path, key, markdown, elapsed)
+
+    def parse_batch(self, pdf_paths: list[str], **options) -> dict[str, ParseResult]:
+        """解析整批文档，返回 {pdf_path: ParseResult} (按输入顺序)"""
+        start = time.perf_counter()
+        results = {result.pdf_path: result for result in self.iter_parse(pdf_paths, **options)}
+        failed = sum(1 for result in results.values() if not result.ok)
+        logger.info(f"📚 批量解析 {len(results)} 个 PDF，失败 {failed} 个，耗时 {time.perf_counter() - start:.1f}s ({self.workers} 进程)")
+        return {pdf_path: results[pdf_path] for pdf_path in pdf_paths if pdf_path in results}
@@ -0,0 +1,186 @@
+# src/research_agent/agents/analysis/context_builder.py
+import re
+from dataclasses import dataclass, field
+from src.research_agent.llm.tokens import Tokenizer, get_tokenizer
+
+# Markdown 标题 (# ...) 或 PDF 解析出的加粗编号标题 (**3.1 Method**)
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+?)\s*#*$|^\*\*((\d+(?:\.\d+)*)\.?\s+[^*]{2,120})\*\*\s*$", re.M)
+
+# (类别, 优先级, 标题关键词)；优先级越小越先放入上下文
+SECTION_PRIORITIES = [
+    ("abstract", 0, ("abstract", "summary", "highlights", "摘要")),
+    ("introduction", 1, ("introduction", "引言", "绪论")),
+    ("method", 2, ("method", "approach", "model", "framework", "proposed", "design", "algorithm", "methodology", "方法")),
+    ("results", 3, ("result", "experiment", "evaluation", "discussion", "case study", "validation", "结果", "实验")),
+    ("conclusion", 4, ("conclusion", "concluding", "future work", "结论")),
+    ("related", 6, ("related work", "literature", "background", "preliminar")),
+    ("appendix", 7, ("appendix", "supplementary")),
+]
+OTHER_PRIORITY = 5
+FRONT_MATTER_PRIORITY = 0  # 首个标题之前的内容：标题、作者，PDF 中通常还包含摘要
+
+# 对评审没有帮助的章节，直接丢弃
+DROP_KEYWORDS = ("reference", "bibliography", "acknowledg", "funding", "declaration of", "conflict of interest",
+                 "author contribution", "data availability", "参考文献", "致谢")
+
+
+@dataclass
+class Section:
+    title: str
+    level: int
+    text: str
+    index: int
+    category: str = "other"
+    priority: int = OTHER_PRIORITY
+    tokens: int = 0
+
+
+@dataclass
+class ReviewContext:
+    text: str
+    tokens: int
+    total_tokens: int                      # 原文 (去掉丢弃章节后) 的 token 数
+    included: list[str] = field(default_factory=list)
+    truncated: list[str] = field(default_factory=list)
+    omitted: list[str] = field(default_factory=list)
+
+
+def _classify(title: str) -> tuple[str, int] | None:
+    """返回 (类别, 优先级)；应丢弃的章节返回 None，无法识别的返回 ("other", OTHER_PRIORITY)"""
+    lowered = re.sub(r"^[\d.\s]+", "", title.lower().replace("*", ""))
+    if lowered.startswith(DROP_KEYWORDS):
+        return None
+    for category, priority, keywords in SECTION_PRIORITIES:
+        if any(k in lowered for k in keywords):
+            return category, priority
+    return "other", OTHER_PRIORITY
+
+
+def split_sections(markdown: str) -> list[Section]:
+    """按标题切分 Markdown；无法识别的子章节继承上级章节的类别，被丢弃章节的子章节一并丢弃"""
+    matches = list(HEADING_PATTERN.finditer(markdown))
+    sections = []
+    front = markdown[:matches[0].start()] if matches else markdown
+    if front.strip():
+        sections.append(Section("(front matter)", 0, front.strip(), 0, "front", FRONT_MATTER_PRIORITY))
+
+    stack: list[tuple[int, Section | None]] = []  # (标题层级, 章节)；None 表示该章节已丢弃
+    for i, m in enumerate(matches):
+        if m.group(1):
+            level, title = len(m.group(1)), m.group(2).strip()
+        else:
+            level, title = m.group(4).count(".") + 2, m.group(3).strip()
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(markdown)
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        parent = stack[-1][1] if stack else None
+
+        if stack and parent is None:
+            kind = None
+        elif not sections:
+            kind = "front", FRONT_MATTER_PRIORITY  # 文档开头的标题 (论文题目)
+        else:
+            kind = _classify(title)
+            if kind and kind[0] == "other" and parent is not None and parent.category != "front":
+                kind = parent.category, parent.priority
+
+        if kind is None:
+            stack.append((level, None))
+            continue
+        section = Section(title, level, markdown[m.start():end].strip(), len(sections), *kind)
+        stack.append((level, section))
+        sections.append(section)
+    return sections
+
+
+class ContextBuilder:
+    """
+    在 token 预算内为评审组装论文上下文：按 摘要 > 引言 > 方法 > 结果 > 结论 > 其他 的优先级放入整节，
+    放不下的章节截断或省略，最终按原文顺序输出。
+    """
+
+    def __init__(self, budget: int = 12000, tokenizer: Tokenizer | None = None, min_partial_tokens: int = 300):
+        """
+        budget: 论文内容部分的 token 上限 (不含系统 Prompt)
+        min_partial_tokens: 剩余预算不少于该值时，放不下的章节截断后放入
+        """
+        self.budget = budget
+        self.tokenizer = tokenizer or get_tokenizer()
+        self.min_partial_tokens = min_partial_tokens
+
+    def sections(self, markdown: str) -> list[Section]:
+        sections = split_sections(markdown)
+        for section in sections:
+            section.tokens = self.tokenizer.count(section.text)
+        return sections
+
+    def build(self, markdown: str, sections: list[Section] | None = None) -> ReviewContext:
+        sections = sections if sections is not None else self.sections(markdown)
+        total = sum(s.tokens for s in sections)
+        remaining = self.budget - 50  # 预留给省略说明
+        chosen: dict[int, str] = {}
+        context = ReviewContext(text="", tokens=0, total_tokens=total)
+        for section in sorted(sections, key=lambda s: (s.priority, s.index)):
+            if section.tokens <= remaining:
+                chosen[section.index] = section.text
+                remaining -= section.tokens
+                context.included.append(section.title)
+            elif remaining >= self.min_partial_tokens:
+                chosen[section.index] = self.tokenizer.truncate(section.text, remaining - 20) + "\n\n…(本节已截断)"
+                remaining = 0
+                context.truncated.append(section.title)
+            else:
+                context.omitted.append(section.title)
+
+        parts = [chosen[s.index] for s in sections if s.index in chosen]
+        if context.omitted:
+            parts.append(f"(因篇幅限制省略的章节: {'; '.join(context.omitted)})")
+        context.text = "\n\n".join(parts)
+        context.tokens = self.tokenizer.count(context.text)
+        return context
+
+    def _units(self, section: Section, max_tokens: int) -> list[tuple[str, int]]:
+        """超长章节按段落拆开；单个超长段落截断"""
+        if section.tokens <= max_tokens:
+            return [(section.text, section.tokens)]
+        units = []
+        for paragraph in section.text.split("\n\n"):
+            tokens = self.tokenizer.count(paragraph)
+            if tokens > max_tokens:
+                paragraph, tokens = self.tokenizer.truncate(paragraph, max_tokens), max_tokens
+            if paragraph.strip():
+                units.append((paragraph, tokens))
+        return units
+
+    def chunk(self, sections: list[Section], chunk_tokens: int, max_chunks: int | None = None) -> list[str]:
+        """
+        按章节 / 段落边界把文档切成不超过 chunk_tokens 的块，用于 map-reduce 摘要。
+        max_chunks: 块数上限；超出时先丢弃优先级最低的章节，使 map 调用次数可预期
+        """
+        sections = sorted(sections, key=lambda s: s.index)
+        if max_chunks:
+            capacity = int(chunk_tokens * max_chunks * 0.9)  # 留出装箱时的碎片空间
+            excess = sum(s.tokens for s in sections) - capacity
+            for section in sorted(sections, key=lambda s: (-s.priority, -s.index)):
+                if excess <= 0:
+                    break
+                if section.tokens <= excess:
+                    sections = [s for s in sections if s is not section]
+                else:
+                    trimmed = Section(section.title, section.level,
+                                      self.tokenizer.truncate(section.text, section.tokens - excess),
+                                      section.index, section.category, section.priority, section.tokens - excess)
+                    sections = [trimmed if s is section else s for s in sections]
+                excess -= section.tokens
+
+        chunks, current, used = [], [], 0
+        for section in sections:
+            for text, tokens in self._units(section, chunk_tokens):
+                if current and used + tokens > chunk_tokens:
+                    chunks.append("\n\n".join(current))
+                    current, used = [], 0
+                current.append(text)
+                used += tokens
+        if current:
+            chunks.append("\n\n".join(current))
+        return chunks[:max_chunks] if max_chunks else chunks
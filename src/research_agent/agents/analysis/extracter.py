@@ -2,7 +2,7 @@ from src.research_agent.agents.analysis.parser import PDFParser
 from src.research_agent.storage.models import Paper, engine
 
 from sqlmodel import Session
-from openai import OpenAI
+from src.research_agent.llm.gateway import get_gateway
 import os
 from dotenv import load_dotenv
 from loguru import logger
@@ -13,7 +13,7 @@ load_dotenv() # 加载 .env 中的 API KEY
 
 class PDFUploadParser:
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.llm = get_gateway()
         self.parser = PDFParser() # 引用上面的解析器
 
     def refresh_database(self, paper: Paper):
@@ -40,8 +40,8 @@ The output should be a JSON object with the above fields. If any field is not fo
     '''
         full_text = self.parser.parse_to_markdown(pdf_path)
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
+            response = self.llm.complete(
+                "extract",
                 messages=[
                     {"role": "system", "content": parse_prompt},
                     {"role": "user", "content": f"论文全文内容:\n{full_text[:10000]}"} # 截取前1w字符防溢出
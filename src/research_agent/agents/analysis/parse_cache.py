@@ -0,0 +1,87 @@
+# src/research_agent/agents/analysis/parse_cache.py
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from loguru import logger
+
+
+class ParseCache:
+    """
+    PDF -> Markdown 解析结果的磁盘缓存。
+    key = sha256(PDF 内容 + 解析器版本 + 解析参数)，按总大小做 LRU 淘汰 (以文件 mtime 作为最近访问时间)。
+    """
+
+    def __init__(self, cache_dir: str = "data/cache/markdown", max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = sum(f.stat().st_size for f in self.cache_dir.glob("*.md"))
+
+    @staticmethod
+    def make_key(pdf_path: str, parser_version: str, options: dict | None = None) -> str:
+        digest = hashlib.sha256()
+        with open(pdf_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        digest.update(parser_version.encode("utf-8"))
+        digest.update(json.dumps(options or {}, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.md"
+
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            text = path.read_text(encoding="utf-8")
+            os.utime(path)  # 刷新 mtime，标记为最近使用
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key: str, text: str):
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        old_size = path.stat().st_size if path.exists() else 0
+        os.replace(tmp_path, path)  # 原子写入，并发进程不会读到半个文件
+        with self._lock:
+            self._size += path.stat().st_size - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """按最近访问时间从旧到新删除，直到总大小回到上限的 90%"""
+        entries = sorted(
+            ((f.stat().st_mtime, f.stat().st_size, f) for f in self.cache_dir.glob("*.md")),
+            key=lambda entry: entry[0],
+        )
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        evicted = 0
+        for _, size, f in entries:
+            if self._size <= target:
+                break
+            f.unlink(missing_ok=True)
+            self._size -= size
+            evicted += 1
+        if evicted:
+            logger.info(f"🧹 解析缓存淘汰 {evicted} 个条目，当前 {self._size / 1024 / 1024:.1f} MB")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size_bytes": self._size,
+        }
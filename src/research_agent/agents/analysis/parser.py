@@ -1,30 +1,83 @@
 # src/agents/analysis/parser.py
+import pymupdf
 import pymupdf4llm
 import os
+from src.research_agent.agents.analysis.parse_cache import ParseCache
+from src.research_agent.telemetry.spans import get_telemetry, span
+
+# 解析逻辑或参数语义变化时提升后缀版本号，使旧缓存失效
+PARSER_VERSION = f"pymupdf4llm-{pymupdf4llm.__version__}/1"
+
+_default_cache: ParseCache | None = None
+
+def get_default_cache() -> ParseCache:
+    """进程内共享的解析缓存，所有 PDFParser 实例共用同一份命中统计"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ParseCache()
+    return _default_cache
 
 class PDFParser:
-    def parse_to_markdown(self, pdf_path: str) -> str:
+    def __init__(self, cache: ParseCache | None = None, use_cache: bool = True):
+        self.cache = (cache or get_default_cache()) if use_cache else None
+
+    def parse_to_markdown(self, pdf_path: str, **options) -> str:
         """
         将 PDF 转换为 Markdown 文本，保留标题层级和表格。
+        options 会原样传给 pymupdf4llm.to_markdown，并参与缓存 key 的计算。
         """
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF文件未找到: {pdf_path}")
-            
+
+        key = None
+        if self.cache:
+            key = ParseCache.make_key(pdf_path, PARSER_VERSION, options)
+            cached = self.cache.get(key)
+            if cached is not None:
+                print(f"♻️ 命中解析缓存: {pdf_path}")
+                get_telemetry().record("parse.cache_hit", items=1)
+                return cached
+
         print(f"📄 正在解析 PDF 结构: {pdf_path}...")
         try:
             # 这是一个非常强大的函数，它会自动处理双栏布局
-            md_text = pymupdf4llm.to_markdown(pdf_path)
+            with span("parse.pdf") as s:
+                md_text = pymupdf4llm.to_markdown(pdf_path, **options)
+                s.add(items=1, nbytes=len(md_text.encode("utf-8")))
             
             # 简单的清洗，防止 token 溢出（保留前 50k 字符通常足够包含核心内容，可视情况调整）
             # 或者保留全文，交给长窗口模型处理
-            return md_text
         except Exception as e:
             print(f"❌ 解析失败: {e}")
             return ""
+
+        if self.cache and md_text:
+            try:
+                self.cache.put(key, md_text)
+            except OSError as e:
+                print(f"⚠️ 写入解析缓存失败: {e}")
+        return md_text
+
+    def iter_markdown_chunks(self, pdf_path: str, pages_per_chunk: int = 10, **options):
+        """
+        按页分块流式转换，每次只对 pages_per_chunk 页做版面分析，适合超长文档。
+        逐块 yield Markdown 文本 (不经过缓存)。
+        """
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF文件未找到: {pdf_path}")
+        with pymupdf.open(pdf_path) as doc:
+            page_count = doc.page_count
+        for start in range(0, page_count, pages_per_chunk):
+            pages = list(range(start, min(start + pages_per_chunk, page_count)))
+            yield pymupdf4llm.to_markdown(pdf_path, pages=pages, **options)
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats() if self.cache else {}
         
 
 if __name__ == "__main__":
     parser = PDFParser()
     sample_pdf = "data/papers/arxiv_2601.22149v1.pdf"  # 替换为实际的 PDF 文件路径
     markdown_content = parser.parse_to_markdown(sample_pdf)
-    print(markdown_content[:1000])  # 打印前 1000 字符预览
\ No newline at end of file
+    print(markdown_content[:1000])  # 打印前 1000 字符预览
+    print(parser.cache_stats())
@@ -1,12 +1,15 @@
 # src/agents/analysis/reviewer.py
-from openai import OpenAI
-import os
 from loguru import logger
 from src.research_agent.storage.models import Paper
 from src.research_agent.agents.analysis.parser import PDFParser
+from src.research_agent.agents.analysis.xml_converter import ElsevierXMLConverter
+from src.research_agent.agents.analysis.context_builder import ContextBuilder
+from src.research_agent.llm.gateway import get_gateway
+from src.research_agent.llm.tokens import get_tokenizer
+from src.research_agent.config.settings import get_settings
+from src.research_agent.telemetry.spans import span
 from dotenv import load_dotenv
-import yaml
-from pathlib import Path
+import xml.etree.ElementTree as ET
 
 load_dotenv() # 加载 .env 中的 API KEY
 
@@ -25,33 +28,45 @@ You are an expert academic reviewer. Analyze the following paper and provide:
 Provide your analysis in well-structured Markdown format.
 """
 
+REVIEW_ERROR_PREFIX = "LLM 分析出错"
+
+# 分块摘要成功的块数低于该比例时不再评审 (论文内容缺失过多，报告不可信)，交由流水线重试
+MIN_MAP_COVERAGE = 0.5
+
+MAP_PROMPT = """
+You are preparing notes for an expert reviewer who cannot see the full paper.
+Summarize the following excerpt (part {part} of {total}) of an academic paper.
+Keep the problem statement, method details, datasets, quantitative results (with numbers) and stated limitations.
+Be concise and use Markdown bullet points.
+"""
+
 class PaperReviewer:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, model: str | None = None, map_model: str | None = None, context_budget: int = 12000,
+                 map_reduce_threshold: int = 40000, chunk_tokens: int = 6000, max_map_chunks: int = 10):
+        """
+        model / map_model: 评审与分块摘要使用的模型，None 表示按 llm_config.yaml 路由 (review / review_map)
+        context_budget: 发给评审模型的论文内容 token 上限
+        map_reduce_threshold: 论文超过该 token 数时改为分块摘要 (map) 后再评审 (reduce)
+        chunk_tokens / max_map_chunks: map 阶段每块的 token 数与块数上限，决定单篇论文的最大调用次数
+        """
+        self.llm = get_gateway()
         self.parser = PDFParser() # 引用上面的解析器
+        self.xml_converter = ElsevierXMLConverter(include_references=False)
+        self.model = model
+        self.map_model = map_model
+        self.context_builder = ContextBuilder(budget=context_budget, tokenizer=get_tokenizer(model or self.llm.model_for("review")))
+        self.map_reduce_threshold = map_reduce_threshold
+        self.chunk_tokens = chunk_tokens
+        self.max_map_chunks = max_map_chunks
 
     def _load_reviewer_prompt(self) -> str:
-        """Load reviewer prompt from analysis_prompt.yaml"""
-        config_path = Path(__file__).parent.parent.parent / "config" / "analysis_prompt.yaml"
-        try:
-            if config_path.exists():
-                with open(config_path, "r", encoding="utf-8") as f:
-                    config = yaml.safe_load(f)
-                    if config and "template" in config:
-                        prompt = config["template"]
-                        logger.info("✅ Loaded reviewer prompt from analysis_prompt.yaml")
-                        return prompt
-                logger.warning("⚠️ No 'reviewer_prompt template' found in analysis_prompt.yaml, using DEFAULT_PROMPT")
-            else:
-                logger.warning(f"⚠️ Config file not found at {config_path}, using DEFAULT_PROMPT")
-        except Exception as e:
-            logger.warning(f"⚠️ Error loading config: {e}, using DEFAULT_PROMPT")
-        return DEFAULT_PROMPT
+        """评审 Prompt 来自 analysis_prompt.yaml，由配置服务缓存，文件修改后自动生效"""
+        return get_settings().prompt.get().template or DEFAULT_PROMPT
 
     def analyze_paper(self, paper: Paper, pdf_path: str=None, xml_content: str=None) -> str:
         # 1. 解析 PDF 或 XML
-        if xml_content and not pdf_path:  # 使用 XML 内容（如来自 Elsevier）
-            full_text = xml_content
+        if xml_content and not pdf_path:  # 使用 XML 内容（如来自 Elsevier），先转换为精简的 Markdown
+            full_text = self.xml_to_markdown(xml_content)
         elif pdf_path and not xml_content:  # 使用 PDF 文件
             full_text = self.parser.parse_to_markdown(pdf_path)
         else:
@@ -59,25 +74,91 @@ class PaperReviewer:
             return "☹️ 解析失败，无法生成报告。"
         if not full_text:
             return "☹️ 解析失败，无法生成报告。"
+        return self.review_text(paper.title, full_text)
 
-        print(f"🧠 正在深度阅读论文: {paper.title}...")
+    def xml_to_markdown(self, xml_content: str) -> str:
+        with span("parse.xml") as s:
+            try:
+                markdown = self.xml_converter.convert(xml_content)
+            except ET.ParseError as e:
+                logger.warning(f"⚠️ 全文 XML 解析失败 ({e})，直接使用原始内容")
+                s.fail()
+                return xml_content
+            s.add(items=1, nbytes=len(markdown.encode("utf-8")))
+            return markdown
 
-        # 2. 博士级分析 Prompt
+    def review_text(self, title: str, full_text: str) -> str:
+        """对已解析的论文正文 (Markdown) 生成评审报告"""
+        with span("review") as s:
+            report = self._review_text(title, full_text)
+            if report.startswith(REVIEW_ERROR_PREFIX):
+                s.fail()
+            else:
+                s.add(items=1)
+            return report
+
+    def _review_text(self, title: str, full_text: str) -> str:
+        print(f"🧠 正在深度阅读论文: {title}...")
+
+        # 2. 在 token 预算内组装上下文，超长论文先分块摘要
+        sections = self.context_builder.sections(full_text)
+        total_tokens = sum(section.tokens for section in sections)
+        if total_tokens > self.map_reduce_threshold:
+            content_label, content = "论文分块摘要", self._map_reduce(title, sections)
+            if content is None:
+                return f"{REVIEW_ERROR_PREFIX}: 分块摘要失败的块过多，未生成报告"
+        else:
+            content_label = "论文全文内容"
+            context = self.context_builder.build(full_text, sections)
+            content = context.text
+            logger.info(f"📏 上下文 {context.tokens}/{context.total_tokens} tokens "
+                        f"(截断 {len(context.truncated)} 节，省略 {len(context.omitted)} 节)")
+
+        # 3. 博士级分析 Prompt
         # 这里的 Prompt 设计非常关键，必须强制结构化输出
         system_prompt = self._load_reviewer_prompt()
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",  # 建议使用 GPT-4o 以获得最佳推理能力
+            response = self.llm.complete(
+                "review",
+                model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"论文标题: {paper.title}\n\n论文全文内容:\n{full_text}"} # 截取前6w字符防溢出
+                    {"role": "user", "content": f"论文标题: {title}\n\n{content_label}:\n{content}"}
                 ]
             )
             return response.choices[0].message.content
         except Exception as e:
-            return f"LLM 分析出错: {e}"
-        
+            return f"{REVIEW_ERROR_PREFIX}: {e}"
+
+    def _map_reduce(self, title: str, sections: list) -> str | None:
+        """分块摘要 (map)，再把各块笔记压缩进上下文预算 (reduce)；成功的块不足 MIN_MAP_COVERAGE 时返回 None"""
+        chunks = self.context_builder.chunk(sections, self.chunk_tokens, self.max_map_chunks)
+        # 每块摘要的长度上限按预算均分，保证 reduce 阶段的输入不超预算
+        summary_tokens = max(256, self.context_builder.budget // len(chunks))
+        logger.info(f"✂️ 论文过长，分 {len(chunks)} 块摘要后再评审: {title}")
+        notes = []
+        for i, chunk in enumerate(chunks, start=1):
+            try:
+                response = self.llm.complete(
+                    "review_map",
+                    model=self.map_model,
+                    max_tokens=summary_tokens,
+                    messages=[
+                        {"role": "system", "content": MAP_PROMPT.format(part=i, total=len(chunks))},
+                        {"role": "user", "content": chunk},
+                    ],
+                )
+                notes.append(f"### Part {i}/{len(chunks)}\n\n{response.choices[0].message.content}")
+            except Exception as e:
+                logger.warning(f"⚠️ 第 {i} 块摘要失败: {e}")
+        if not notes or len(notes) < MIN_MAP_COVERAGE * len(chunks):
+            logger.error(f"❌ 分块摘要只成功 {len(notes)}/{len(chunks)} 块，放弃评审: {title}")
+            return None
+        context = self.context_builder.build("\n\n".join(notes))
+        logger.info(f"📏 分块摘要上下文 {context.tokens}/{context.total_tokens} tokens")
+        return context.text
+
 
 if __name__ == "__main__":
     # 测试代码
@@ -0,0 +1,274 @@
+# src/research_agent/agents/analysis/xml_converter.py
+import io
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import IO, Iterator
+from loguru import logger
+from src.research_agent.llm.tokens import count_tokens
+
+# 整棵子树直接丢弃的元素 (按去掉命名空间后的本地名匹配)
+SKIP_ELEMENTS = {
+    "meta",            # xocs:meta，文档处理元数据
+    "author-group",    # 作者与单位
+    "objects",         # 图片等附件清单
+    "link",
+    "acknowledgment",
+    "graphic",
+    "float-anchor",
+    "inline-figure",
+}
+
+# 处理完即输出一个 Markdown 块的元素；嵌套在其中的同类元素作为行内内容处理
+TEXT_BLOCKS = {"title", "section-title", "para", "simple-para", "list-item", "keywords", "bib-reference"}
+# 浮动体 (可能嵌在段落中)，总是单独输出
+FLOAT_BLOCKS = {"figure", "table"}
+
+# 参考文献等结构中需要用空格隔开的子元素
+SPACED_INLINE = {"label", "given-name", "surname", "author", "maintitle", "title", "host", "date", "volume-nr", "issue-nr"}
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def _local(tag) -> str:
+    """'{namespace}para' -> 'para'"""
+    if not isinstance(tag, str):
+        return ""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _squash(text: str | None) -> str:
+    return WHITESPACE.sub(" ", text) if text else ""
+
+
+def _inline(elem: ET.Element) -> str:
+    """把段落内的行内标记转换为 Markdown 文本"""
+    parts = [_squash(elem.text)]
+    for child in elem:
+        name = _local(child.tag)
+        if name in SKIP_ELEMENTS or name == "label" and _local(elem.tag) in FLOAT_BLOCKS | {"list-item"}:
+            pass
+        elif name == "math":
+            parts.append("".join(t.strip() for t in child.itertext()))
+        else:
+            inner = _inline(child).strip()
+            if not inner:
+                pass
+            elif name == "italic":
+                parts.append(f"*{inner}*")
+            elif name == "bold":
+                parts.append(f"**{inner}**")
+            elif name == "sup":
+                parts.append(f"^{inner}")
+            elif name == "inf":
+                parts.append(f"_{inner}")
+            elif name == "list-item":
+                parts.append(f"\n- {inner}\n")
+            else:
+                parts.append(f" {inner} " if name in SPACED_INLINE else inner)
+        parts.append(_squash(child.tail))
+    lines = (WHITESPACE.sub(" ", line).strip() for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def _table_to_markdown(table: ET.Element) -> str:
+    label = caption = ""
+    header, body = [], []
+    for child in table.iter():
+        name = _local(child.tag)
+        if name == "label" and not label:
+            label = _inline(child)
+        elif name == "caption":
+            caption = _inline(child)
+        elif name in ("thead", "tbody"):
+            for row in child.iter():
+                if _local(row.tag) == "row":
+                    cells = [_inline(entry).replace("|", "\\|").replace("\n", " ")
+                             for entry in row if _local(entry.tag) == "entry"]
+                    (header if name == "thead" else body).append(cells)
+    lines = [f"**{label}** {caption}".strip(), ""] if label or caption else []
+    rows = header + body
+    if rows:
+        width = max(len(row) for row in rows)
+        rows = [row + [""] * (width - len(row)) for row in rows]
+        head = rows[0] if not header else [" / ".join(filter(None, col)) for col in zip(*header)]
+        rows = rows[1:] if not header else body
+        lines.append("| " + " | ".join(head) + " |")
+        lines.append("|" + " --- |" * width)
+        lines.extend("| " + " | ".join(row) + " |" for row in rows)
+    return "\n".join(lines)
+
+
+def _figure_to_markdown(figure: ET.Element) -> str:
+    label = caption = ""
+    for child in figure:
+        name = _local(child.tag)
+        if name == "label":
+            label = _inline(child)
+        elif name == "caption":
+            caption = _inline(child)
+    return f"**{label}** {caption}".strip() if label or caption else ""
+
+
+class ElsevierXMLConverter:
+    """
+    将 ScienceDirect 全文 XML (Article Retrieval API, application/xml) 流式转换为按章节组织的 Markdown。
+    基于 iterparse 增量解析，已处理的元素立即从树中移除，内存占用与文章长度基本无关。
+    """
+
+    def __init__(self, include_references: bool = False):
+        """
+        include_references: 是否保留参考文献列表 (通常占全文 token 的三成以上)
+        """
+        self.include_references = include_references
+
+    @staticmethod
+    def _open(source) -> IO[bytes]:
+        if isinstance(source, bytes):
+            return io.BytesIO(source)
+        if isinstance(source, str):
+            if source.lstrip().startswith("<"):
+                return io.BytesIO(source.encode("utf-8"))
+            return open(source, "rb")
+        return source  # 已经是文件对象
+
+    def iter_markdown(self, source) -> Iterator[str]:
+        """
+        逐块产出 Markdown (标题、段落、表格、图注)。
+        source: XML 字符串 / bytes / 文件路径 / 二进制文件对象
+        """
+        skip = SKIP_ELEMENTS | (set() if self.include_references else {"bibliography"})
+        stream = self._open(source)
+        stack: list[ET.Element] = []
+        skipping = 0       # 位于被丢弃子树中的深度
+        in_block = 0       # 位于文本块中的深度
+        sections = 0       # ce:section 嵌套深度
+        pending_label = ""
+        title_done = False
+        body_emitted = False
+        fallback_abstract = fallback_text = None
+        try:
+            for event, elem in ET.iterparse(stream, events=("start", "end")):
+                name = _local(elem.tag)
+                if event == "start":
+                    stack.append(elem)
+                    if skipping or name in skip or name == "abstract" and elem.get("class") == "graphical":
+                        skipping += 1
+                    elif name in TEXT_BLOCKS or name in FLOAT_BLOCKS:
+                        in_block += 1
+                    elif name == "section":
+                        sections += 1
+                    continue
+
+                stack.pop()
+                parent = stack[-1] if stack else None
+                parent_name = _local(parent.tag) if parent is not None else ""
+                block = None
+                if skipping:
+                    skipping -= 1
+                elif name in FLOAT_BLOCKS:
+                    in_block -= 1
+                    block = _table_to_markdown(elem) if name == "table" else _figure_to_markdown(elem)
+                elif name in TEXT_BLOCKS:
+                    in_block -= 1
+                    if in_block:
+                        continue  # 嵌套的块由外层统一输出
+                    text = _inline(elem)
+                    if not text:
+                        pass
+                    elif name == "title":
+                        if not title_done and parent_name in ("coredata", "head"):
+                            block, title_done = f"# {text}", True
+                    elif name == "section-title":
+                        label = f"{pending_label} " if pending_label else ""
+                        block, pending_label = f"{'#' * (1 + max(1, sections))} {label}{text}", ""
+                    elif name == "keywords":
+                        words = [_inline(k) for k in elem if _local(k.tag) == "keyword"]
+                        block = "**Keywords:** " + "; ".join(w for w in words if w)
+                    elif name == "bib-reference":
+                        block = f"- {text}"
+                    elif name == "list-item":
+                        block = f"- {text}"
+                    else:
+                        block = text
+                        body_emitted = True
+                elif in_block:
+                    continue  # 行内元素，等外层块结束时一起处理
+                elif name == "section":
+                    sections -= 1
+                elif name == "label" and parent_name == "section":
+                    pending_label = _inline(elem)
+                elif name == "description" and parent_name == "coredata":
+                    fallback_abstract = _inline(elem)
+                elif name == "rawtext" and not body_emitted:
+                    fallback_text = elem.text
+
+                # 已处理的元素从父节点移除，保证内存有界
+                if parent is not None:
+                    parent.remove(elem)
+                if block:
+                    yield block
+        finally:
+            if stream is not source:
+                stream.close()
+
+        if not body_emitted:
+            # 没有结构化正文 (例如只有摘要权限)，退回到 coredata 摘要和纯文本
+            if fallback_abstract:
+                yield "## Abstract"
+                yield fallback_abstract
+            if fallback_text:
+                yield _squash(fallback_text).strip()
+
+    def convert(self, source) -> str:
+        return "\n\n".join(self.iter_markdown(source))
+
+
+def xml_to_markdown(xml_content: str, include_references: bool = False) -> str:
+    return ElsevierXMLConverter(include_references=include_references).convert(xml_content)
+
+
+def report_reduction(samples: list[tuple[str, str]], include_references: bool = False) -> dict:
+    """对样本 [(名称, XML)] 统计转换前后的 token 数"""
+    converter = ElsevierXMLConverter(include_references=include_references)
+    raw_total = md_total = 0
+    for name, xml_content in samples:
+        try:
+            markdown = converter.convert(xml_content)
+        except ET.ParseError as e:
+            logger.warning(f"⚠️ {name}: XML 解析失败 ({e})")
+            continue
+        raw, md = count_tokens(xml_content), count_tokens(markdown)
+        raw_total += raw
+        md_total += md
+        logger.info(f"📄 {name}: {raw} -> {md} tokens ({1 - md / raw:.1%} 减少)")
+    reduction = 1 - md_total / raw_total if raw_total else 0.0
+    logger.success(f"📉 共 {len(samples)} 篇: {raw_total} -> {md_total} tokens，减少 {reduction:.1%}")
+    return {"documents": len(samples), "raw_tokens": raw_total, "markdown_tokens": md_total, "reduction": reduction}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    cli = argparse.ArgumentParser(description="Elsevier 全文 XML -> Markdown 转换与 token 缩减统计")
+    cli.add_argument("files", nargs="*", help="XML 文件路径；不指定时从数据库读取已存储的全文")
+    cli.add_argument("--limit", type=int, default=50, help="从数据库读取的样本数")
+    cli.add_argument("--references", action="store_true", help="保留参考文献")
+    cli.add_argument("--show", action="store_true", help="打印第一篇的转换结果")
+    args = cli.parse_args()
+
+    if args.files:
+        samples = []
+        for path in args.files:
+            with open(path, "r", encoding="utf-8") as f:
+                samples.append((os.path.basename(path), f.read()))
+    else:
+        from sqlmodel import Session, select
+        from src.research_agent.storage.models import FULL_TEXT, PaperBlob, engine
+        with Session(engine) as session:
+            blobs = session.exec(select(PaperBlob).where(PaperBlob.kind == FULL_TEXT).limit(args.limit)).all()
+            samples = [(blob.paper_id, blob.text()) for blob in blobs]
+
+    report_reduction(samples, include_references=args.references)
+    if args.show and samples:
+        print(xml_to_markdown(samples[0][1], include_references=args.references))
@@ -0,0 +1,243 @@
+# src/research_agent/agents/filter/dedupe.py
+"""
+筛选之前的跨来源去重：同一工作常以 arXiv 预印本和 Elsevier 正式版两种 ID 出现。
+先按规范化 DOI 精确匹配，再用标题 + 摘要 shingle 的 MinHash 签名在持久化的 LSH 分桶
+(paper_signatures / lsh_buckets 表) 中查找近似重复，查询代价与库中论文总数无关。
+重复论文通过 Paper.canonical_id 指向最先入库的版本，继承其筛选结果，不再调用 LLM；
+分析报告只存一份，读取时经 canonical_id 解析 (Dashboard 详情页)，搜索结果中不出现重复论文。
+
+    detector = DuplicateDetector()
+    links = detector.link(papers)            # {重复论文 id: canonical id}，并设置 paper.canonical_id
+    bulk_upsert_papers(papers)
+    detector.index(papers)                   # 写入指纹，只有 canonical 论文进入 LSH 分桶
+    inherit_from_canonical(set(links.values()))
+
+    python -m src.research_agent.agents.filter.dedupe              # 为尚无指纹的论文补建索引
+    python -m src.research_agent.agents.filter.dedupe --rebuild    # 清空后重建 (修改签名参数后需要)
+"""
+import hashlib
+import re
+import unicodedata
+import zlib
+import numpy as np
+from loguru import logger
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert
+from src.research_agent.agents.filter.prefilter import TOKEN_PATTERN
+from src.research_agent.storage.models import Paper, PaperSignature, LshBucket, engine
+from src.research_agent.storage.repository import SQLITE_MAX_VARIABLES
+from src.research_agent.telemetry.spans import span
+
+# 签名参数：BANDS 个 band、每个 band ROWS 行，相似度约 (1/BANDS)^(1/ROWS) ≈ 0.6 以上的论文大概率落入同一分桶。
+# 修改后需执行 --rebuild，旧签名与新参数不兼容
+BANDS = 20
+ROWS = 6
+NUM_PERM = BANDS * ROWS
+SHINGLE_SIZE = 3     # 词级 3-gram
+MIN_SHINGLES = 10    # 标题 + 摘要过短 (如缺摘要) 时只按 DOI 匹配，避免误判
+SEED = 1                              # 置换参数的随机种子，保证跨进程、跨运行的签名一致
+PRIME = (1 << 32) + 15                # 大于 2^32 的最小素数
+DEFAULT_THRESHOLD = 0.6               # 签名估计的 Jaccard 相似度达到该值才判定为重复
+
+DOI_PREFIX = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", re.IGNORECASE)
+
+_rng = np.random.default_rng(SEED)
+_PERM_A = _rng.integers(1, 1 << 31, NUM_PERM, dtype=np.uint64)  # a * hash < 2^63，uint64 不会溢出
+_PERM_B = _rng.integers(0, 1 << 32, NUM_PERM, dtype=np.uint64)
+
+
+def normalize_doi(doi: str | None) -> str | None:
+    """去掉 https://doi.org/ 或 doi: 前缀并转小写；不是 10. 开头的视为无效"""
+    if not doi:
+        return None
+    doi = DOI_PREFIX.sub("", doi.strip()).strip().lower()
+    return doi if doi.startswith("10.") else None
+
+
+def shingles(title: str, abstract: str) -> np.ndarray:
+    """规范化 (NFKC、小写、去标点) 后的词级 n-gram，crc32 哈希 (跨进程稳定) 后去重"""
+    text = unicodedata.normalize("NFKC", f"{title or ''} {abstract or ''}").lower()
+    words = TOKEN_PATTERN.findall(text)
+    grams = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 0))}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(hashes: np.ndarray) -> np.ndarray | None:
+    """NUM_PERM 个 (a * x + b) mod PRIME 置换下的最小值；shingle 太少时返回 None"""
+    if len(hashes) < MIN_SHINGLES:
+        return None
+    values = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % PRIME
+    return (values.min(axis=1) & 0xFFFFFFFF).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray) -> list[int]:
+    """每个 band 一个分桶 key (带 band 序号的 64 位哈希，存为 SQLite 有符号整数)"""
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+        digest = hashlib.blake2b(band.to_bytes(2, "big") + chunk, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """两个签名估计的 Jaccard 相似度"""
+    return float(np.mean(a == b))
+
+
+def _chunks(values: list, size: int = SQLITE_MAX_VARIABLES):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+class DuplicateDetector:
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        """threshold: 近似重复的相似度阈值 (DOI 相同总是判定为重复)"""
+        self.threshold = threshold
+        self._fingerprints: dict[str, tuple[str | None, np.ndarray | None]] = {}
+
+    def fingerprint(self, paper) -> tuple[str | None, np.ndarray | None]:
+        """(规范化 DOI, MinHash 签名)，在 link() 与 index() 之间缓存"""
+        if paper.id not in self._fingerprints:
+            self._fingerprints[paper.id] = (normalize_doi(paper.doi), minhash(shingles(paper.title, paper.abstract)))
+        return self._fingerprints[paper.id]
+
+    # ---------- 查询已入库的论文 ----------
+
+    @staticmethod
+    def _lookup_dois(dois: list[str]) -> dict[str, str]:
+        """{DOI: canonical id}；命中的论文本身是重复版本时沿 canonical_id 找到原始论文"""
+        found = {}
+        statement = select(PaperSignature.doi, func.coalesce(Paper.canonical_id, Paper.id)).join(
+            Paper, Paper.id == PaperSignature.paper_id)
+        with engine.connect() as conn:
+            for chunk in _chunks(dois):
+                found.update(conn.execute(statement.where(PaperSignature.doi.in_(chunk))).all())
+        return found
+
+    @staticmethod
+    def _lookup_buckets(keys: list[int]) -> tuple[dict[int, list[str]], dict[str, np.ndarray]]:
+        """同分桶的 canonical 论文 {key: [paper_id]} 及其签名"""
+        buckets: dict[int, list[str]] = {}
+        with engine.connect() as conn:
+            for chunk in _chunks(keys):
+                for key, paper_id in conn.execute(select(LshBucket.key, LshBucket.paper_id).where(LshBucket.key.in_(chunk))):
+                    buckets.setdefault(key, []).append(paper_id)
+            ids = list({paper_id for members in buckets.values() for paper_id in members})
+            signatures = {}
+            for chunk in _chunks(ids):
+                rows = conn.execute(select(PaperSignature.paper_id, PaperSignature.minhash).where(
+                    PaperSignature.paper_id.in_(chunk), PaperSignature.minhash != None))
+                signatures.update({paper_id: np.frombuffer(data, dtype=np.uint32) for paper_id, data in rows})
+        return buckets, signatures
+
+    # ---------- 去重 ----------
+
+    def link(self, papers: list) -> dict[str, str]:
+        """
+        为每篇新论文查找已入库或本批中更早出现的同一工作，找到时设置 paper.canonical_id。
+        返回 {重复论文 id: canonical id}。
+        """
+        if not papers:
+            return {}
+        with span("dedupe") as s:
+            prints = {paper.id: self.fingerprint(paper) for paper in papers}
+            known_dois = self._lookup_dois(list({doi for doi, _ in prints.values() if doi}))
+            keys = {paper_id: band_keys(sig) for paper_id, (_, sig) in prints.items() if sig is not None}
+            buckets, signatures = self._lookup_buckets(list({key for ks in keys.values() for key in ks}))
+
+            links, by_doi = {}, 0
+            batch_dois: dict[str, str] = {}
+            for paper in papers:
+                doi, sig = prints[paper.id]
+                canonical = known_dois.get(doi) or batch_dois.get(doi) if doi else None
+                if canonical:
+                    by_doi += 1
+                elif sig is not None:
+                    candidates = {member for key in keys[paper.id] for member in buckets.get(key, ())}
+                    scored = [(similarity(sig, signatures[c]), c) for c in candidates if c in signatures]
+                    best = max(scored, default=(0.0, None))
+                    if best[0] >= self.threshold:
+                        canonical = best[1]
+                if canonical:
+                    paper.canonical_id = canonical
+                    links[paper.id] = canonical
+                    continue
+                # 本批中的原始论文也参与后续论文的匹配
+                if doi:
+                    batch_dois[doi] = paper.id
+                if sig is not None:
+                    signatures[paper.id] = sig
+                    for key in keys[paper.id]:
+                        buckets.setdefault(key, []).append(paper.id)
+            s.add(items=len(links))
+        logger.info(f"🧬 跨来源去重: {len(papers)} 篇中 {len(links)} 篇为已有论文的其他版本 "
+                    f"(DOI {by_doi}，近似重复 {len(links) - by_doi})")
+        return links
+
+    def index(self, papers: list) -> int:
+        """论文入库后写入指纹；只有 canonical 论文进入 LSH 分桶 (重复版本通过 DOI 仍可被匹配到)"""
+        signature_rows, bucket_rows = [], []
+        for paper in papers:
+            doi, sig = self.fingerprint(paper)
+            self._fingerprints.pop(paper.id, None)
+            signature_rows.append({"paper_id": paper.id, "doi": doi, "minhash": sig.tobytes() if sig is not None else None})
+            if sig is not None and not paper.canonical_id:
+                bucket_rows += [{"key": key, "paper_id": paper.id} for key in band_keys(sig)]
+        if not signature_rows:
+            return 0
+        with engine.begin() as conn:
+            conn.execute(insert(PaperSignature.__table__).prefix_with("OR REPLACE"), signature_rows)
+            if bucket_rows:
+                conn.execute(insert(LshBucket.__table__).on_conflict_do_nothing(), bucket_rows)
+        return len(signature_rows)
+
+    def backfill(self, rebuild: bool = False, batch_size: int = 500) -> int:
+        """为尚无指纹的论文 (旧库、不经过 ingest 写入的论文) 建索引，按入库顺序视为 canonical"""
+        with engine.begin() as conn:
+            if rebuild:
+                conn.execute(delete(LshBucket.__table__))
+                conn.execute(delete(PaperSignature.__table__))
+            rows = conn.execute(
+                select(Paper.id, Paper.title, Paper.abstract, Paper.doi, Paper.canonical_id)
+                .where(~select(PaperSignature.paper_id).where(PaperSignature.paper_id == Paper.id).exists())
+                .order_by(Paper.discovered_at)
+            ).all()
+        indexed = sum(self.index(rows[i:i + batch_size]) for i in range(0, len(rows), batch_size))
+        if indexed:
+            logger.info(f"🧬 去重索引: 为 {indexed} 篇论文建立指纹")
+        return indexed
+
+
+def inherit_from_canonical(canonical_ids: set[str] | list[str]) -> int:
+    """
+    把 canonical 论文的筛选结果复制给指向它的重复论文 (分析报告不复制，读取时经 canonical_id 解析)。
+    在 canonical 论文筛选完成后调用 (无重复论文时只是一次空的 UPDATE)，返回更新的论文数。
+    """
+    canonical_ids = list(canonical_ids)
+    if not canonical_ids:
+        return 0
+    papers = Paper.__table__
+    canonical = papers.alias("canonical")
+    updated = 0
+    with engine.begin() as conn:
+        for chunk in _chunks(canonical_ids):
+            result = conn.execute(update(papers).where(papers.c.canonical_id.in_(chunk)).values(
+                is_relevant=select(canonical.c.is_relevant).where(canonical.c.id == papers.c.canonical_id).scalar_subquery(),
+                relevance_reason=select(canonical.c.relevance_reason).where(canonical.c.id == papers.c.canonical_id).scalar_subquery(),
+            ))
+            updated += result.rowcount
+    return updated
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.research_agent.storage.models import create_db_and_tables
+
+    cli = argparse.ArgumentParser(description="维护跨来源去重的 MinHash/LSH 索引")
+    cli.add_argument("--rebuild", action="store_true", help="清空后为所有论文重建指纹与分桶")
+    args = cli.parse_args()
+
+    create_db_and_tables()
+    count = DuplicateDetector().backfill(rebuild=args.rebuild)
+    logger.success(f"✅ 已为 {count} 篇论文建立去重指纹")
@@ -0,0 +1,137 @@
+# src/research_agent/agents/filter/prefilter.py
+import re
+import zlib
+import numpy as np
+from loguru import logger
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]")
+# 特征提取按文字分段：拉丁词逐个切分，连续的汉字作为一段 (中文没有空格分词，用字符 n-gram)
+SEGMENT_PATTERN = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]+")
+CJK_PATTERN = re.compile(r"[\u4e00-\u9fff]")
+LATIN_PATTERN = re.compile(r"[a-z]{2,}")
+
+# 常见的无信息英文词，避免它们主导相似度
+STOP_WORDS = {
+    "a", "an", "the", "of", "and", "or", "in", "on", "for", "to", "with", "by", "from", "at", "as",
+    "is", "are", "be", "we", "this", "that", "these", "our", "its", "it", "using", "based", "via",
+    "paper", "propose", "proposed", "approach", "method", "results", "show", "study", "new",
+}
+
+
+class LocalPreFilter:
+    """
+    LLM 筛选前的本地预筛选：用哈希 n-gram 的 TF-IDF 向量计算论文与研究兴趣的余弦相似度，
+    一次矩阵乘法对全部候选论文打分，无需网络或 GPU。
+    """
+
+    def __init__(self, interest_fields: list[str], threshold: float = 0.05, n_features: int = 2 ** 14):
+        """
+        interest_fields: 研究兴趣列表 (每条一个字段)
+        threshold: 低于该相似度的论文直接判定为不相关
+        n_features: 哈希特征空间大小
+        """
+        self.interest_fields = [f for f in interest_fields if f.strip()]
+        self.threshold = threshold
+        self.n_features = n_features
+
+    @staticmethod
+    def parse_interests(interests: str) -> list[str]:
+        """将 "1. xxx\\n2. yyy" 形式的兴趣画像拆成字段列表"""
+        fields = [re.sub(r"^\s*\d+[.、)]\s*", "", line).strip() for line in interests.splitlines()]
+        return [f for f in fields if f]
+
+    def _features(self, text: str) -> list[int]:
+        """
+        拉丁文字：词级 unigram / bigram + 词内字符 trigram；
+        汉字：每段连续汉字的字符 unigram / bigram。哈希到固定维度
+        """
+        segments = SEGMENT_PATTERN.findall(text.lower())
+        words = [w for w in segments if not CJK_PATTERN.match(w) and w not in STOP_WORDS]
+        grams = list(words)
+        grams += [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for w in words:
+            if len(w) > 4:
+                padded = f"<{w}>"
+                grams += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        for run in (s for s in segments if CJK_PATTERN.match(s)):
+            grams += list(run)
+            grams += [run[i:i + 2] for i in range(len(run) - 1)]
+        # 使用 crc32 而非 hash()，保证跨进程稳定
+        return [zlib.crc32(g.encode("utf-8")) % self.n_features for g in grams]
+
+    def _tf_matrix(self, texts: list[str]) -> np.ndarray:
+        rows, cols = [], []
+        for i, text in enumerate(texts):
+            feats = self._features(text)
+            rows.extend([i] * len(feats))
+            cols.extend(feats)
+        tf = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        np.add.at(tf, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+        return np.log1p(tf, out=tf)  # 次线性 TF
+
+    @staticmethod
+    def _l2_normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    @staticmethod
+    def _scripts(text: str) -> set[str]:
+        text = text.lower()
+        return {name for name, pattern in (("latin", LATIN_PATTERN), ("cjk", CJK_PATTERN)) if pattern.search(text)}
+
+    def score(self, papers: list) -> np.ndarray:
+        """
+        返回每篇论文与最相近研究兴趣的余弦相似度 (shape: [len(papers)])。
+        研究兴趣中没有与论文相同文字的关键词时 (如纯中文画像 + 英文论文) 无法比较，记为 1.0 (交给 LLM)。
+        """
+        if not papers or not self.interest_fields:
+            return np.ones(len(papers), dtype=np.float32)
+
+        texts = [f"{p.title} {p.abstract}" for p in papers]
+        docs = self._tf_matrix(texts)
+        interests = self._tf_matrix(self.interest_fields)
+
+        # IDF 基于候选论文 + 兴趣字段统计
+        df = (docs > 0).sum(axis=0) + (interests > 0).sum(axis=0)
+        n = docs.shape[0] + interests.shape[0]
+        idf = (np.log((1 + n) / (1 + df)) + 1.0).astype(np.float32)
+
+        docs = self._l2_normalize(docs * idf)
+        interests = self._l2_normalize(interests * idf)
+        scores = (docs @ interests.T).max(axis=1)
+
+        covered = set().union(*(self._scripts(field) for field in self.interest_fields))
+        incomparable = np.array([not (self._scripts(text) & covered) for text in texts])
+        if incomparable.any():
+            logger.warning(f"⚠️ {int(incomparable.sum())} 篇论文与研究兴趣没有共同的文字 (研究兴趣: {sorted(covered)})，"
+                           f"跳过本地预筛选")
+            scores[incomparable] = 1.0
+        return scores
+
+    def _log_distribution(self, scores: np.ndarray, rejected: int):
+        p10, p25, p50, p75, p90 = np.percentile(scores, [10, 25, 50, 75, 90])
+        logger.info(
+            f"📊 本地预筛选分数分布 (n={len(scores)}): min={scores.min():.3f} p10={p10:.3f} p25={p25:.3f} "
+            f"p50={p50:.3f} p75={p75:.3f} p90={p90:.3f} max={scores.max():.3f}"
+        )
+        counts, edges = np.histogram(scores, bins=10, range=(0.0, max(float(scores.max()), self.threshold, 1e-6)))
+        histogram = " ".join(f"[{lo:.2f},{hi:.2f}):{c}" for lo, hi, c in zip(edges, edges[1:], counts))
+        logger.info(f"📊 分数直方图: {histogram}")
+        logger.info(f"🧹 阈值 {self.threshold:.3f}: 预筛除 {rejected} 篇，保留 {len(scores) - rejected} 篇进入 LLM 筛选")
+
+    def split(self, papers: list) -> tuple[list, list[tuple]]:
+        """
+        返回 (保留的论文列表, [(被预筛除的论文, 分数), ...])
+        """
+        if not papers:
+            return [], []
+        scores = self.score(papers)
+        kept, rejected = [], []
+        for paper, score in zip(papers, scores):
+            if score < self.threshold:
+                rejected.append((paper, float(score)))
+            else:
+                kept.append(paper)
+        self._log_distribution(scores, len(rejected))
+        return kept, rejected
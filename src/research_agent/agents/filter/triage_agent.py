@@ -1,13 +1,17 @@
 # src/research_agent/agents/filter/triage_agent.py
 import json
-from openai import OpenAI
-import os
+import hashlib
+import asyncio
 from dotenv import load_dotenv
 from sqlmodel import Session, select
-from src.research_agent.storage.models import engine
+from src.research_agent.storage.models import TriageCache, engine
+from src.research_agent.agents.filter.prefilter import LocalPreFilter
+from src.research_agent.llm.gateway import get_gateway
+from src.research_agent.llm.rate_limit import RateLimiter
+from src.research_agent.llm.tokens import count_tokens
+from src.research_agent.telemetry.spans import get_telemetry, span
+from src.research_agent.config.settings import get_settings
 from loguru import logger
-import yaml
-from pathlib import Path
 
 load_dotenv() # 加载 .env 中的 API KEY
 
@@ -22,6 +26,22 @@ DEFAULT_INSTRUCTION = """
 - "reason": 一句话解释原因（如果相关，说明符合哪条兴趣；如果不相关，说明缺失了什么）。
 """
 
+BATCH_INSTRUCTION = """
+你是一个严谨的学术助手。请根据用户的【研究兴趣】，逐篇判断下面每篇论文是否在其研究兴趣中。
+请严格筛选。只有当论文明确存在于用户广泛的研究领域，并且是其研究兴趣之一时才返回 true。
+各个研究兴趣之间的关系是 OR，只要符合其中一个兴趣即可判定为相关。
+
+请以 JSON 格式返回结果，且必须覆盖输入中的每一个 id:
+{"results": [{"id": "<论文 id>", "is_relevant": true 或 false, "reason": "一句话解释原因"}]}
+"""
+
+# 修改筛选 Prompt 时请同步提升版本号，使旧的缓存结果失效
+PROMPT_VERSION = "triage-v1"
+# LLM 调用失败时的结果：没有判定 (is_relevant 为 None)，调用方按 "error" 标记识别，不要写入为不相关
+ERROR_VERDICT = {"is_relevant": None, "reason": "Error during LLM check", "error": True}
+# 本地预筛选除掉的论文只是暂定结果：is_relevant 保持 None，理由以此开头 (任务状态为 prefiltered)
+PREFILTERED_PREFIX = "pre-filtered:"
+
 DEFAULT_PROFILE = """
 1. 人工智能在土木工程中的应用 (AI in Civil Engineering)
 2. 隧道工程的变形预测、结构健康监测 (Tunnel SHM)
@@ -29,38 +49,43 @@ DEFAULT_PROFILE = """
 """
 
 class RelevanceFilter:
-    def __init__(self, research_interests: str):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.interests = self._load_research_interests()
+    def __init__(self, research_interests: str, batch_size: int = 20, max_batch_tokens: int = 6000,
+                 prefilter_threshold: float | None = None):
+        """
+        batch_size: 批量筛选时每次 LLM 调用最多包含的论文数
+        max_batch_tokens: 每批论文 (标题 + 摘要) 的估算 token 上限
+        prefilter_threshold: 本地预筛选的相似度阈值，默认 None 关闭 (阈值需按自己的研究兴趣画像校准后再开启)
+        """
+        self.llm = get_gateway()  # 连接池、重试与计量由网关统一处理
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.prefilter_threshold = prefilter_threshold
+        self._prefilter: LocalPreFilter | None = None
+        self._prefilter_interests = None
 
-    def _load_research_interests(self) -> str:
-        """Load research interests from user_config.yaml"""
-        config_path = Path(__file__).parent.parent.parent / "config" / "user_config.yaml"
-        
-        try:
-            if config_path.exists():
-                with open(config_path, "r", encoding="utf-8") as f:
-                    config = yaml.safe_load(f)
-                    if config and "fields" in config:
-                        # Convert list to numbered string format
-                        fields = config.get("fields", [])
-                        if fields:
-                            interests = "\n".join([f"{i+1}. {field}" for i, field in enumerate(fields)])
-                            logger.info(f"✅ Loaded research interests from config:\n{interests}")
-                            return interests
-                logger.warning("⚠️ No 'fields' found in user_config.yaml, using DEFAULT_PROFILE")
-            else:
-                logger.warning(f"⚠️ Config file not found at {config_path}, using DEFAULT_PROFILE")
-        except Exception as e:
-            logger.warning(f"⚠️ Error loading config: {e}, using DEFAULT_PROFILE")
-        
-        return DEFAULT_PROFILE
+    @property
+    def model(self) -> str:
+        """筛选使用的模型 (llm_config.yaml 中的 triage，默认 gpt-4o-mini 以降低成本)"""
+        return self.llm.model_for("triage")
 
+    @property
+    def interests(self) -> str:
+        """研究兴趣画像，来自 user_config.yaml (修改后无需重启即可生效)"""
+        return get_settings().user.get().research_interests or DEFAULT_PROFILE
 
-    def check_relevance(self, title: str, abstract: str) -> dict:
-        """
-        返回 {'is_relevant': bool, 'reason': str}
-        """
+    @property
+    def prefilter(self) -> LocalPreFilter | None:
+        if self.prefilter_threshold is None:
+            return None
+        interests = self.interests
+        if self._prefilter is None or self._prefilter_interests != interests:
+            self._prefilter = LocalPreFilter(LocalPreFilter.parse_interests(interests), threshold=self.prefilter_threshold)
+            self._prefilter_interests = interests
+        return self._prefilter
+
+    def _single_messages(self, title: str, abstract: str) -> list[dict]:
         prompt = f"""
         你是一个严谨的学术助手。请判断以下论文是否在我的研究兴趣中。
         
@@ -75,14 +100,256 @@ class RelevanceFilter:
         - "is_relevant": true 或 false
         - "reason": 一句话解释原因
         """
+        return [{"role": "user", "content": prompt}]
+
+    def _parse_single(self, content: str) -> dict:
+        verdict = json.loads(content)
+        if not self._is_valid_verdict(verdict):
+            raise ValueError(f"返回格式错误: {verdict}")
+        return {"is_relevant": verdict["is_relevant"], "reason": verdict["reason"]}
 
+    def _check_single(self, title: str, abstract: str) -> dict | None:
+        """单篇调用 LLM 筛选，出错时返回 None"""
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini", # 使用轻量级模型以降低成本
-                messages=[{"role": "user", "content": prompt}],
+            response = self.llm.complete(
+                "triage",
+                self._single_messages(title, abstract),
+                model=self.model,
                 response_format={"type": "json_object"}
             )
-            return json.loads(response.choices[0].message.content)
+            return self._parse_single(response.choices[0].message.content)
         except Exception as e:
             print(f"⚠️ 筛选出错: {e}")
-            return {"is_relevant": False, "reason": "Error during LLM check"}
\ No newline at end of file
+            return None
+
+    def check_relevance(self, title: str, abstract: str) -> dict:
+        """
+        返回 {'is_relevant': bool, 'reason': str}；
+        LLM 调用失败时返回 ERROR_VERDICT 的副本: is_relevant 为 None 且带 'error': True，调用方应稍后重试而不是当作不相关
+        """
+        key = self._cache_key(title, abstract)
+        cached = self._cache_lookup([key])
+        if key in cached:
+            return cached[key]
+        verdict = self._check_single(title, abstract)
+        if verdict is None:
+            return dict(ERROR_VERDICT)
+        self._cache_store({key: verdict})
+        return verdict
+
+    # ------------------------------------------------------------------
+    # 筛选结果缓存: 研究兴趣、论文内容、模型或 Prompt 版本任一变化都会换 key
+    # ------------------------------------------------------------------
+    def _cache_key(self, title: str, abstract: str) -> str:
+        payload = "\x1f".join([self.interests, title or "", abstract or "", self.model, PROMPT_VERSION])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _cache_lookup(self, keys: list[str]) -> dict:
+        """一次 IN 查询取回命中的缓存结果 {key: verdict}，并累计命中统计"""
+        hits = {}
+        try:
+            with Session(engine) as session:
+                rows = session.exec(select(TriageCache).where(TriageCache.key.in_(keys))).all()
+                hits = {row.key: {"is_relevant": row.is_relevant, "reason": row.reason} for row in rows}
+        except Exception as e:
+            logger.warning(f"⚠️ 读取筛选缓存失败: {e}")
+        self.cache_hits += len(hits)
+        self.cache_misses += len(set(keys)) - len(hits)
+        return hits
+
+    def _cache_store(self, verdicts: dict):
+        """写入 {key: verdict}；解析失败或出错的结果不会进入此处"""
+        if not verdicts:
+            return
+        try:
+            with Session(engine) as session:
+                for key, verdict in verdicts.items():
+                    session.merge(TriageCache(key=key, is_relevant=verdict["is_relevant"],
+                                              reason=verdict["reason"], model=self.model))
+                session.commit()
+        except Exception as e:
+            logger.warning(f"⚠️ 写入筛选缓存失败: {e}")
+
+    def cache_stats(self) -> dict:
+        total = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": self.cache_hits / total if total else 0.0,
+        }
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """本地 token 计数 (见 llm/tokens.py)"""
+        return count_tokens(text)
+
+    def _make_batches(self, papers: list) -> list[list]:
+        """按论文数和估算 token 数切分批次；超长的单篇论文独占一批"""
+        batches, current, current_tokens = [], [], 0
+        for paper in papers:
+            tokens = self._estimate_tokens(f"{paper.title}\n{paper.abstract}")
+            if current and (len(current) >= self.batch_size or current_tokens + tokens > self.max_batch_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(paper)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    @staticmethod
+    def _is_valid_verdict(item) -> bool:
+        return (isinstance(item, dict)
+                and isinstance(item.get("is_relevant"), bool)
+                and isinstance(item.get("reason"), str))
+
+    def _batch_messages(self, papers: list) -> tuple[dict, list[dict]]:
+        # 批内使用短编号，减少 token 并避免模型抄错长 ID
+        keyed = {str(i + 1): paper for i, paper in enumerate(papers)}
+        items = "\n\n".join(
+            f"[id: {key}]\n论文标题: {paper.title}\n论文摘要: {paper.abstract}" for key, paper in keyed.items()
+        )
+        messages = [
+            {"role": "system", "content": f"{BATCH_INSTRUCTION}\n用户的研究兴趣包含了:\n{self.interests}"},
+            {"role": "user", "content": items},
+        ]
+        return keyed, messages
+
+    def _parse_batch(self, keyed: dict, content: str) -> dict:
+        results = json.loads(content).get("results", [])
+        verdicts = {}
+        for item in results if isinstance(results, list) else []:
+            paper = keyed.get(str(item.get("id"))) if isinstance(item, dict) else None
+            if paper and self._is_valid_verdict(item):
+                verdicts[paper.id] = {"is_relevant": item["is_relevant"], "reason": item["reason"]}
+        return verdicts
+
+    def _check_batch(self, papers: list) -> dict:
+        """一次 LLM 调用判定一批论文，返回 {paper.id: verdict}；缺失或格式错误的条目不在结果中"""
+        keyed, messages = self._batch_messages(papers)
+        try:
+            response = self.llm.complete("triage", messages, model=self.model, response_format={"type": "json_object"})
+            return self._parse_batch(keyed, response.choices[0].message.content)
+        except Exception as e:
+            logger.warning(f"⚠️ 批量筛选出错 ({len(papers)} 篇): {e}")
+            return {}
+
+    def _prepare(self, papers: list) -> tuple[dict, dict, list]:
+        """
+        预筛选 + 查缓存。返回 (已确定的结果, {paper.id: 缓存 key}, 仍需 LLM 判定的论文)
+        """
+        verdicts = {}
+        if self.prefilter:
+            papers, rejected = self.prefilter.split(papers)
+            get_telemetry().record("triage.prefiltered", items=len(rejected))
+            for paper, score in rejected:
+                verdicts[paper.id] = {
+                    "is_relevant": None,
+                    "reason": f"{PREFILTERED_PREFIX} 本地相似度 {score:.3f} 低于阈值 {self.prefilter.threshold}",
+                }
+
+        keys = {paper.id: self._cache_key(paper.title, paper.abstract) for paper in papers}
+        cached = self._cache_lookup(list(keys.values())) if papers else {}
+        pending = []
+        for paper in papers:
+            if keys[paper.id] in cached:
+                verdicts[paper.id] = cached[keys[paper.id]]
+            else:
+                pending.append(paper)
+        if cached:
+            logger.info(f"♻️ 筛选缓存命中 {len(papers) - len(pending)} 篇，剩余 {len(pending)} 篇需要 LLM 判定")
+        get_telemetry().record("triage.cache_hit", items=len(papers) - len(pending))
+        return verdicts, keys, pending
+
+    def check_relevance_batch(self, papers: list) -> dict:
+        """
+        批量筛选。多篇论文共用一次研究兴趣与指令前缀，按批次调用 LLM。
+        返回 {paper.id: {'is_relevant': bool, 'reason': str}}，
+        模型遗漏或返回格式错误的论文会回退为单篇 check_relevance；仍然失败的论文结果为 ERROR_VERDICT
+        (is_relevant 为 None 且带 'error': True，应稍后重试而不是当作不相关)。
+        启用本地预筛选时，相似度低于阈值的论文不会进入 LLM，结果为 is_relevant=None、理由以 "pre-filtered:" 开头
+        (暂定结果，不作为最终判定写库)。
+        已有缓存结果的论文直接复用，不会重复调用 LLM。
+        """
+        with span("triage") as s:
+            s.add(items=len(papers))
+            verdicts, keys, pending = self._prepare(papers)
+
+            batches = self._make_batches(pending)
+            for i, batch in enumerate(batches, 1):
+                logger.info(f"🧠 正在批量分析论文相关性: 第 {i}/{len(batches)} 批 ({len(batch)} 篇)")
+                fresh = self._check_batch(batch) if len(batch) > 1 else {}
+                for paper in batch:
+                    if paper.id not in fresh:
+                        if len(batch) > 1:
+                            logger.warning(f"⚠️ 批量结果缺失或格式错误，回退单篇筛选: {paper.id}")
+                        verdict = self._check_single(paper.title, paper.abstract)
+                        if verdict is None:
+                            verdicts[paper.id] = dict(ERROR_VERDICT)
+                            continue
+                        fresh[paper.id] = verdict
+                verdicts.update(fresh)
+                # 每批完成后立即落缓存，中途崩溃重跑时已完成的批次不必重新判定
+                self._cache_store({keys[pid]: verdict for pid, verdict in fresh.items()})
+        return verdicts
+
+    # ------------------------------------------------------------------
+    # 异步并发筛选: 信号量限制在途请求数，令牌桶限制 RPM / TPM，429/5xx 退避重试
+    # ------------------------------------------------------------------
+    def _request_tokens(self, messages: list[dict], n_papers: int) -> int:
+        # 输入 token 估算 + 每篇约 60 token 的输出
+        return sum(self._estimate_tokens(m["content"]) for m in messages) + 60 * n_papers
+
+    async def _acomplete(self, messages: list[dict], n_papers: int, sem: asyncio.Semaphore, limiter: RateLimiter) -> str:
+        tokens = self._request_tokens(messages, n_papers)
+        async with sem:
+            # 限流在网关内每次尝试前获取，重试同样计入 RPM / TPM
+            response = await self.llm.acomplete("triage", messages, model=self.model,
+                                                acquire=lambda: limiter.acquire(tokens),
+                                                response_format={"type": "json_object"})
+            return response.choices[0].message.content
+
+    async def _acheck_single(self, paper, sem: asyncio.Semaphore, limiter: RateLimiter) -> dict | None:
+        try:
+            content = await self._acomplete(self._single_messages(paper.title, paper.abstract), 1, sem, limiter)
+            return self._parse_single(content)
+        except Exception as e:
+            logger.warning(f"⚠️ 筛选出错 ({paper.id}): {e}")
+            return None
+
+    async def _acheck_batch(self, batch: list, keys: dict, sem: asyncio.Semaphore, limiter: RateLimiter) -> dict:
+        fresh = {}
+        if len(batch) > 1:
+            keyed, messages = self._batch_messages(batch)
+            try:
+                fresh = self._parse_batch(keyed, await self._acomplete(messages, len(batch), sem, limiter))
+            except Exception as e:
+                logger.warning(f"⚠️ 批量筛选出错 ({len(batch)} 篇): {e}")
+
+        missing = [paper for paper in batch if paper.id not in fresh]
+        if missing and len(batch) > 1:
+            logger.warning(f"⚠️ 批量结果缺失或格式错误，回退单篇筛选: {[p.id for p in missing]}")
+        singles = await asyncio.gather(*(self._acheck_single(paper, sem, limiter) for paper in missing))
+        for paper, verdict in zip(missing, singles):
+            if verdict is not None:
+                fresh[paper.id] = verdict
+        self._cache_store({keys[pid]: verdict for pid, verdict in fresh.items()})
+        return fresh
+
+    async def check_relevance_batch_async(self, papers: list, concurrency: int = 4,
+                                          requests_per_minute: float = 500, tokens_per_minute: float = 200_000) -> dict:
+        """
+        check_relevance_batch 的异步并发版本，吞吐量逼近账户的速率上限而不是 1/延迟。
+        返回值与同步版本一致，且按输入顺序排列，便于调用方确定性地写库。
+        """
+        async with span("triage") as s:
+            s.add(items=len(papers))
+            verdicts, keys, pending = self._prepare(papers)
+            batches = self._make_batches(pending)
+            if batches:
+                logger.info(f"🧠 并发分析论文相关性: {len(pending)} 篇 / {len(batches)} 批，并发上限 {concurrency}")
+            sem = asyncio.Semaphore(concurrency)
+            limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+            for fresh in await asyncio.gather(*(self._acheck_batch(batch, keys, sem, limiter) for batch in batches)):
+                verdicts.update(fresh)
+        return {paper.id: verdicts.get(paper.id, dict(ERROR_VERDICT)) for paper in papers}
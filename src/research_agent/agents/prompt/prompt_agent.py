@@ -1,13 +1,12 @@
-from openai import OpenAI
+from src.research_agent.llm.gateway import get_gateway
 from dotenv import load_dotenv
 from loguru import logger
-import os
 
 load_dotenv()
 
 class PromptAgent:
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.llm = get_gateway()
 
     def generate_prompt(self, fields: list) -> str:
         '''
@@ -35,10 +34,7 @@ The prompt should be practical, detailed, and ready to be used with academic pap
 Format your response as a clear, standalone prompt that can be directly used. Except for the prompt, do not reply with any other words.
 """
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-5-mini",
-                messages=[{"role": "user", "content": generation_prompt}],
-            )
+            response = self.llm.complete("prompt", [{"role": "user", "content": generation_prompt}])
             prompt_template = response.choices[0].message.content
             # add one line to make sure the output is in markdown format
             prompt_template = prompt_template + "\n\nPlease provide your analysis in Markdown format."
@@ -1,30 +1,107 @@
 # src/research_agent/agents/scout/arxiv_scout.py
 import arxiv
-from src.research_agent.storage.models import Paper
-from datetime import datetime
+from src.research_agent.storage.models import Paper, HarvestWatermark, engine
+from src.research_agent.telemetry.spans import span
+from datetime import datetime, timezone
 from loguru import logger
+from sqlmodel import Session
 
 class ArxivScout:
-    def __init__(self, query: str = "cat:cs.AI OR cat:cs.CE", max_results: int = 10):
+    def __init__(
+        self,
+        query: str = "cat:cs.AI OR cat:cs.CE",
+        max_results: int = 10,
+        page_size: int = 100,
+        max_pages: int = 10,
+        backfill_pages: int | None = None,
+        incremental: bool = True,
+    ):
         """
         query: arXiv查询语法。cs.CE 代表 Civil Engineering (土木工程)
+        max_results: 首次运行 (无水位线) 且未指定 backfill_pages 时抓取的最新论文数
+        page_size: 每次向 arXiv API 请求的条目数
+        max_pages: 增量运行时最多翻页数，防止水位线丢失时无限翻页
+        backfill_pages: 首次运行时回填的页数预算 (None 表示只取 max_results 篇)
+        incremental: 是否启用水位线增量抓取
         """
         self.query = query
         self.max_results = max_results
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.backfill_pages = backfill_pages
+        self.incremental = incremental
+        # 复用同一个客户端，保留其内部的请求节流状态
+        self.client = arxiv.Client(page_size=page_size, delay_seconds=3, num_retries=3)
+        self._pending_watermark: HarvestWatermark | None = None
+
+    def _load_watermark(self) -> HarvestWatermark | None:
+        with Session(engine) as session:
+            return session.get(HarvestWatermark, ("arxiv", self.query))
+
+    def commit_watermark(self):
+        """
+        在本轮抓到的论文成功入库后调用，推进水位线。
+        分两步提交可保证入库前崩溃时，下一轮仍会重新抓取这些论文。
+        """
+        if not self._pending_watermark:
+            return
+        with Session(engine) as session:
+            mark = session.get(HarvestWatermark, ("arxiv", self.query))
+            if mark is None:
+                mark = HarvestWatermark(source="arxiv", query=self.query,
+                                        last_published=self._pending_watermark.last_published,
+                                        last_entry_id=self._pending_watermark.last_entry_id)
+            else:
+                mark.last_published = self._pending_watermark.last_published
+                mark.last_entry_id = self._pending_watermark.last_entry_id
+                mark.updated_at = datetime.utcnow()
+            session.add(mark)
+            session.commit()
+        logger.info(f"🔖 arXiv 水位线已更新: {self._pending_watermark.last_entry_id} ({self._pending_watermark.last_published})")
+        self._pending_watermark = None
+
+    @staticmethod
+    def _as_utc(value: datetime) -> datetime:
+        # SQLite 取回的是 naive datetime，arXiv 返回的是带时区的 UTC 时间
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
 
     def fetch_papers(self) -> list[Paper]:
+        with span("arxiv.fetch") as s:
+            papers = self._fetch_papers()
+            s.add(items=len(papers))
+        return papers
+
+    def _fetch_papers(self) -> list[Paper]:
         logger.info(f"🕵️ Scout 正在 arXiv 搜索: {self.query} ...")
-        
-        # 使用 arXiv 客户端搜索
-        client = arxiv.Client()
+
+        mark = self._load_watermark() if self.incremental else None
+        if mark:
+            budget = self.page_size * self.max_pages
+            logger.info(f"🔖 增量模式: 翻页直到水位线 {mark.last_entry_id} ({mark.last_published})")
+        elif self.backfill_pages:
+            budget = self.page_size * self.backfill_pages
+            logger.info(f"📚 首次运行回填: 最多 {self.backfill_pages} 页 ({budget} 篇)")
+        else:
+            budget = self.max_results
+
         search = arxiv.Search(
             query=self.query,
-            max_results=self.max_results,
-            sort_by=arxiv.SortCriterion.SubmittedDate # 获取最新的
+            max_results=budget,
+            sort_by=arxiv.SortCriterion.SubmittedDate, # 获取最新的
+            sort_order=arxiv.SortOrder.Descending,
         )
 
         papers_found = []
-        for result in client.results(search):
+        newest = None
+        reached_mark = False
+        for result in self.client.results(search):
+            if newest is None:
+                newest = result
+            # 结果按提交时间倒序，遇到水位线即可停止翻页
+            if mark and (result.entry_id == mark.last_entry_id
+                         or self._as_utc(result.published) < self._as_utc(mark.last_published)):
+                reached_mark = True
+                break
             # 将 arXiv 原生对象转换为我们的数据库模型
             paper = Paper(
                 id=f"arxiv:{result.entry_id.split('/')[-1]}", # 提取 ID 如 2401.12345
@@ -36,9 +113,18 @@ class ArxivScout:
                 source="arxiv",
                 is_oa=True,  # arXiv 上的论文都是开放获取的
                 doi=result.doi if result.doi else None,  # 有些论文没有 DOI
-                full_text_content=None  # arXiv 不存储全文文本
-            )
+            )  # arXiv 不存储全文文本
             papers_found.append(paper)
 
-        logger.success(f"✅ Arxiv Scout 找到了 {len(papers_found)} 篇论文。")
-        return papers_found
\ No newline at end of file
+        if mark and not reached_mark:
+            logger.warning(f"⚠️ 翻页预算 ({self.max_pages} 页) 用尽仍未到达水位线，可能存在遗漏。")
+
+        if self.incremental and newest is not None and (mark is None or newest.entry_id != mark.last_entry_id):
+            self._pending_watermark = HarvestWatermark(
+                source="arxiv", query=self.query,
+                last_published=self._as_utc(newest.published).replace(tzinfo=None),
+                last_entry_id=newest.entry_id,
+            )
+
+        logger.success(f"✅ Arxiv Scout 找到了 {len(papers_found)} 篇新论文。")
+        return papers_found
@@ -1,14 +1,20 @@
 from src.research_agent.storage.models import Paper
+from src.research_agent.config.settings import get_settings
+from src.research_agent.telemetry.spans import span
+import asyncio
+import httpx
 import requests
 import datetime as dt
 import os
 from dotenv import load_dotenv
 from loguru import logger
-import yaml
-from pathlib import Path
 
 load_dotenv()  # 从 .env 文件加载环境变量
 
+# 文章详情的视图：筛选只需要元数据和摘要 (META_ABS)，全文 XML 才需要 FULL
+META_PARAMS = {"view": "META_ABS"}
+FULL_PARAMS = {"view": "FULL"}
+
 DEFAULT_Journals = [
         # "Computer Networks",
         # "Ad Hoc Networks",
@@ -17,63 +23,95 @@ DEFAULT_Journals = [
     ]
 
 class ElsevierScout:
-    def __init__(self, max_results: int = 10, year: int = 2024):
+    def __init__(self, journals: list[str] | None = None, max_results: int = 10, year: int = 2024,
+                 concurrency: int = 8, timeout: float = 30.0, eager_full_text: bool = False):
         """
-        journals: 目标期刊名称列表 (如 ["Computer Networks", "Ad Hoc Networks"])
+        journals: 目标期刊名称列表 (如 ["Computer Networks", "Ad Hoc Networks"])；
+                  None 表示使用 user_config.yaml 中的配置，修改配置文件后下一轮抓取自动生效
         max_results: 每次搜索的最大结果数
+        concurrency: 异步模式下同时在途的 HTTP 请求上限
+        timeout: 单个 HTTP 请求的超时时间 (秒)
+        eager_full_text: True 时搜索后立即抓取每篇论文的全文 XML (旧行为)；
+                         默认只抓取筛选所需的元数据，全文由分析阶段对相关论文按需抓取 (fetch_full_text_async)
         """
-        self.journals = None
+        self._journals = journals
         self.max_results = max_results
         self.year = year
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.eager_full_text = eager_full_text
         self.search_base_url = "https://api.elsevier.com/content/search/sciencedirect"
+        self.article_base_url = "https://api.elsevier.com/content/article/doi"
         self.api_key = os.getenv("ELSEVIER_API_KEY")
         self.headers = {
             "X-ELS-APIKey": self.api_key,
             "Accept": "application/json"
         }
         self.doi_list = []
-        self._load_journays()  # 加载期刊列表
+        self.session = requests.Session()  # 同步模式下复用 TCP/TLS 连接
+        self._client: httpx.AsyncClient | None = None  # 异步模式的连接池，跨多轮抓取复用
+        self._client_loop = None
+
+    @property
+    def journals(self) -> list[str]:
+        if self._journals is not None:
+            return list(self._journals)
+        return list(get_settings().user.get().journals) or DEFAULT_Journals
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        with span("elsevier.request") as s:
+            response = self.session.get(url, timeout=self.timeout, **kwargs)
+            s.add(nbytes=len(response.content))
+            if response.status_code >= 400:
+                s.fail()
+            return response
+
+    def _article_url(self, doi: str) -> str:
+        return f"{self.article_base_url}/{doi}"
+
+    @staticmethod
+    def _extract_abstract(data: dict, doi: str) -> str | None:
+        core_data = data.get('full-text-retrieval-response', {}).get('coredata', {})
+        abstract = core_data.get('dc:description', "Abstract not found in metadata")
+        if abstract:
+            return abstract.strip()
+        logger.warning(f"⚠️ No abstract found for DOI: {doi}")
+        return None
 
     def _fetch_abstract_and_fulltext(self, doi: str) -> tuple[str | None, str | None]:
         """
-        根据 DOI 获取论文的摘要和全文内容（如果可用）
+        根据 DOI 获取论文的摘要；eager_full_text 时同时获取全文内容（如果可用）
         """
-        base_url = f"https://api.elsevier.com/content/article/doi/{doi}"
-        # --- A. 获取 Abstract (JSON 格式) ---
+        abstract = None
+        # --- A. 获取 Abstract (JSON 格式，META_ABS 视图不含正文) ---
         try:
-            params = {"view": "FULL"}
             json_headers = self.headers.copy()
             json_headers["Accept"] = "application/json"
-            r_meta = requests.get(base_url, headers=json_headers, params=params)
+            r_meta = self._get(self._article_url(doi), headers=json_headers, params=META_PARAMS)
             if r_meta.status_code == 200:
-                data = r_meta.json()
-                core_data = data.get('full-text-retrieval-response', {}).get('coredata', {})
-                abstract = core_data.get('dc:description', "Abstract not found in metadata")
-                if abstract:
-                    abstract = abstract.strip()
-                else:
-                    logger.warning(f"⚠️ No abstract found for DOI: {doi}, status code: {r_meta.status_code}")
-                    abstract = None
+                abstract = self._extract_abstract(r_meta.json(), doi)
+            else:
+                logger.warning(f"⚠️ No abstract found for DOI: {doi}, status code: {r_meta.status_code}")
         except Exception as e:
             logger.warning(f"⚠️ Exception while fetching abstract for DOI {doi}: {e}")
             abstract = None
-        full_text_content = ""
-        # --- B. 获取 Full Text (XML 格式) ---
+        # --- B. 获取 Full Text (XML 格式)：只有摘要可用 (开放获取) 时才值得抓取 ---
+        full_text_content = self.fetch_full_text(doi) if self.eager_full_text and abstract else None
+        return abstract, full_text_content
+
+    def fetch_full_text(self, doi: str) -> str | None:
+        """根据 DOI 获取全文 XML，失败时返回 None"""
         try:
             xml_headers = self.headers.copy()
             xml_headers["Accept"] = "application/xml"
-            r_fulltext = requests.get(base_url, headers=xml_headers, params=params)
+            r_fulltext = self._get(self._article_url(doi), headers=xml_headers, params=FULL_PARAMS)
             if r_fulltext.status_code == 200:
-                full_text_content = r_fulltext.text  # 目前是直接存库，后续可考虑解析升级
-            else:
-                logger.warning(f"⚠️ No full text found for DOI: {doi}, status code: {r_fulltext.status_code}")
-                full_text_content = None
+                return r_fulltext.text  # 目前是直接存库，后续可考虑解析升级
+            logger.warning(f"⚠️ No full text found for DOI: {doi}, status code: {r_fulltext.status_code}")
         except Exception as e:
             logger.warning(f"⚠️ Exception while fetching full text for DOI {doi}: {e}")
-            full_text_content = None
+        return None
 
-        return abstract, full_text_content
-    
     def _parse_authors(self, authors_data) -> list[str] | None:
         if not authors_data:
             return None
@@ -84,17 +122,46 @@ class ElsevierScout:
         else:
             return [authors.get('$')]
 
-    def _fetch_papers_from_journal(self, journal_name: str) -> list[Paper]:
-        query = {
+    def _search_query(self, journal_name: str) -> dict:
+        return {
             "query": f"SRCTITLE({journal_name}) AND PUBYEAR IS {self.year}",
             "count": self.max_results,
             "sort": "coverDate"
         }
+
+    def _build_paper(self, item: dict, journal_name: str, abstract: str | None, full_text_content: str | None) -> Paper | None:
+        """将搜索结果条目 + 文章详情组装成 Paper；无摘要或无作者时返回 None"""
+        if not abstract:
+            return None  # 跳过非开放获取论文
+        authors = self._parse_authors(item.get('authors'))
+        if not authors:
+            return None
+        paper = Paper(
+            id=f"elsevier:{item.get('dc:identifier').split(':')[-1]}",
+            title=item.get('dc:title'),
+            abstract=abstract,
+            authors=authors,
+            url=item.get('link', [{}])[1].get('@href'),
+            published_date=dt.datetime.strptime(item.get('prism:coverDate'), "%Y-%m-%d"),
+            source=f"elsevier:{journal_name}",
+            is_oa=None,    # Elsevier 论文的开放获取状态需要额外判断
+            doi=item.get('prism:doi'),
+            download_status="downloaded" if full_text_content else "pending"  # pending: 全文留到分析阶段抓取
+        )
+        paper.full_text_content = full_text_content  # 压缩后存入 PaperBlob
+        return paper
+
+    def _log_journal_result(self, journal_name: str, papers: list[Paper], access_paper_count: int, non_access_paper_count: int):
+        if papers:
+            logger.success(f"✅ Elsevier Scout: {journal_name}，找到 {len(papers)} 篇论文 | 开放获取论文数: {access_paper_count}, 非开放获取论文数: {non_access_paper_count}")
+
+    def _fetch_papers_from_journal(self, journal_name: str) -> list[Paper]:
+        query = self._search_query(journal_name)
         access_paper_count = 0
         non_access_paper_count = 0
         papers = []
         try:
-            response = requests.get(self.search_base_url, headers=self.headers, params=query)
+            response = self._get(self.search_base_url, headers=self.headers, params=query)
             response.raise_for_status()
             data = response.json()
         
@@ -103,59 +170,155 @@ class ElsevierScout:
                 # logger.info(f"Fetched abstract for DOI {item.get('dc:title')}:")
                 doi = item.get('prism:doi')
                 abstract, full_text_content = self._fetch_abstract_and_fulltext(doi)
-                date = dt.datetime.strptime(item.get('prism:coverDate'), "%Y-%m-%d")
                 if abstract: 
                     access_paper_count += 1
                 else:
                     non_access_paper_count += 1
-                    continue  # 跳过非开放获取论文
-                authors = self._parse_authors(item.get('authors'))
-                if not authors:
-                    continue
-                paper = Paper(
-                    id=f"elsevier:{item.get('dc:identifier').split(':')[-1]}",
-                    title=item.get('dc:title'),
-                    abstract=abstract,
-                    authors=authors,
-                    url=item.get('link', [{}])[1].get('@href'),
-                    published_date=date,
-                    source=f"elsevier:{journal_name}",
-                    is_oa=None,    # Elsevier 论文的开放获取状态需要额外判断
-                    doi=item.get('prism:doi'),
-                    full_text_content=full_text_content,
-                    download_status="downloaded"
-                )
-                papers.append(paper)
+                paper = self._build_paper(item, journal_name, abstract, full_text_content)
+                if paper:
+                    papers.append(paper)
 
         except Exception as e:
             logger.error(f"Elsevier 搜索失败 ({journal_name}): {e}")
-        if papers:
-            logger.success(f"✅ Elsevier Scout: {journal_name}，找到 {len(papers)} 篇论文 | 开放获取论文数: {access_paper_count}, 非开放获取论文数: {non_access_paper_count}")
+        self._log_journal_result(journal_name, papers, access_paper_count, non_access_paper_count)
         return papers
 
-    def _load_journays(self):
-        # 这里可以实现从配置文件或数据库加载期刊列表的逻辑
-        config_path = Path(__file__).parent.parent.parent / "config" / "user_config.yaml"
+    # ------------------------------------------------------------------
+    # 异步模式: 单个连接池 + 并发上限，跨期刊、跨 DOI 同时抓取
+    # ------------------------------------------------------------------
+    def _get_client(self) -> httpx.AsyncClient:
+        # httpx.AsyncClient 的连接池绑定在创建它的事件循环上，换了事件循环就重建
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            headers = {k: v for k, v in self.headers.items() if v is not None}  # httpx 不接受 None 值的 header
+            self._client = httpx.AsyncClient(headers=headers, limits=limits, timeout=self.timeout)
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
+
+    @staticmethod
+    async def _arequest(client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+        async with span("elsevier.request") as s:
+            response = await client.get(url, **kwargs)
+            s.add(nbytes=len(response.content))
+            if response.status_code >= 400:
+                s.fail()
+            return response
+
+    async def _aget(self, client: httpx.AsyncClient, sem: asyncio.Semaphore, url: str, **kwargs) -> httpx.Response:
+        # 信号量只包住单个请求，避免期刊级任务持有名额时等待 DOI 级任务而死锁
+        async with sem:
+            return await self._arequest(client, url, **kwargs)
+
+    async def _afetch_abstract_and_fulltext(self, client: httpx.AsyncClient, sem: asyncio.Semaphore, doi: str) -> tuple[str | None, str | None]:
+        base_url = self._article_url(doi)
         try:
-            if config_path.exists():
-                with open(config_path, "r") as f:
-                    config = yaml.safe_load(f)
-                    if config and "journals" in config:
-                        self.journals = config.get("journals", [])
-                        logger.info("✅ Loaded journal list from user_config.yaml")
-                    else:
-                        logger.warning("⚠️ No 'journals' key found in user_config.yaml, using default journals")
-            else:
-                logger.warning(f"⚠️ Config file not found at {config_path}, using default journals")
+            r_meta = await self._aget(client, sem, base_url, params=META_PARAMS, headers={"Accept": "application/json"})
+        except Exception as e:
+            r_meta = e
+
+        abstract = None
+        if isinstance(r_meta, Exception):
+            logger.warning(f"⚠️ Exception while fetching abstract for DOI {doi}: {r_meta}")
+        elif r_meta.status_code == 200:
+            try:
+                abstract = self._extract_abstract(r_meta.json(), doi)
+            except Exception as e:
+                logger.warning(f"⚠️ Exception while parsing abstract for DOI {doi}: {e}")
+        else:
+            logger.warning(f"⚠️ No abstract found for DOI: {doi}, status code: {r_meta.status_code}")
+
+        # 与同步版本相同：只为有摘要 (会入库) 的论文抓取全文
+        full_text_content = None
+        if self.eager_full_text and abstract:
+            try:
+                r_fulltext = await self._aget(client, sem, base_url, params=FULL_PARAMS, headers={"Accept": "application/xml"})
+            except Exception as e:
+                r_fulltext = e
+            full_text_content = self._full_text_from(r_fulltext, doi)
+        return abstract, full_text_content
+
+    @staticmethod
+    def _full_text_from(response: httpx.Response | BaseException, doi: str) -> str | None:
+        if isinstance(response, BaseException):
+            logger.warning(f"⚠️ Exception while fetching full text for DOI {doi}: {response}")
+        elif response.status_code == 200:
+            return response.text
+        else:
+            logger.warning(f"⚠️ No full text found for DOI: {doi}, status code: {response.status_code}")
+        return None
+
+    async def fetch_full_text_async(self, doi: str) -> str | None:
+        """
+        按需获取单篇论文的全文 XML (元数据优先模式下由分析阶段对相关论文调用)，失败时返回 None。
+        复用抓取时的连接池；并发由调用方限制。
+        """
+        try:
+            response = await self._arequest(self._get_client(), self._article_url(doi),
+                                            params=FULL_PARAMS, headers={"Accept": "application/xml"})
         except Exception as e:
-            logger.warning(f"⚠️ Error loading config: {e}, using default journals")
-            self.journals = DEFAULT_Journals
+            response = e
+        return self._full_text_from(response, doi)
+
+    async def _afetch_papers_from_journal(self, client: httpx.AsyncClient, sem: asyncio.Semaphore, journal_name: str) -> list[Paper]:
+        logger.info(f"🕵️ Scout 正在 Elsevier 搜索期刊: {journal_name} ...")
+        try:
+            response = await self._aget(client, sem, self.search_base_url, params=self._search_query(journal_name))
+            response.raise_for_status()
+            results = response.json().get('search-results', {}).get('entry', [])
+        except Exception as e:
+            logger.error(f"Elsevier 搜索失败 ({journal_name}): {e}")
+            return []
+
+        details = await asyncio.gather(*(
+            self._afetch_abstract_and_fulltext(client, sem, item.get('prism:doi')) for item in results
+        ))
+
+        papers = []
+        access_paper_count = 0
+        for item, (abstract, full_text_content) in zip(results, details):
+            if abstract:
+                access_paper_count += 1
+            try:
+                paper = self._build_paper(item, journal_name, abstract, full_text_content)
+            except Exception as e:
+                logger.warning(f"⚠️ 无法解析 Elsevier 条目 ({journal_name}): {e}")
+                continue
+            if paper:
+                papers.append(paper)
+        self._log_journal_result(journal_name, papers, access_paper_count, len(results) - access_paper_count)
+        return papers
+
+    async def fetch_papers_async(self) -> list[Paper]:
+        """
+        异步抓取所有期刊。返回与 fetch_papers 相同的 Paper 列表（按期刊、检索结果顺序排列），
+        总耗时随并发上限 concurrency 而非论文数量增长。
+        连接池在同一事件循环内的多次调用之间复用 (常驻进程)，用完后调用 aclose() 释放。
+        """
+        sem = asyncio.Semaphore(self.concurrency)
+        client = self._get_client()
+        async with span("elsevier.fetch") as s:
+            per_journal = await asyncio.gather(*(
+                self._afetch_papers_from_journal(client, sem, journal) for journal in self.journals
+            ))
+            papers = [paper for papers in per_journal for paper in papers]
+            s.add(items=len(papers))
+        self.doi_list = papers  # 只保留最近一轮，常驻进程中不会无限增长
+        return papers
 
     def fetch_papers(self) -> set[Paper]:
-        for journal in self.journals:
-            logger.info(f"🕵️ Scout 正在 Elsevier 搜索期刊: {journal} ...")
-            papers = self._fetch_papers_from_journal(journal)
-            self.doi_list += papers
+        with span("elsevier.fetch") as s:
+            for journal in self.journals:
+                logger.info(f"🕵️ Scout 正在 Elsevier 搜索期刊: {journal} ...")
+                papers = self._fetch_papers_from_journal(journal)
+                self.doi_list += papers
+                s.add(items=len(papers))
         return list(self.doi_list)
     
     
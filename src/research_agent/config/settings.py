@@ -0,0 +1,269 @@
+# src/research_agent/config/settings.py
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Generic, TypeVar
+import yaml
+from loguru import logger
+
+CONFIG_DIR = Path(__file__).parent
+USER_CONFIG_FILE = CONFIG_DIR / "user_config.yaml"
+PROMPT_FILE = CONFIG_DIR / "analysis_prompt.yaml"
+LLM_CONFIG_FILE = CONFIG_DIR / "llm_config.yaml"
+
+# 各任务默认使用的模型，可在 llm_config.yaml 的 models 中覆盖
+DEFAULT_MODELS = {
+    "triage": "gpt-4o-mini",      # 相关性筛选
+    "review": "gpt-4o",           # 论文评审
+    "review_map": "gpt-4o-mini",  # 超长论文的分块摘要
+    "extract": "gpt-4o",          # 上传 PDF 的元数据提取
+    "prompt": "gpt-5-mini",       # 生成评审 Prompt 模板
+}
+
+T = TypeVar("T")
+
+DEFAULT_UPDATE_INTERVAL = 24 * 3600.0
+_FREQUENCY_UNITS = {"minute": 60, "hour": 3600, "day": 86400, "week": 7 * 86400}
+_FREQUENCY_ALIASES = {"hourly": "every 1 hour", "daily": "every 1 day", "weekly": "every 1 week"}
+
+
+def parse_frequency(text: str) -> float | None:
+    """
+    把 update_frequency 转成秒数："Every 6 hours" / "Every 30 minutes" / "Daily" / "Weekly"，
+    无法识别时返回 None
+    """
+    text = _FREQUENCY_ALIASES.get(text.strip().lower(), text.strip().lower())
+    match = re.fullmatch(r"(?:every\s+)?(\d+(?:\.\d+)?)?\s*(minute|hour|day|week)s?", text)
+    if not match:
+        return None
+    return float(match.group(1) or 1) * _FREQUENCY_UNITS[match.group(2)]
+
+
+@dataclass(frozen=True)
+class UserConfig:
+    """user_config.yaml：研究兴趣、期刊、数据源与更新频率"""
+    fields: tuple[str, ...] = ()
+    journals: tuple[str, ...] = ()
+    sources: tuple[str, ...] = ()
+    update_frequency: str = "Every 24 hours"
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "UserConfig":
+        def as_tuple(value) -> tuple[str, ...]:
+            if not value:
+                return ()
+            if isinstance(value, str):
+                value = [value]
+            return tuple(str(v).strip() for v in value if str(v).strip())
+
+        return cls(
+            fields=as_tuple(data.get("fields")),
+            journals=as_tuple(data.get("journals")),
+            sources=as_tuple(data.get("sources")),
+            update_frequency=data.get("update_frequency") or cls.update_frequency,
+        )
+
+    def to_dict(self) -> dict:
+        return {key: list(value) if isinstance(value, tuple) else value for key, value in asdict(self).items()}
+
+    @property
+    def update_interval(self) -> float:
+        """update_frequency 对应的秒数，无法识别时按每 24 小时"""
+        seconds = parse_frequency(self.update_frequency)
+        if seconds is None:
+            logger.warning(f"⚠️ Unknown update_frequency {self.update_frequency!r}, using every 24 hours")
+            return DEFAULT_UPDATE_INTERVAL
+        return seconds
+
+    @property
+    def research_interests(self) -> str:
+        """编号形式的研究兴趣画像 ("1. xxx\\n2. yyy")，未配置时为空字符串"""
+        return "\n".join(f"{i + 1}. {f}" for i, f in enumerate(self.fields))
+
+
+@dataclass(frozen=True)
+class PromptConfig:
+    """analysis_prompt.yaml：由 PromptAgent 根据研究兴趣生成的评审 Prompt"""
+    template: str | None = None
+    based_on_fields: tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PromptConfig":
+        return cls(template=data.get("template") or None, based_on_fields=tuple(data.get("based_on_fields") or ()))
+
+    def to_dict(self) -> dict:
+        return {"based_on_fields": list(self.based_on_fields), "template": self.template}
+
+
+@dataclass(frozen=True)
+class LLMConfig:
+    """llm_config.yaml：LLM 网关的连接参数与按任务的模型路由"""
+    base_url: str | None = None   # None 时使用 OPENAI_BASE_URL 环境变量或官方地址
+    timeout: float = 120.0
+    connect_timeout: float = 10.0
+    max_retries: int = 5
+    max_connections: int = 32
+    models: tuple[tuple[str, str], ...] = tuple(DEFAULT_MODELS.items())
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LLMConfig":
+        models = {**DEFAULT_MODELS, **(data.get("models") or {})}
+        return cls(
+            base_url=data.get("base_url") or None,
+            timeout=float(data.get("timeout", cls.timeout)),
+            connect_timeout=float(data.get("connect_timeout", cls.connect_timeout)),
+            max_retries=int(data.get("max_retries", cls.max_retries)),
+            max_connections=int(data.get("max_connections", cls.max_connections)),
+            models=tuple(models.items()),
+        )
+
+    def to_dict(self) -> dict:
+        return {**{key: value for key, value in asdict(self).items() if key != "models"}, "models": dict(self.models)}
+
+    def model_for(self, task: str) -> str:
+        return dict(self.models).get(task) or DEFAULT_MODELS["review"]
+
+
+class ConfigFile(Generic[T]):
+    """
+    单个 YAML 配置文件：只在文件变化时解析一次。
+    get() 在 check_interval 秒内直接返回缓存，超过后仅 stat 一次比较 mtime / size，开销可以忽略。
+    文件变化后通知所有订阅者，长时间运行的 worker 无需重启即可生效。
+    """
+
+    def __init__(self, path: Path, parse: Callable[[dict], T], default: T, check_interval: float = 2.0):
+        self.path = Path(path)
+        self.parse = parse
+        self.default = default
+        self.check_interval = check_interval
+        self._value: T = default
+        self._signature = None  # (mtime_ns, size)；None 表示尚未加载
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._subscribers: list[Callable[[T], None]] = []
+
+    def _stat_signature(self):
+        try:
+            st = self.path.stat()
+            return st.st_mtime_ns, st.st_size
+        except FileNotFoundError:
+            return "missing"
+
+    def get(self) -> T:
+        now = time.monotonic()
+        if self._signature is not None and now - self._checked_at < self.check_interval:
+            return self._value
+        changed = False
+        with self._lock:
+            self._checked_at = now
+            signature = self._stat_signature()
+            if signature != self._signature:
+                changed = self._reload(signature)
+        if changed:
+            self._notify()
+        return self._value
+
+    def _reload(self, signature) -> bool:
+        """返回值是否发生变化；解析失败时保留上一次的有效配置"""
+        if signature == "missing":
+            value = self.default
+            if self._signature is None:
+                logger.warning(f"⚠️ Config file not found at {self.path}, using defaults")
+        else:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    value = self.parse(yaml.safe_load(f) or {})
+                logger.info(f"✅ Loaded {self.path.name}")
+            except Exception as e:
+                logger.warning(f"⚠️ Error loading {self.path.name}: {e}, keeping previous values")
+                value = self._value
+        first_load = self._signature is None
+        self._signature = signature
+        changed = value != self._value
+        self._value = value
+        return changed and not first_load
+
+    def _notify(self):
+        for callback in list(self._subscribers):
+            try:
+                callback(self._value)
+            except Exception as e:
+                logger.error(f"配置变更回调出错: {e}")
+
+    def subscribe(self, callback: Callable[[T], None]) -> Callable[[T], None]:
+        """文件内容变化后调用 callback(新配置)"""
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: Callable[[T], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def invalidate(self):
+        """下一次 get() 强制检查文件"""
+        self._checked_at = 0.0
+
+    def save(self, value: T):
+        """原子写入 (临时文件 + rename)，读者不会看到写了一半的文件"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                yaml.dump(value.to_dict(), f, default_flow_style=False, allow_unicode=True)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.invalidate()
+        self.get()
+
+
+class Settings:
+    """进程内共享的配置服务 (通过 get_settings() 获取)"""
+
+    def __init__(self, config_dir: Path = CONFIG_DIR, check_interval: float = 2.0):
+        config_dir = Path(config_dir)
+        self.user = ConfigFile(config_dir / USER_CONFIG_FILE.name, UserConfig.from_dict, UserConfig(), check_interval)
+        self.prompt = ConfigFile(config_dir / PROMPT_FILE.name, PromptConfig.from_dict, PromptConfig(), check_interval)
+        self.llm = ConfigFile(config_dir / LLM_CONFIG_FILE.name, LLMConfig.from_dict, LLMConfig(), check_interval)
+        self._watcher: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def watch(self, interval: float = 5.0):
+        """
+        启动后台线程定期检查配置文件，变化时主动推送给订阅者
+        (适合长时间空闲、不会频繁调用 get() 的守护进程)。
+        """
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.wait(interval):
+                for config in (self.user, self.prompt, self.llm):
+                    config.invalidate()
+                    config.get()
+
+        self._watcher = threading.Thread(target=_loop, name="config-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        self._watcher = None
+
+
+_settings: Settings | None = None
+_settings_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = Settings()
+    return _settings
@@ -0,0 +1,230 @@
+# src/research_agent/llm/gateway.py
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+import httpx
+from dotenv import load_dotenv
+from loguru import logger
+from openai import AsyncOpenAI, OpenAI
+from src.research_agent.config.settings import LLMConfig, get_settings
+from src.research_agent.llm.rate_limit import backoff_delay, is_retryable, retry_with_backoff
+from src.research_agent.telemetry.spans import get_telemetry
+
+load_dotenv()  # 加载 .env 中的 API KEY
+
+
+@dataclass
+class CallStats:
+    """单个 (任务, 模型) 的调用统计"""
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_total: float = 0.0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=2000))  # 最近的延迟样本，用于分位数
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LLMMetrics:
+    """线程安全的 LLM 调用计量：延迟、token、错误与重试次数"""
+
+    def __init__(self):
+        self._stats: dict[tuple[str, str], CallStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, task: str, model: str, latency: float, attempts: int, usage=None, error: bool = False):
+        with self._lock:
+            stats = self._stats.setdefault((task, model), CallStats())
+            stats.calls += 1
+            stats.retries += attempts - 1
+            stats.latency_total += latency
+            stats.latencies.append(latency)
+            if error:
+                stats.errors += 1
+            if usage is not None:
+                stats.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+                stats.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "task": task, "model": model, "calls": s.calls, "errors": s.errors, "retries": s.retries,
+                    "prompt_tokens": s.prompt_tokens, "completion_tokens": s.completion_tokens,
+                    "latency_avg": s.latency_total / s.calls if s.calls else 0.0,
+                    "latency_p50": s.percentile(0.5), "latency_p95": s.percentile(0.95),
+                }
+                for (task, model), s in self._stats.items()
+            ]
+
+    def latencies(self, task: str) -> list[float]:
+        """某个任务 (所有模型) 最近的延迟样本"""
+        with self._lock:
+            return [x for (t, _), s in self._stats.items() if t == task for x in s.latencies]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def log_summary(self):
+        for row in self.snapshot():
+            logger.info(
+                f"🤖 [{row['task']}] {row['model']}: {row['calls']} 次调用 (失败 {row['errors']}，重试 {row['retries']})，"
+                f"tokens {row['prompt_tokens']} + {row['completion_tokens']}，"
+                f"延迟 avg {row['latency_avg']:.2f}s p50 {row['latency_p50']:.2f}s p95 {row['latency_p95']:.2f}s"
+            )
+
+
+class LLMGateway:
+    """
+    所有 Agent 共用的 LLM 入口：
+    - 同步 / 异步各一个带连接池的客户端 (异步客户端按事件循环创建，离开事件循环前调用 aclose() 释放)
+    - 统一的超时与指数退避重试 (429 / 5xx / 超时)
+    - 按任务路由模型 (llm_config.yaml 的 models，修改后即时生效)
+    - 每次调用的延迟与 token 计量
+    """
+
+    def __init__(self, config: LLMConfig | None = None, api_key: str | None = None, base_url: str | None = None):
+        """
+        config: 连接参数，默认读取 llm_config.yaml
+        base_url: 覆盖配置中的地址，例如指向本地的 stub_server 做离线压测
+        """
+        self.config = config or get_settings().llm.get()
+        self.base_url = base_url or self.config.base_url or os.getenv("OPENAI_BASE_URL")
+        # 本地兼容服务不校验 key
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY") or ("sk-local" if self.base_url else None)
+        self.metrics = LLMMetrics()
+        self._client: OpenAI | None = None
+        self._async_clients: dict[asyncio.AbstractEventLoop, AsyncOpenAI] = {}
+        self._lock = threading.Lock()
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.config.timeout, connect=self.config.connect_timeout)
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.config.max_connections,
+                            max_keepalive_connections=self.config.max_connections)
+
+    @property
+    def client(self) -> OpenAI:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    # 重试由网关统一处理，关闭 SDK 自带的重试
+                    self._client = OpenAI(
+                        api_key=self.api_key, base_url=self.base_url, max_retries=0, timeout=self._timeout(),
+                        http_client=httpx.Client(limits=self._limits(), timeout=self._timeout()),
+                    )
+        return self._client
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        # httpx.AsyncClient 的连接池绑定在创建它的事件循环上
+        # 按事件循环各建一个客户端，多个线程各自的事件循环不会互相替换对方的客户端
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                self._drop_closed_loops()
+                client = self._async_clients[loop] = AsyncOpenAI(
+                    api_key=self.api_key, base_url=self.base_url, max_retries=0, timeout=self._timeout(),
+                    http_client=httpx.AsyncClient(limits=self._limits(), timeout=self._timeout()),
+                )
+        return client
+
+    def _drop_closed_loops(self):
+        # 事件循环已关闭时无法再 await 关闭其客户端，只能丢弃引用；正常路径应在循环结束前调用 aclose()
+        for loop in [loop for loop in self._async_clients if loop.is_closed()]:
+            del self._async_clients[loop]
+            logger.warning("⚠️ 异步 LLM 客户端所在的事件循环已关闭但客户端未通过 aclose() 释放")
+
+    def _record(self, task: str, model: str, start: float, attempts: int, usage=None, error: bool = False):
+        latency = time.perf_counter() - start
+        self.metrics.record(task, model, latency, attempts, usage, error)
+        # 同时计入本次运行的阶段指标 (llm.<任务>)，用于按阶段统计 token
+        get_telemetry().record(f"llm.{task}", latency, error=error,
+                               prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                               completion_tokens=getattr(usage, "completion_tokens", 0) or 0)
+
+    def model_for(self, task: str) -> str:
+        return get_settings().llm.get().model_for(task)
+
+    def complete(self, task: str, messages: list[dict], model: str | None = None, **kwargs):
+        """同步 chat completion，返回 SDK 的 ChatCompletion 对象；重试耗尽后抛出最后一次的异常"""
+        model = model or self.model_for(task)
+        start = time.perf_counter()
+        for attempt in range(self.config.max_retries + 1):
+            try:
+                response = self.client.chat.completions.create(model=model, messages=messages, **kwargs)
+            except Exception as e:
+                if attempt == self.config.max_retries or not is_retryable(e):
+                    self._record(task, model, start, attempt + 1, error=True)
+                    raise
+                delay = backoff_delay(e, attempt)
+                logger.warning(f"⏳ LLM 调用失败 ({type(e).__name__})，{delay:.1f}s 后第 {attempt + 1} 次重试")
+                time.sleep(delay)
+            else:
+                self._record(task, model, start, attempt + 1, response.usage)
+                return response
+
+    async def acomplete(self, task: str, messages: list[dict], model: str | None = None, acquire=None, **kwargs):
+        """
+        异步版本的 complete
+        acquire: 每次发出请求 (包括重试) 前 await 的回调，例如 lambda: limiter.acquire(tokens)，重试同样受限流约束
+        """
+        model = model or self.model_for(task)
+        start = time.perf_counter()
+        attempts = 0
+
+        async def _call():
+            nonlocal attempts
+            attempts += 1
+            if acquire is not None:
+                await acquire()
+            return await self.async_client.chat.completions.create(model=model, messages=messages, **kwargs)
+
+        try:
+            response = await retry_with_backoff(_call, max_retries=self.config.max_retries)
+        except Exception:
+            self._record(task, model, start, attempts, error=True)
+            raise
+        self._record(task, model, start, attempts, response.usage)
+        return response
+
+    async def aclose(self):
+        """关闭当前事件循环上的异步客户端 (每个 asyncio.run 结束前、常驻进程退出前调用)"""
+        with self._lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+            self._drop_closed_loops()
+        if client is not None:
+            await client.close()
+
+
+_gateway: LLMGateway | None = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """进程内共享的网关实例"""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+    return _gateway
+
+
+def set_gateway(gateway: LLMGateway):
+    """替换进程内共享的网关，例如让基准测试的所有 Agent 指向本地 stub 服务"""
+    global _gateway
+    with _gateway_lock:
+        _gateway = gateway
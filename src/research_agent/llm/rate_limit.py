@@ -0,0 +1,84 @@
+# src/research_agent/llm/rate_limit.py
+import asyncio
+import random
+import time
+import openai
+from loguru import logger
+
+
+class TokenBucket:
+    """异步令牌桶：容量为每分钟配额，按秒匀速回填"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        # 单次请求超过桶容量时按容量计，避免永远等不到
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+
+class RateLimiter:
+    """同时限制每分钟请求数 (RPM) 和每分钟 token 数 (TPM)"""
+
+    def __init__(self, requests_per_minute: float = 500, tokens_per_minute: float = 200_000):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    async def acquire(self, tokens: int):
+        await self.requests.acquire(1)
+        await self.tokens.acquire(tokens)
+
+
+def is_retryable(error: Exception) -> bool:
+    """429、5xx、超时和连接错误可以重试；其余 4xx 重试也没有意义"""
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_after(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(error: Exception, attempt: int, base_delay: float = 1.0, max_delay: float = 60.0) -> float:
+    """第 attempt 次重试前的等待时间：优先 Retry-After，否则指数退避 + full jitter"""
+    return _retry_after(error) or random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+async def retry_with_backoff(call, max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+    """
+    执行异步调用 call()，遇到可重试错误时按指数退避 (full jitter) 重试，
+    服务端给出 Retry-After 时优先遵循。
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return await call()
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(e, attempt, base_delay, max_delay)
+            logger.warning(f"⏳ LLM 调用失败 ({type(e).__name__})，{delay:.1f}s 后第 {attempt + 1} 次重试")
+            await asyncio.sleep(delay)
@@ -0,0 +1,182 @@
+# src/research_agent/llm/stub_server.py
+"""
+本地 OpenAI 兼容的 stub 服务，用于离线压测与基准测试：
+返回固定格式的响应 (筛选 JSON / 评审 Markdown)，并可注入延迟与错误。
+
+    python -m src.research_agent.llm.stub_server --port 8011 --latency 0.5 --error-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8011/v1 python -m src.main_demo
+"""
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from loguru import logger
+from src.research_agent.llm.tokens import count_tokens
+
+BATCH_ID_PATTERN = re.compile(r"\[id: ([^\]]+)\]")
+
+REVIEW_TEMPLATE = """## TL;DR
+Stub review generated offline.
+
+## Summary
+- The paper proposes a method and evaluates it on a benchmark.
+- Results are reported against standard baselines.
+
+## Recommendation
+Skim
+
+## Strengths
+- Clear problem statement
+- Reproducible setup
+- Reasonable baselines
+
+## Weaknesses
+- Limited evaluation
+- Missing ablations
+- Unclear generalisation
+"""
+
+
+@dataclass
+class StubBehavior:
+    latency: float = 0.2           # 每次请求的基础延迟 (秒)
+    jitter: float = 0.1            # 延迟的随机浮动 (秒)
+    seconds_per_token: float = 0.0  # 按输出 token 数增加的延迟，模拟流式生成速度
+    error_rate: float = 0.0        # 以该概率返回 429 / 503，用于验证重试
+    relevant_ratio: float = 0.3    # 筛选请求中判定为相关的比例 (按内容哈希，结果可复现)
+    review_repeat: int = 1         # 评审文本重复次数，控制输出长度
+
+
+def _is_relevant(text: str, ratio: float) -> bool:
+    return zlib.crc32(text.encode("utf-8")) % 1000 < ratio * 1000
+
+
+def canned_content(messages: list[dict], response_format: dict | None, behavior: StubBehavior) -> str:
+    """根据请求形态构造固定响应"""
+    user = "\n".join(str(m.get("content", "")) for m in messages if m.get("role") == "user")
+    if response_format and response_format.get("type") == "json_object":
+        ids = BATCH_ID_PATTERN.findall(user)
+        if ids:
+            # 批量筛选：按 [id: N] 分段，逐篇给出判定
+            parts = BATCH_ID_PATTERN.split(user)[1:]
+            items = dict(zip(parts[::2], parts[1::2]))
+            return json.dumps({"results": [
+                {"id": i, "is_relevant": _is_relevant(items.get(i, i), behavior.relevant_ratio), "reason": "stub verdict"}
+                for i in ids
+            ]})
+        return json.dumps({"is_relevant": _is_relevant(user, behavior.relevant_ratio), "reason": "stub verdict"})
+    return REVIEW_TEMPLATE * behavior.review_repeat
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "StubLLM/1.0"
+    behavior: StubBehavior = StubBehavior()
+
+    def log_message(self, format, *args):
+        pass  # 压测时避免刷屏
+
+    def _send_json(self, status: int, payload: dict, headers: dict | None = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/v1/models", "/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        behavior = self.behavior
+
+        if behavior.error_rate and random.random() < behavior.error_rate:
+            status = random.choice([429, 503])
+            self._send_json(status, {"error": {"message": "injected error", "type": "stub"}}, {"Retry-After": "0.1"})
+            return
+
+        messages = request.get("messages", [])
+        content = canned_content(messages, request.get("response_format"), behavior)
+        prompt_tokens = sum(count_tokens(str(m.get("content", ""))) for m in messages)
+        completion_tokens = count_tokens(content)
+        delay = behavior.latency + random.uniform(-behavior.jitter, behavior.jitter)
+        time.sleep(max(0.0, delay + completion_tokens * behavior.seconds_per_token))
+
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+
+class StubServer:
+    """在后台线程中运行的 stub 服务，port=0 时自动分配端口"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, behavior: StubBehavior | None = None):
+        handler = type("StubHandler", (_Handler,), {"behavior": behavior or StubBehavior()})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    cli = argparse.ArgumentParser(description="OpenAI 兼容的本地 stub 服务")
+    cli.add_argument("--host", default="127.0.0.1")
+    cli.add_argument("--port", type=int, default=8011)
+    cli.add_argument("--latency", type=float, default=0.2)
+    cli.add_argument("--jitter", type=float, default=0.1)
+    cli.add_argument("--seconds-per-token", type=float, default=0.0)
+    cli.add_argument("--error-rate", type=float, default=0.0)
+    cli.add_argument("--relevant-ratio", type=float, default=0.3)
+    args = cli.parse_args()
+
+    behavior = StubBehavior(latency=args.latency, jitter=args.jitter, seconds_per_token=args.seconds_per_token,
+                            error_rate=args.error_rate, relevant_ratio=args.relevant_ratio)
+    server = StubServer(args.host, args.port, behavior)
+    logger.info(f"🧪 Stub LLM 服务已启动: {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
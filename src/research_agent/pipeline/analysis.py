@@ -0,0 +1,338 @@
+# src/research_agent/pipeline/analysis.py
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from loguru import logger
+from sqlmodel import Session, select
+from src.research_agent.storage.models import (
+    Paper, PaperBlob, FULL_TEXT, ANALYSIS_REPORT, PARSED_TEXT, JOB_STATES, TRIAGED, DOWNLOADED, PARSED, REVIEWED, engine,
+)
+from src.research_agent.storage.blobs import load_blob, save_blob
+from src.research_agent.pipeline.jobs import ClaimedJob, JobQueue
+from src.research_agent.acquisition.downloader import DownloadManager
+from src.research_agent.agents.analysis.batch_parser import BatchPDFParser
+from src.research_agent.agents.analysis.reviewer import PaperReviewer, REVIEW_ERROR_PREFIX
+
+
+@dataclass
+class AnalysisJob:
+    """在各阶段之间传递的论文任务 (不持有 ORM 对象，可安全跨线程)"""
+    paper_id: str
+    title: str
+    url: str
+    source: str
+    download_status: str
+    has_full_text: bool = False
+    doi: str | None = None            # Elsevier 论文按 DOI 抓取全文 XML
+    state: str = TRIAGED              # 已完成到哪一步 (paper_jobs.state)
+    lease: ClaimedJob | None = None   # 从任务队列领取时的租约；None 表示不经过队列 (如基准测试)
+    pdf_path: str | None = None
+    markdown: str | None = None
+    report: str | None = None
+    error: str | None = None          # 失败原因，写入 paper_jobs.last_error
+    retry: bool = False               # 失败不是论文本身的原因 (如解析进程池被终止)，释放租约重试，不计失败次数
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0   # 所有 worker 实际处理任务的累计时间
+    wait_seconds: float = 0.0   # 因下游队列已满而阻塞的累计时间 (反压)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """每分钟完成的任务数"""
+        return self.processed / self.elapsed * 60 if self.elapsed else 0.0
+
+    @property
+    def capacity(self) -> float:
+        """按平均处理耗时估算的该阶段满载吞吐 (篇 / 分钟)，最小者即流水线瓶颈"""
+        done = self.processed + self.failed
+        return self.workers * done / self.busy_seconds * 60 if self.busy_seconds else float("inf")
+
+
+# 各阶段成功后任务推进到的状态 (评审结果在入库阶段才落盘)
+STAGE_STATES = {"download": DOWNLOADED, "parse": PARSED, "store": REVIEWED}
+
+
+class AnalysisPipeline:
+    """
+    分析阶段的流水线：下载 -> 解析 -> 评审 -> 入库，各阶段之间是有界队列。
+    每个阶段有独立的 worker 数，下游处理不过来时上游会在 put 上阻塞 (反压)，
+    网络、CPU 与 LLM 的等待因此可以重叠，整体耗时接近最慢的阶段。
+    任务从 paper_jobs 队列按租约领取，每完成一步就持久化状态，多个进程可以同时运行，崩溃后从上一步继续。
+    """
+
+    def __init__(self, downloader: DownloadManager | None = None, reviewer: PaperReviewer | None = None,
+                 parser: BatchPDFParser | None = None, download_workers: int = 4, parse_workers: int | None = None,
+                 review_workers: int = 4, queue_size: int = 8, jobs: JobQueue | None = None, claim_batch: int = 16):
+        """
+        parse_workers: 解析进程数，默认等于 CPU 核数
+        queue_size: 相邻阶段之间队列的容量
+        jobs: 任务队列 (租约时长、重试次数与退避)，默认 JobQueue()
+        claim_batch: 每次从任务队列领取的任务数
+        """
+        self.downloader = downloader or DownloadManager()
+        self.reviewer = reviewer or PaperReviewer()
+        self.parser = parser or BatchPDFParser(workers=parse_workers)
+        self.download_workers = download_workers
+        self.parse_workers = self.parser.workers
+        self.review_workers = review_workers
+        self.queue_size = queue_size
+        self.jobs = jobs or JobQueue()
+        self.claim_batch = claim_batch
+        self.draining = False
+
+    def pending_jobs(self, limit: int | None = None) -> list[AnalysisJob]:
+        """所有相关且尚未生成报告的论文"""
+        has_full_text = Paper.blobs.any(PaperBlob.kind == FULL_TEXT)
+        statement = select(Paper.id, Paper.title, Paper.url, Paper.source, Paper.download_status, has_full_text,
+                           Paper.doi).where(
+            Paper.is_relevant == True,
+            Paper.canonical_id == None,
+            ~Paper.blobs.any(PaperBlob.kind == ANALYSIS_REPORT),
+        )
+        if limit:
+            statement = statement.limit(limit)
+        with Session(engine) as session:
+            rows = session.exec(statement).all()
+        return [AnalysisJob(*row) for row in rows]
+
+    def claim_jobs(self, limit: int) -> list[AnalysisJob]:
+        """从任务队列领取已筛选为相关、尚未评审完成的论文 (带租约)"""
+        leases = {lease.paper_id: lease for lease in self.jobs.claim([TRIAGED, DOWNLOADED, PARSED], limit)}
+        if not leases:
+            return []
+        has_full_text = Paper.blobs.any(PaperBlob.kind == FULL_TEXT)
+        statement = select(Paper.id, Paper.title, Paper.url, Paper.source, Paper.download_status, has_full_text,
+                           Paper.doi).where(
+            Paper.id.in_(list(leases))
+        )
+        with Session(engine) as session:
+            rows = session.exec(statement).all()
+        jobs = [AnalysisJob(*row, state=leases[row[0]].state, lease=leases[row[0]]) for row in rows]
+        for paper_id in leases.keys() - {job.paper_id for job in jobs}:
+            self.jobs.fail(leases[paper_id], "paper row not found")
+        return jobs
+
+    # ---------- 各阶段的处理函数：返回 None 表示该任务失败，不再向下游传递 ----------
+
+    async def _download(self, job: AnalysisJob) -> AnalysisJob | None:
+        if job.state == PARSED:
+            return job  # 解析结果已在数据库中
+        if job.source != "arxiv" and job.has_full_text:
+            return job  # 已有全文 XML，无需下载 PDF
+        if job.source.startswith("elsevier") and job.doi:
+            # 元数据优先模式入库的论文：只为筛选为相关的论文抓取全文 XML
+            status = await self.downloader.process_download(job.paper_id, job.url, job.source, doi=job.doi)
+            await asyncio.to_thread(self._set_download_status, job.paper_id, status)
+            if status != "downloaded":
+                job.error = f"full text {status}"
+                logger.error(f"论文 {job.paper_id} 全文获取失败，跳过分析。")
+                return None
+            job.has_full_text = True
+            return job
+        job.pdf_path = os.path.join(self.downloader.storage_dir, f"{job.paper_id.replace(':', '_')}.pdf")
+        # 数据库记录已下载但 PDF 文件已不在 (如 data/papers 被清理) 时重新下载
+        if job.download_status != "downloaded" or not os.path.exists(job.pdf_path):
+            status = await self.downloader.process_download(paper_id=job.paper_id, url=job.url, source=job.source)
+            await asyncio.to_thread(self._set_download_status, job.paper_id, status)
+            if status != "downloaded":
+                job.error = f"download {status}"
+                logger.error(f"论文 {job.paper_id} 下载失败，跳过分析。")
+                return None
+        return job
+
+    async def _parse(self, job: AnalysisJob) -> AnalysisJob | None:
+        if job.state == PARSED:
+            job.markdown = await asyncio.to_thread(load_blob, job.paper_id, PARSED_TEXT)
+            if job.markdown:
+                return job
+            # 解析结果丢失，退回到下载之后重新解析
+            job.state = DOWNLOADED
+            if await self._download(job) is None:
+                return None
+        if job.pdf_path is None:
+            xml_content = await asyncio.to_thread(load_blob, job.paper_id, FULL_TEXT)
+            job.markdown = await asyncio.to_thread(self.reviewer.xml_to_markdown, xml_content) if xml_content else None
+        else:
+            result = await self.parser.parse_async(job.pdf_path)
+            job.markdown = result.markdown
+            job.error = result.error
+            job.retry = result.interrupted
+        if not job.markdown:
+            job.error = job.error or "parse produced no text"
+            logger.error(f"论文 {job.paper_id} 解析失败，跳过分析。")
+            return None
+        if job.lease is not None:
+            # 持久化解析结果，崩溃或换 worker 后直接从评审开始
+            await asyncio.to_thread(save_blob, job.paper_id, PARSED_TEXT, job.markdown)
+        return job
+
+    async def _review(self, job: AnalysisJob) -> AnalysisJob | None:
+        logger.info(f"开始分析论文: {job.paper_id} ...")
+        job.report = await asyncio.to_thread(self.reviewer.review_text, job.title, job.markdown)
+        job.markdown = None  # 全文不再需要，尽早释放
+        if not job.report or job.report.startswith(REVIEW_ERROR_PREFIX):
+            job.error = job.report or "empty review"
+            logger.error(f"论文 {job.paper_id} 分析失败: {job.report}")
+            return None  # 不写入错误报告，退避后重试
+        return job
+
+    async def _store(self, job: AnalysisJob) -> AnalysisJob | None:
+        await asyncio.to_thread(save_blob, job.paper_id, ANALYSIS_REPORT, job.report)
+        if job.lease is not None:
+            await asyncio.to_thread(save_blob, job.paper_id, PARSED_TEXT, None)  # 中间结果不再需要
+        logger.success(f"论文 {job.paper_id} 分析完成。")
+        return job
+
+    @staticmethod
+    def _set_download_status(paper_id: str, status: str):
+        with Session(engine) as session:
+            paper = session.get(Paper, paper_id)
+            if paper:
+                paper.download_status = status
+                session.add(paper)
+                session.commit()
+
+    # ---------- 调度 ----------
+
+    async def _checkpoint(self, stage: str, job: AnalysisJob, ok: bool) -> bool:
+        """把一步的结果写回任务队列；返回 False 表示租约已失效，任务不再向下游传递"""
+        if job.lease is None:
+            return ok
+        if not ok and job.retry:
+            await asyncio.to_thread(self.jobs.release, job.lease)
+            return False
+        if not ok:
+            await asyncio.to_thread(self.jobs.fail, job.lease, f"{stage}: {job.error or 'failed'}")
+            return False
+        target = STAGE_STATES.get(stage)
+        if target is None or JOB_STATES.index(target) <= JOB_STATES.index(job.lease.state):
+            return True  # 这一步之前已经完成过
+        return await asyncio.to_thread(self.jobs.advance, job.lease, target, target != REVIEWED)
+
+    async def _run_stage(self, stats: StageStats, handler, inbox: asyncio.Queue, outbox: asyncio.Queue | None,
+                         downstream_workers: int):
+        async def worker():
+            while True:
+                job = await inbox.get()
+                if job is None:
+                    return
+                if stats.started_at is None:
+                    stats.started_at = time.perf_counter()
+                start = time.perf_counter()
+                try:
+                    result = await handler(job)
+                except Exception as e:
+                    logger.error(f"[{stats.name}] 论文 {job.paper_id} 处理异常: {e}")
+                    job.error = f"{type(e).__name__}: {e}"
+                    result = None
+                stats.busy_seconds += time.perf_counter() - start
+                stats.finished_at = time.perf_counter()
+                if not await self._checkpoint(stats.name, job, result is not None):
+                    stats.failed += 1
+                    continue
+                stats.processed += 1
+                if outbox is not None:
+                    start = time.perf_counter()
+                    await outbox.put(result)
+                    stats.wait_seconds += time.perf_counter() - start
+
+        await asyncio.gather(*(worker() for _ in range(stats.workers)))
+        if outbox is not None:
+            # 本阶段全部结束后，给下游每个 worker 发一个结束标记
+            for _ in range(downstream_workers):
+                await outbox.put(None)
+
+    async def _feed(self, source: asyncio.Queue, jobs: list[AnalysisJob] | None, workers: int):
+        """向第一个阶段供给任务：给定 jobs 时直接放入，否则从任务队列分批领取，直到没有可领取的任务"""
+        if jobs is not None:
+            for job in jobs:
+                await source.put(job)
+        else:
+            claimed = 0
+            # 源队列容量为 claim_batch，下游消化一批后才领取下一批，领到的任务不会长时间空占租约
+            while not self.draining and (batch := await asyncio.to_thread(self.claim_jobs, self.claim_batch)):
+                claimed += len(batch)
+                logger.info(f"📋 领取 {len(batch)} 篇待分析论文 (本次累计 {claimed} 篇)")
+                for job in batch:
+                    await source.put(job)
+        for _ in range(workers):
+            await source.put(None)
+
+    def drain(self):
+        """不再领取新任务，正在进行的 run() 处理完已领取的任务后返回 (用于优雅退出)"""
+        self.draining = True
+
+    async def keep_alive(self):
+        """定期为本进程持有的租约续期，直到被取消"""
+        while True:
+            await asyncio.sleep(self.jobs.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.jobs.heartbeat)
+            except Exception as e:
+                logger.warning(f"⚠️ 租约续期失败: {e}")
+
+    async def run(self, jobs: list[AnalysisJob] | None = None, close: bool = True) -> dict[str, StageStats]:
+        """
+        jobs: 默认从任务队列领取所有可处理的论文；直接传入的任务不经过队列 (不加租约、不记录状态)
+        close: 结束后释放下载连接池与解析进程池；常驻进程传 False，多轮之间复用，退出时调用 aclose()
+        """
+        if jobs is not None:
+            logger.info(f"📋 待分析论文 {len(jobs)} 篇")
+        stages = [
+            (StageStats("download", self.download_workers), self._download),
+            (StageStats("parse", self.parse_workers), self._parse),
+            (StageStats("review", self.review_workers), self._review),
+            (StageStats("store", 1), self._store),  # SQLite 单写者
+        ]
+        queues = [asyncio.Queue(maxsize=self.claim_batch)] + \
+                 [asyncio.Queue(maxsize=self.queue_size) for _ in stages[1:]] + [None]
+
+        start = time.perf_counter()
+        heartbeat = asyncio.create_task(self.keep_alive())
+        try:
+            await asyncio.gather(
+                self._feed(queues[0], jobs, stages[0][0].workers),
+                *(self._run_stage(stats, handler, queues[i], queues[i + 1],
+                                  stages[i + 1][0].workers if i + 1 < len(stages) else 0)
+                  for i, (stats, handler) in enumerate(stages)),
+            )
+        finally:
+            heartbeat.cancel()
+            # 正常结束时所有任务都已推进或记为失败；被取消时把未完成任务的租约还回队列
+            await asyncio.to_thread(self.jobs.release_all)
+            if close:
+                await self.aclose()
+
+        results = {stats.name: stats for stats, _ in stages}
+        self._log_stats(results, time.perf_counter() - start)
+        return results
+
+    async def aclose(self):
+        await self.downloader.aclose()
+        self.parser.close()
+
+    @staticmethod
+    def _log_stats(results: dict[str, StageStats], elapsed: float):
+        for stats in results.values():
+            avg = stats.busy_seconds / max(1, stats.processed + stats.failed)
+            logger.info(
+                f"📈 [{stats.name}] workers={stats.workers} 成功 {stats.processed} 失败 {stats.failed} "
+                f"平均 {avg:.2f}s/篇 吞吐 {stats.throughput:.1f} 篇/分钟 反压等待 {stats.wait_seconds:.1f}s"
+            )
+        bottleneck = min(results.values(), key=lambda s: s.capacity)
+        logger.success(f"🏁 分析流水线完成，总耗时 {elapsed:.1f}s，瓶颈阶段: {bottleneck.name}")
@@ -0,0 +1,255 @@
+# src/research_agent/pipeline/jobs.py
+"""
+基于 SQLite 的持久化任务队列 (paper_jobs 表)：每篇论文一行，记录状态机进度与租约。
+
+    queue = JobQueue()
+    for job in queue.claim([TRIAGED], limit=20):    # 原子领取并加租约
+        ...                                         # 处理期间定期 queue.heartbeat() 续约
+        queue.advance(job, DOWNLOADED)              # 成功：推进状态并释放租约 (keep_lease=True 则继续持有)
+        queue.fail(job, "HTTP 503")                 # 失败：按指数退避稍后重试，超过次数后标记为 dead
+
+worker 崩溃后租约到期，任务会被其他 worker 重新领取；租约被接管后，旧 worker 的 advance / fail 不再生效。
+
+    python -m src.research_agent.pipeline.jobs              # 各状态的任务数
+    python -m src.research_agent.pipeline.jobs --retry-dead # 重新排队重试次数耗尽的任务
+"""
+import os
+import random
+import socket
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from loguru import logger
+from sqlalchemy import and_, func, or_, select, text, update
+from src.research_agent.storage.engine import require_sqlite_version
+from src.research_agent.storage.models import (
+    PaperJob, engine, ANALYSIS_REPORT, FULL_TEXT, DISCOVERED, TRIAGED, DOWNLOADED, REVIEWED, REJECTED, DUPLICATE, PREFILTERED,
+)
+from src.research_agent.telemetry.spans import get_telemetry
+from src.research_agent.agents.filter.triage_agent import PREFILTERED_PREFIX
+
+JOBS = PaperJob.__table__
+
+
+@dataclass
+class ClaimedJob:
+    paper_id: str
+    state: str
+    attempts: int
+    lease_token: str
+
+
+def enqueue_new_papers() -> int:
+    """
+    为还没有任务的论文建任务，初始状态由现有字段推断 (兼容旧库与不经过队列写入的论文)。
+    可重复执行，返回新建的任务数。
+    """
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        result = conn.execute(text("""
+            INSERT OR IGNORE INTO paper_jobs (paper_id, state, attempts, available_at, dead, updated_at)
+            SELECT p.id,
+                   CASE
+                       WHEN p.canonical_id IS NOT NULL THEN :duplicate
+                       WHEN EXISTS (SELECT 1 FROM paperblob b WHERE b.paper_id = p.id AND b.kind = :report) THEN :reviewed
+                       WHEN p.is_relevant IS NULL AND p.relevance_reason LIKE :prefiltered_reason THEN :prefiltered
+                       WHEN p.is_relevant IS NULL THEN :discovered
+                       WHEN p.is_relevant = 0 THEN :rejected
+                       WHEN p.download_status = 'downloaded'
+                            OR EXISTS (SELECT 1 FROM paperblob b WHERE b.paper_id = p.id AND b.kind = :full_text)
+                           THEN :downloaded
+                       ELSE :triaged
+                   END,
+                   0, :now, 0, :now
+            FROM paper p
+            WHERE NOT EXISTS (SELECT 1 FROM paper_jobs j WHERE j.paper_id = p.id)
+        """), {
+            "report": ANALYSIS_REPORT, "full_text": FULL_TEXT, "reviewed": REVIEWED, "discovered": DISCOVERED,
+            "rejected": REJECTED, "duplicate": DUPLICATE,
+            "prefiltered": PREFILTERED, "prefiltered_reason": f"{PREFILTERED_PREFIX}%", "downloaded": DOWNLOADED, "triaged": TRIAGED,
+            "now": now.strftime("%Y-%m-%d %H:%M:%S.%f"),  # 与 SQLAlchemy 的 DateTime 存储格式一致，保证字符串比较有序
+        })
+    if result.rowcount:
+        logger.info(f"📥 新建 {result.rowcount} 个论文任务")
+    return result.rowcount
+
+
+class JobQueue:
+    def __init__(self, worker_id: str | None = None, lease_seconds: float = 600.0, max_attempts: int = 5,
+                 backoff_base: float = 60.0, backoff_max: float = 6 * 3600.0):
+        """
+        worker_id: 租约持有者标识，默认 "<主机名>:<pid>:<随机串>"
+        lease_seconds: 租约时长，worker 需在到期前 heartbeat() 续约，否则任务会被其他 worker 接管
+        max_attempts: 同一步骤连续失败多少次后标记为 dead
+        backoff_base / backoff_max: 第 n 次失败后等待 backoff_base * 2^(n-1) 秒 (±20% 抖动，不超过 backoff_max)
+        """
+        require_sqlite_version()  # claim() 依赖 UPDATE ... RETURNING
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def _lease_until(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=self.lease_seconds)
+
+    def _owned(self, job: ClaimedJob):
+        return and_(JOBS.c.paper_id == job.paper_id, JOBS.c.lease_owner == self.worker_id,
+                    JOBS.c.lease_token == job.lease_token)
+
+    @staticmethod
+    def _claimable(states: list[str], now: datetime):
+        return and_(
+            JOBS.c.state.in_(states),
+            JOBS.c.dead == False,
+            JOBS.c.available_at <= now,
+            or_(JOBS.c.lease_expires_at == None, JOBS.c.lease_expires_at < now),
+        )
+
+    def ready(self, states: list[str]) -> bool:
+        """是否有处于 states 且当前可领取的任务 (不加租约)"""
+        with engine.connect() as conn:
+            return conn.execute(select(JOBS.c.paper_id).where(self._claimable(states, datetime.utcnow())).limit(1)).first() is not None
+
+    def claim(self, states: list[str], limit: int) -> list[ClaimedJob]:
+        """
+        领取最多 limit 个处于 states 且可领取 (未 dead、退避已结束、无有效租约) 的任务。
+        单条 UPDATE ... RETURNING 完成筛选与加租约，多个进程同时领取也不会拿到同一个任务。
+        """
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        candidates = select(JOBS.c.paper_id).where(self._claimable(states, now)).order_by(JOBS.c.available_at).limit(limit)
+        statement = update(JOBS).where(JOBS.c.paper_id.in_(candidates)).values(
+            lease_owner=self.worker_id, lease_token=token, lease_expires_at=self._lease_until(now), updated_at=now,
+        ).returning(JOBS.c.paper_id, JOBS.c.state, JOBS.c.attempts)
+        with engine.begin() as conn:
+            rows = conn.execute(statement).all()
+        if rows:
+            get_telemetry().record("queue.claim", items=len(rows))
+        return [ClaimedJob(paper_id, state, attempts, token) for paper_id, state, attempts in rows]
+
+    def heartbeat(self) -> int:
+        """为本 worker 持有的所有租约续期，返回续期的任务数"""
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            result = conn.execute(update(JOBS).where(JOBS.c.lease_owner == self.worker_id).values(
+                lease_expires_at=self._lease_until(now), updated_at=now))
+        return result.rowcount
+
+    def advance(self, job: ClaimedJob, state: str, keep_lease: bool = False) -> bool:
+        """
+        推进到 state。keep_lease=True 时继续持有租约 (同一 worker 接着处理下一步)，否则释放。
+        返回 False 表示租约已被他人接管，本次结果作废。
+        """
+        now = datetime.utcnow()
+        values = dict(state=state, attempts=0, last_error=None, updated_at=now)
+        if keep_lease:
+            values.update(lease_expires_at=self._lease_until(now))
+        else:
+            values.update(available_at=now, lease_owner=None, lease_token=None, lease_expires_at=None)
+        with engine.begin() as conn:
+            result = conn.execute(update(JOBS).where(self._owned(job)).values(**values))
+        if not result.rowcount:
+            logger.warning(f"⚠️ 任务 {job.paper_id} 的租约已失效，放弃提交 ({job.state} -> {state})")
+            return False
+        job.state = state
+        job.attempts = 0
+        return True
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    def fail(self, job: ClaimedJob, error: str) -> bool:
+        """记录失败并释放租约：未超过 max_attempts 时退避后重试，否则标记为 dead"""
+        now = datetime.utcnow()
+        attempts = job.attempts + 1
+        dead = attempts >= self.max_attempts
+        with engine.begin() as conn:
+            result = conn.execute(update(JOBS).where(self._owned(job)).values(
+                attempts=attempts, dead=dead, last_error=error[:500],
+                available_at=now + timedelta(seconds=0 if dead else self.backoff(attempts)),
+                lease_owner=None, lease_token=None, lease_expires_at=None, updated_at=now))
+        if not result.rowcount:
+            return False
+        job.attempts = attempts
+        get_telemetry().record("queue.dead" if dead else "queue.retry", items=1)
+        if dead:
+            logger.error(f"💀 任务 {job.paper_id} 在 {job.state} 之后连续失败 {attempts} 次，不再重试: {error}")
+        return True
+
+    def release(self, job: ClaimedJob) -> bool:
+        """释放单个任务的租约 (不计失败次数)，任务可被立即重新领取"""
+        with engine.begin() as conn:
+            result = conn.execute(update(JOBS).where(self._owned(job)).values(
+                available_at=datetime.utcnow(), lease_owner=None, lease_token=None, lease_expires_at=None,
+                updated_at=datetime.utcnow()))
+        return bool(result.rowcount)
+
+    def release_all(self) -> int:
+        """释放本 worker 持有的全部租约 (不计失败次数)，退出前调用，任务可被立即重新领取"""
+        with engine.begin() as conn:
+            result = conn.execute(update(JOBS).where(JOBS.c.lease_owner == self.worker_id).values(
+                lease_owner=None, lease_token=None, lease_expires_at=None, updated_at=datetime.utcnow()))
+        if result.rowcount:
+            logger.info(f"🔓 已释放 {result.rowcount} 个未完成任务的租约")
+        return result.rowcount
+
+
+def queue_stats() -> dict[str, dict[str, int]]:
+    """{状态: {"ready": 可领取, "leased": 处理中, "waiting": 退避中, "dead": 已放弃}}"""
+    now = datetime.utcnow()
+    leased = and_(JOBS.c.lease_expires_at != None, JOBS.c.lease_expires_at >= now)
+    statement = select(
+        JOBS.c.state,
+        func.count().filter(JOBS.c.dead == True),
+        func.count().filter(JOBS.c.dead == False, leased),
+        func.count().filter(JOBS.c.dead == False, ~leased, JOBS.c.available_at > now),
+        func.count(),
+    ).group_by(JOBS.c.state)
+    with engine.connect() as conn:
+        rows = conn.execute(statement).all()
+    return {
+        state: {"ready": total - dead - leased_ - waiting, "leased": leased_, "waiting": waiting, "dead": dead}
+        for state, dead, leased_, waiting, total in rows
+    }
+
+
+def retry_dead(state: str | None = None) -> int:
+    """把 dead 的任务重新排队 (失败次数清零)"""
+    statement = update(JOBS).where(JOBS.c.dead == True)
+    if state:
+        statement = statement.where(JOBS.c.state == state)
+    with engine.begin() as conn:
+        result = conn.execute(statement.values(dead=False, attempts=0, available_at=datetime.utcnow()))
+    return result.rowcount
+
+
+def requeue(state: str, to_state: str = DISCOVERED) -> int:
+    """把处于 state 的任务改回 to_state 重新处理 (如预筛选阈值或研究兴趣调整后重新筛选)"""
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        result = conn.execute(update(JOBS).where(JOBS.c.state == state, JOBS.c.lease_owner == None).values(
+            state=to_state, attempts=0, dead=False, last_error=None, available_at=now, updated_at=now))
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.research_agent.storage.models import JOB_STATES, create_db_and_tables
+
+    cli = argparse.ArgumentParser(description="查看或维护论文任务队列")
+    cli.add_argument("--retry-dead", nargs="?", const="", metavar="STATE", help="重新排队 dead 的任务 (可只限某个状态)")
+    cli.add_argument("--requeue-prefiltered", action="store_true", help="把被本地预筛选除掉的论文交给 worker 重新筛选")
+    args = cli.parse_args()
+
+    create_db_and_tables()
+    if args.retry_dead is not None:
+        logger.success(f"♻️ 已重新排队 {retry_dead(args.retry_dead or None)} 个任务")
+    if args.requeue_prefiltered:
+        logger.success(f"♻️ 已将 {requeue(PREFILTERED)} 篇预筛除的论文重新排队等待筛选")
+    stats = queue_stats()
+    print(f"{'state':<12}{'ready':>8}{'leased':>8}{'waiting':>9}{'dead':>6}")
+    for state in (*JOB_STATES, REJECTED, PREFILTERED, DUPLICATE):
+        row = stats.get(state, {})
+        print(f"{state:<12}{row.get('ready', 0):>8}{row.get('leased', 0):>8}{row.get('waiting', 0):>9}{row.get('dead', 0):>6}")
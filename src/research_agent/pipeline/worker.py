@@ -0,0 +1,171 @@
+# src/research_agent/pipeline/worker.py
+"""
+任务队列的 worker 进程：领取 paper_jobs 中的任务并推进状态
+(discovered -> triaged -> downloaded -> parsed -> reviewed)。
+同一台机器上的多个进程可以同时运行，租约保证同一篇论文不会被重复处理，
+进程崩溃后其任务在租约到期后由其他 worker 接手。
+数据库为 WAL 模式的 SQLite (依赖本机共享内存，不支持网络文件系统)，因此队列只支持单机多进程，不能跨主机共享。
+
+    python -m src.research_agent.pipeline.worker                      # 常驻，队列为空时每 30 秒检查一次
+    python -m src.research_agent.pipeline.worker --once               # 处理完当前可领取的任务后退出
+    python -m src.research_agent.pipeline.worker --parse-workers 1    # 同机多开时限制每个进程的解析进程数
+
+SIGINT / SIGTERM：不再领取新任务，处理完已领取的任务后退出；再次收到信号时立即退出并归还租约。
+"""
+import asyncio
+import signal
+from loguru import logger
+from sqlmodel import Session, select
+from src.research_agent.agents.analysis.batch_parser import BatchPDFParser
+from src.research_agent.agents.filter.dedupe import inherit_from_canonical
+from src.research_agent.agents.filter.triage_agent import RelevanceFilter
+from src.research_agent.llm.gateway import get_gateway
+from src.research_agent.pipeline.analysis import AnalysisPipeline
+from src.research_agent.pipeline.jobs import ClaimedJob, JobQueue
+from src.research_agent.storage.models import (
+    Paper, DISCOVERED, TRIAGED, DOWNLOADED, PARSED, REJECTED, PREFILTERED, engine, create_db_and_tables,
+)
+from src.research_agent.telemetry.spans import get_telemetry
+
+
+class Worker:
+    def __init__(self, pipeline: AnalysisPipeline | None = None, triage: RelevanceFilter | None = None,
+                 poll_interval: float = 30.0, triage_batch: int = 50):
+        """
+        poll_interval: 队列中没有可领取的任务时，两次检查之间的秒数
+        triage_batch: 每次领取的待筛选 (discovered) 任务数
+        """
+        self.pipeline = pipeline or AnalysisPipeline()
+        self.jobs = self.pipeline.jobs
+        self.triage = triage or RelevanceFilter(research_interests="")
+        self.poll_interval = poll_interval
+        self.triage_batch = triage_batch
+        self._stop: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def _load_papers(ids: list[str]) -> list[Paper]:
+        with Session(engine) as session:
+            return list(session.exec(select(Paper).where(Paper.id.in_(ids))).all())
+
+    @staticmethod
+    def _save_verdicts(papers: list[Paper]):
+        with Session(engine) as session:
+            for paper in papers:
+                row = session.get(Paper, paper.id)
+                row.is_relevant = paper.is_relevant
+                row.relevance_reason = paper.relevance_reason
+                session.add(row)
+            session.commit()
+
+    def _finish_triage(self, leases: dict[str, ClaimedJob], papers: list[Paper], verdicts: dict) -> int:
+        judged = []
+        for paper in papers:
+            verdict = verdicts[paper.id]
+            if verdict.get("error"):
+                self.jobs.fail(leases.pop(paper.id), "triage: LLM error")
+                continue
+            paper.is_relevant = verdict["is_relevant"]
+            paper.relevance_reason = verdict["reason"]
+            judged.append(paper)
+        self._save_verdicts(judged)
+        inherit_from_canonical([paper.id for paper in judged])  # 链接到这些论文时尚无筛选结果的重复版本
+        for paper in judged:
+            if paper.is_relevant is None:
+                state = PREFILTERED  # 预筛选的暂定结果，不作为最终判定
+            else:
+                state = TRIAGED if paper.is_relevant else REJECTED
+            self.jobs.advance(leases.pop(paper.id), state)
+        for lease in leases.values():
+            self.jobs.fail(lease, "triage: paper row not found")
+        return len(judged)
+
+    async def triage_discovered(self) -> int:
+        """筛选一批尚未判定相关性的论文 (例如未经筛选直接写入的论文)，返回完成判定的篇数"""
+        leases = {lease.paper_id: lease
+                  for lease in await asyncio.to_thread(self.jobs.claim, [DISCOVERED], self.triage_batch)}
+        if not leases:
+            return 0
+        papers = await asyncio.to_thread(self._load_papers, list(leases))
+        logger.info(f"🧠 领取 {len(papers)} 篇待筛选论文")
+        try:
+            verdicts = await self.triage.check_relevance_batch_async(papers)
+        except Exception as e:
+            logger.error(f"筛选失败: {e}")
+            for lease in leases.values():
+                await asyncio.to_thread(self.jobs.fail, lease, f"triage: {type(e).__name__}: {e}")
+            return 0
+        return await asyncio.to_thread(self._finish_triage, leases, papers, verdicts)
+
+    async def run_once(self) -> int:
+        """筛选 + 分析当前可领取的任务，返回处理的任务数"""
+        if not await asyncio.to_thread(self.jobs.ready, [DISCOVERED, TRIAGED, DOWNLOADED, PARSED]):
+            return 0  # 空轮询不记录运行
+        # 与 main_demo / 调度周期一样写入 pipeline_runs / stage_metrics (Dashboard 的 Pipeline health 页)
+        with get_telemetry().run("worker"):
+            done = await self.triage_discovered()
+            stats = await self.pipeline.run(close=False)
+        return done + stats["download"].processed + stats["download"].failed
+
+    def stop(self):
+        if self._stop.is_set():
+            logger.warning("🛑 再次收到退出信号，立即退出")
+            if self._task is not None:
+                self._task.cancel()
+            return
+        logger.info("🛑 收到退出信号，处理完已领取的任务后退出")
+        self._stop.set()
+        self.pipeline.drain()
+
+    async def serve(self, once: bool = False):
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+        await asyncio.to_thread(create_db_and_tables)
+        logger.info(f"👷 Worker {self.jobs.worker_id} 已启动")
+        heartbeat = asyncio.create_task(self.pipeline.keep_alive())  # 筛选期间同样需要续约
+        try:
+            while not self._stop.is_set():
+                self._task = asyncio.create_task(self.run_once())
+                try:
+                    processed = await self._task
+                except asyncio.CancelledError:
+                    break
+                if once and not processed:
+                    break
+                if not processed:
+                    try:
+                        await asyncio.wait_for(self._stop.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            heartbeat.cancel()
+            await asyncio.to_thread(self.jobs.release_all)
+            await self.pipeline.aclose()
+            await get_gateway().aclose()
+            logger.info(f"👋 Worker {self.jobs.worker_id} 已退出")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    cli = argparse.ArgumentParser(description="领取并处理论文任务队列的 worker")
+    cli.add_argument("--once", action="store_true", help="处理完当前可领取的任务后退出")
+    cli.add_argument("--poll-interval", type=float, default=30.0)
+    cli.add_argument("--download-workers", type=int, default=4)
+    cli.add_argument("--parse-workers", type=int, default=None, help="解析进程数，默认等于 CPU 核数")
+    cli.add_argument("--review-workers", type=int, default=4)
+    cli.add_argument("--lease-seconds", type=float, default=600.0)
+    cli.add_argument("--max-attempts", type=int, default=5)
+    args = cli.parse_args()
+
+    pipeline = AnalysisPipeline(
+        parser=BatchPDFParser(workers=args.parse_workers),
+        download_workers=args.download_workers, review_workers=args.review_workers,
+        jobs=JobQueue(lease_seconds=args.lease_seconds, max_attempts=args.max_attempts),
+    )
+    asyncio.run(Worker(pipeline, poll_interval=args.poll_interval).serve(once=args.once))
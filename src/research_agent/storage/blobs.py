@@ -0,0 +1,143 @@
+# src/research_agent/storage/blobs.py
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+from loguru import logger
+from src.research_agent.storage.engine import require_sqlite_version
+from src.research_agent.storage.models import PaperBlob, FULL_TEXT, ANALYSIS_REPORT, engine
+
+# 旧版本 Paper 表中直接存放大字段的列 -> PaperBlob.kind
+INLINE_BLOB_COLUMNS = {"full_text_content": FULL_TEXT, "analysis_report": ANALYSIS_REPORT}
+
+
+def load_blob(paper_id: str, kind: str) -> str | None:
+    """按需读取单篇论文的大字段 (不加载 Paper 行)"""
+    with Session(engine) as session:
+        blob = session.get(PaperBlob, (paper_id, kind))
+        return blob.text() if blob else None
+
+
+def save_blob(paper_id: str, kind: str, content: str | None):
+    """写入或删除单篇论文的大字段"""
+    with Session(engine) as session:
+        blob = session.get(PaperBlob, (paper_id, kind))
+        if blob:
+            session.delete(blob)
+            session.flush()
+        if content:
+            session.add(PaperBlob.from_text(paper_id, kind, content))
+        session.commit()
+
+
+def blob_rows(papers: list) -> list[dict]:
+    """收集尚未入库的 Paper 对象上挂着的大字段，供批量写入使用"""
+    return [
+        {"paper_id": blob.paper_id, "kind": blob.kind, "codec": blob.codec, "raw_size": blob.raw_size, "data": blob.data}
+        for paper in papers for blob in paper.blobs
+    ]
+
+
+def upsert_blob_rows(conn, rows: list[dict]):
+    if not rows:
+        return
+    stmt = insert(PaperBlob.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["paper_id", "kind"],
+        set_={name: stmt.excluded[name] for name in ("codec", "raw_size", "data")},
+    )
+    conn.execute(stmt, rows)
+
+
+def _legacy_columns(engine: Engine) -> list[str]:
+    with engine.connect() as conn:
+        columns = {column["name"] for column in inspect(conn).get_columns("paper")}
+    return [name for name in INLINE_BLOB_COLUMNS if name in columns]
+
+
+def _unmigrated(column: str) -> str:
+    # 旧列中有内容、但 paperblob 中还没有对应大字段的论文
+    return (f'"{column}" IS NOT NULL AND "{column}" != \'\' AND id NOT IN '
+            f'(SELECT paper_id FROM paperblob WHERE kind = :kind)')
+
+
+def migrate_inline_blobs(engine: Engine, batch_size: int = 200):
+    """
+    将旧数据库 paper 表中的 full_text_content / analysis_report 压缩后复制到 paperblob。
+    只复制 paperblob 中还没有的大字段 (不覆盖新写入的内容)，旧列保留不动；
+    确认迁移无误后可执行 --drop-inline-columns 删除旧列。没有旧列时什么也不做。
+    """
+    legacy = _legacy_columns(engine)
+    if not legacy:
+        return
+
+    moved = 0
+    with engine.begin() as conn:
+        for column in legacy:
+            kind = INLINE_BLOB_COLUMNS[column]
+            result = conn.execute(text(f'SELECT id, "{column}" FROM paper WHERE {_unmigrated(column)}'), {"kind": kind})
+            while rows := result.fetchmany(batch_size):
+                conn.execute(insert(PaperBlob.__table__).on_conflict_do_nothing(), [
+                    {"paper_id": blob.paper_id, "kind": kind, "codec": blob.codec, "raw_size": blob.raw_size, "data": blob.data}
+                    for blob in (PaperBlob.from_text(paper_id, kind, value) for paper_id, value in rows)
+                ])
+                moved += len(rows)
+    if moved:
+        logger.info(f"🛠️ 数据库迁移: {moved} 个大字段已压缩复制到 paperblob，旧列 {legacy} 保留 "
+                    f"(确认无误后可执行 python -m src.research_agent.storage.blobs --drop-inline-columns)")
+
+
+def drop_inline_columns(engine: Engine = engine) -> list[str]:
+    """
+    删除旧的 full_text_content / analysis_report 列 (需要 SQLite 3.35+ 的 ALTER TABLE DROP COLUMN)。
+    先逐列核对每个非空旧值在 paperblob 中都有对应的大字段，有缺失时不做任何改动并报错。
+    返回删除的列名。
+    """
+    legacy = _legacy_columns(engine)
+    if not legacy:
+        return []
+    require_sqlite_version()
+    migrate_inline_blobs(engine)
+    with engine.begin() as conn:
+        for column in legacy:
+            kind = INLINE_BLOB_COLUMNS[column]
+            missing = conn.execute(text(f"SELECT count(*) FROM paper WHERE {_unmigrated(column)}"), {"kind": kind}).scalar()
+            if missing:
+                raise RuntimeError(f"{missing} 篇论文的 {column} 尚未迁移到 paperblob，未删除旧列")
+        for column in legacy:
+            conn.execute(text(f'ALTER TABLE paper DROP COLUMN "{column}"'))
+    logger.info(f"🛠️ 已删除旧列 {legacy} (可执行 VACUUM 回收空间)")
+    return legacy
+
+
+def prune_rejected_full_text(engine: Engine = engine) -> tuple[int, int]:
+    """删除筛选判定为不相关的论文的全文 XML (旧版本入库时一并抓取的)，返回 (删除数, 压缩前字节数)"""
+    condition = "kind = :kind AND paper_id IN (SELECT id FROM paper WHERE is_relevant = 0)"
+    legacy = _legacy_columns(engine)
+    with engine.begin() as conn:
+        count, raw_size = conn.execute(text(f"SELECT count(*), coalesce(sum(raw_size), 0) FROM paperblob WHERE {condition}"),
+                                       {"kind": FULL_TEXT}).one()
+        conn.execute(text(f"DELETE FROM paperblob WHERE {condition}"), {"kind": FULL_TEXT})
+        if "full_text_content" in legacy:
+            # 旧列仍在时一并清空，避免下次启动时被 migrate_inline_blobs 复制回来
+            conn.execute(text("UPDATE paper SET full_text_content = NULL WHERE is_relevant = 0"))
+    if count:
+        logger.info(f"🧹 已删除 {count} 篇不相关论文的全文 ({raw_size / 2 ** 20:.1f} MB 未压缩，可执行 VACUUM 回收空间)")
+    return count, raw_size
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.research_agent.storage.models import create_db_and_tables
+
+    cli = argparse.ArgumentParser(description="维护论文大字段 (paperblob)")
+    cli.add_argument("--prune-rejected", action="store_true", help="删除不相关论文的全文 XML")
+    cli.add_argument("--drop-inline-columns", action="store_true",
+                     help="核对旧版本的大字段已全部迁移到 paperblob 后删除 paper 表中的旧列")
+    args = cli.parse_args()
+
+    create_db_and_tables()
+    if args.prune_rejected:
+        prune_rejected_full_text()
+    if args.drop_inline_columns:
+        drop_inline_columns()
@@ -0,0 +1,81 @@
+# src/research_agent/storage/engine.py
+import sqlite3
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlmodel import SQLModel, create_engine
+from loguru import logger
+
+# 连接级 PRAGMA：WAL 允许 Dashboard 读的同时流水线写入
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",    # WAL 模式下 NORMAL 足够安全，且每次提交不再强制 fsync
+    "cache_size": -64000,       # 负数单位为 KiB，约 64 MB 页缓存
+    "mmap_size": 268435456,     # 256 MB 内存映射读
+    "temp_store": "MEMORY",
+    "busy_timeout": 30000,      # 写锁被占用时最多等待 30 秒，而不是立即报 database is locked
+}
+
+# 任务队列的 UPDATE ... RETURNING (pipeline/jobs.py) 需要 SQLite 3.35+
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+
+def require_sqlite_version(minimum: tuple = MIN_SQLITE_VERSION):
+    """Python 链接的 SQLite 版本过旧时立即给出明确的错误，而不是在运行中途报 SQL 语法错误"""
+    if sqlite3.sqlite_version_info < minimum:
+        required = ".".join(str(part) for part in minimum)
+        raise RuntimeError(
+            f"需要 SQLite {required} 或更高版本，当前 Python 链接的是 {sqlite3.sqlite_version}；"
+            f"请升级 Python / libsqlite3 (或安装 pysqlite3-binary 并替换 sqlite3 模块)"
+        )
+
+
+def create_sqlite_engine(url: str, pragmas: dict | None = None, **kwargs) -> Engine:
+    """创建带调优 PRAGMA 的 SQLite engine，每个新连接建立时都会应用"""
+    pragmas = {**SQLITE_PRAGMAS, **(pragmas or {})}
+    connect_args = {"check_same_thread": False, "timeout": pragmas["busy_timeout"] / 1000}
+    connect_args.update(kwargs.pop("connect_args", {}))
+    engine = create_engine(url, connect_args=connect_args, **kwargs)
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return engine
+
+
+def _add_missing_columns(conn, table):
+    """为旧数据库补齐模型中新增的列 (SQLite 只支持 ADD COLUMN，新增列需可为空或带 server_default)"""
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        column_type = column.type.compile(dialect=conn.dialect)
+        ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+        default = column.server_default.arg if column.server_default is not None else None
+        if default is not None:
+            ddl += f" DEFAULT {default}"
+        conn.execute(text(ddl))
+        logger.info(f"🛠️ 数据库迁移: {table.name} 新增列 {column.name}")
+
+
+def migrate(engine: Engine, metadata=SQLModel.metadata):
+    """
+    轻量级原地迁移：创建缺失的表、补齐新增列、创建缺失的索引。
+    可重复执行，已是最新结构时不做任何改动。
+    """
+    require_sqlite_version()
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        tables = set(inspect(conn).get_table_names())
+        for table in metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            _add_missing_columns(conn, table)
+            existing_indexes = {index["name"] for index in inspect(conn).get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
+                    logger.info(f"🛠️ 数据库迁移: 创建索引 {index.name}")
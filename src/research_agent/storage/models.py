@@ -1,9 +1,91 @@
 # src/research_agent/storage/models.py
 from typing import Optional, List
 from datetime import datetime
-from sqlmodel import Field, SQLModel, JSON, create_engine
+import zlib
+from sqlalchemy import Index, LargeBinary, event, text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Field, SQLModel, JSON, Relationship
+from src.research_agent.storage.engine import create_sqlite_engine, migrate
+
+# PaperBlob.kind 的取值
+FULL_TEXT = "full_text"
+ANALYSIS_REPORT = "analysis_report"
+
+PARSED_TEXT = "parsed_markdown"  # PDF 解析出的 Markdown，评审完成后删除
+
+# PaperJob.state 的取值，按流水线顺序推进；REJECTED 为筛选判定不相关的终态
+DISCOVERED = "discovered"
+TRIAGED = "triaged"
+DOWNLOADED = "downloaded"
+PARSED = "parsed"
+REVIEWED = "reviewed"
+REJECTED = "rejected"
+PREFILTERED = "prefiltered"  # 被本地预筛选除掉 (未经 LLM 判定，is_relevant 为空)，可用 jobs --requeue-prefiltered 重新筛选
+DUPLICATE = "duplicate"  # 与已有论文为同一工作 (Paper.canonical_id)，继承其筛选结果、共用其报告，不再单独处理
+JOB_STATES = (DISCOVERED, TRIAGED, DOWNLOADED, PARSED, REVIEWED)
+
+# 全文检索 FTS5 虚拟表 (见 storage/search.py)
+FTS_TABLE = "paper_fts"
+
+
+def compress_text(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def decompress_text(data: bytes, codec: str = "zlib") -> str:
+    if codec == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown blob codec: {codec}")
+
+
+class PaperBlob(SQLModel, table=True):
+    """论文的大字段 (Elsevier 全文 XML、分析报告)，压缩后存放在独立的表中，按需加载"""
+    paper_id: str = Field(foreign_key="paper.id", primary_key=True)
+    kind: str = Field(primary_key=True)  # FULL_TEXT / ANALYSIS_REPORT / PARSED_TEXT
+    codec: str = "zlib"
+    raw_size: int = 0  # 压缩前的字节数
+    data: bytes = Field(sa_type=LargeBinary)
+
+    @classmethod
+    def from_text(cls, paper_id: str, kind: str, text: str) -> "PaperBlob":
+        return cls(paper_id=paper_id, kind=kind, raw_size=len(text.encode("utf-8")), data=compress_text(text))
+
+    def text(self) -> str:
+        return decompress_text(self.data, self.codec)
+
+def _sync_report_fts(connection, paper_id: str, report: str):
+    try:
+        connection.execute(
+            text(f"UPDATE {FTS_TABLE} SET analysis_report = :report WHERE rowid = (SELECT rowid FROM paper WHERE id = :paper_id)"),
+            {"report": report, "paper_id": paper_id},
+        )
+    except OperationalError:
+        pass  # 全文索引尚未创建 (未执行 create_db_and_tables)
+
+
+@event.listens_for(PaperBlob, "after_insert")
+@event.listens_for(PaperBlob, "after_update")
+def _on_blob_write(mapper, connection, target):
+    # 分析报告写入时同步全文索引
+    if target.kind == ANALYSIS_REPORT:
+        _sync_report_fts(connection, target.paper_id, target.text())
+
+
+@event.listens_for(PaperBlob, "after_delete")
+def _on_blob_delete(mapper, connection, target):
+    if target.kind == ANALYSIS_REPORT:
+        _sync_report_fts(connection, target.paper_id, "")
 
 class Paper(SQLModel, table=True):
+    # 覆盖 Dashboard 与流水线的常用过滤条件
+    __table_args__ = (
+        Index("ix_paper_relevant_published", "is_relevant", "published_date"),
+        Index("ix_paper_source_published", "source", "published_date"),
+        Index("ix_paper_relevant_download", "is_relevant", "download_status"),
+        Index("ix_paper_published", "published_date"),
+        Index("ix_paper_canonical", "canonical_id"),
+    )
+
     # 使用 arXiv ID 作为主键，天然去重
     id: str = Field(primary_key=True)
     
@@ -16,7 +98,6 @@ class Paper(SQLModel, table=True):
     source: str = "arxiv"
     is_oa: Optional[bool] = None  # 是否开放获取
     doi: Optional[str] = None      # DOI 号，如果有的话
-    full_text_content: Optional[str] = None  # elsevier可能存储全文文本
     
     # 系统状态 (Data Ingestion 核心字段)
     discovered_at: datetime = Field(default_factory=datetime.utcnow)
@@ -27,12 +108,142 @@ class Paper(SQLModel, table=True):
     
     # 后续阶段的状态预留
     download_status: str = "pending"
-    analysis_report: Optional[str] = None  # LLM 生成的分析报告
+
+    # 跨来源去重：同一工作的其他版本 (如 arXiv 预印本 / Elsevier 正式版) 指向最先入库的那篇
+    canonical_id: Optional[str] = None
+
+    # 大字段放在 PaperBlob 中，只有访问 full_text_content / analysis_report 时才会查询
+    blobs: List["PaperBlob"] = Relationship(
+        sa_relationship_kwargs={"lazy": "select", "cascade": "all, delete-orphan"}
+    )
+
+    def _get_blob(self, kind: str) -> Optional[str]:
+        for blob in self.blobs:
+            if blob.kind == kind:
+                return blob.text()
+        return None
+
+    def _set_blob(self, kind: str, text: Optional[str]):
+        blobs = [blob for blob in self.blobs if blob.kind != kind]
+        if text:
+            blobs.append(PaperBlob.from_text(self.id, kind, text))
+        self.blobs = blobs
+
+    @property
+    def full_text_content(self) -> Optional[str]:
+        """elsevier可能存储全文文本"""
+        return self._get_blob(FULL_TEXT)
+
+    @full_text_content.setter
+    def full_text_content(self, value: Optional[str]):
+        self._set_blob(FULL_TEXT, value)
+
+    @property
+    def analysis_report(self) -> Optional[str]:
+        """LLM 生成的分析报告"""
+        return self._get_blob(ANALYSIS_REPORT)
+
+    @analysis_report.setter
+    def analysis_report(self, value: Optional[str]):
+        self._set_blob(ANALYSIS_REPORT, value)
+
+class HarvestWatermark(SQLModel, table=True):
+    """每个 (来源, 查询) 的增量抓取高水位线：上次抓到的最新提交时间与条目 ID"""
+    source: str = Field(primary_key=True)
+    query: str = Field(primary_key=True)
+    last_published: datetime
+    last_entry_id: str
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class TriageCache(SQLModel, table=True):
+    """相关性筛选结果缓存，key 为 (研究兴趣, 标题, 摘要, 模型, Prompt 版本) 的哈希"""
+    key: str = Field(primary_key=True)
+    is_relevant: bool
+    reason: str
+    model: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class PipelineRun(SQLModel, table=True):
+    """一次流水线运行 (main_demo / 调度周期)，由 telemetry.Telemetry.run() 写入"""
+    __tablename__ = "pipeline_runs"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str = Field(index=True)
+    status: str = "running"  # running / ok / failed
+    started_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    finished_at: Optional[datetime] = None
+    duration: Optional[float] = None  # 秒
+    error: Optional[str] = None
+
+class StageMetric(SQLModel, table=True):
+    """一次运行中某个阶段 (如 elsevier.request、llm.triage、parse.pdf) 的聚合指标"""
+    __tablename__ = "stage_metrics"
+    run_id: int = Field(foreign_key="pipeline_runs.id", primary_key=True)
+    stage: str = Field(primary_key=True)
+    calls: int = 0
+    errors: int = 0
+    items: int = 0
+    bytes: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    seconds: float = 0.0       # 所有调用的累计耗时
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    max_seconds: Optional[float] = None
+
+class PaperJob(SQLModel, table=True):
+    """
+    每篇论文在流水线中的进度 (discovered -> triaged -> downloaded -> parsed -> reviewed) 与租约。
+    同一台机器上的多个 worker 进程共享数据库 (WAL 模式的 SQLite 不支持跨主机)，通过 pipeline/jobs.py 原子地领取、续约、推进。
+    """
+    __tablename__ = "paper_jobs"
+    __table_args__ = (
+        Index("ix_paper_jobs_claim", "state", "dead", "available_at"),
+        Index("ix_paper_jobs_lease_owner", "lease_owner"),
+    )
+    paper_id: str = Field(foreign_key="paper.id", primary_key=True)
+    state: str = DISCOVERED
+    attempts: int = 0                     # 当前这一步已失败的次数，推进后清零
+    available_at: datetime = Field(default_factory=datetime.utcnow)  # 失败退避：此时间之前不可领取
+    lease_owner: Optional[str] = None     # 持有租约的 worker
+    lease_token: Optional[str] = None     # 每次领取生成，租约被他人接管后旧 worker 的提交会被拒绝
+    lease_expires_at: Optional[datetime] = None
+    dead: bool = False                    # 重试次数耗尽，不再自动领取
+    last_error: Optional[str] = None
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class PaperSignature(SQLModel, table=True):
+    """去重用的论文指纹：规范化 DOI 与标题 + 摘要 shingle 的 MinHash 签名 (见 agents/filter/dedupe.py)"""
+    __tablename__ = "paper_signatures"
+    paper_id: str = Field(foreign_key="paper.id", primary_key=True)
+    doi: Optional[str] = Field(default=None, index=True)  # 规范化后的 DOI
+    minhash: Optional[bytes] = Field(default=None, sa_type=LargeBinary)  # uint32 数组；文本过短时为空
+
+class LshBucket(SQLModel, table=True):
+    """MinHash 的 LSH 分桶：key 为 (band 序号, band 内的签名) 的哈希，只收录 canonical 论文"""
+    __tablename__ = "lsh_buckets"
+    key: int = Field(primary_key=True)
+    paper_id: str = Field(foreign_key="paper.id", primary_key=True)
+
+class DbRevision(SQLModel, table=True):
+    """数据库变更计数器，由触发器在 paper / paperblob 每次写入时自增，用于读端缓存失效"""
+    id: int = Field(default=1, primary_key=True)
+    value: int = 0
 
 # 创建一个本地 SQLite 数据库用于测试
 sqlite_file_name = "database.db"
 sqlite_url = f"sqlite:///{sqlite_file_name}"
-engine = create_engine(sqlite_url)
+engine = create_sqlite_engine(sqlite_url)
 
 def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
\ No newline at end of file
+    # 新库直接建表；旧的 database.db 原地补齐新增的列和索引
+    migrate(engine, SQLModel.metadata)
+    from src.research_agent.storage.blobs import migrate_inline_blobs
+    from src.research_agent.storage.repository import install_revision_triggers
+    from src.research_agent.storage.search import install_fts
+    from src.research_agent.pipeline.jobs import enqueue_new_papers
+    from src.research_agent.agents.filter.dedupe import DuplicateDetector
+    migrate_inline_blobs(engine)
+    install_revision_triggers(engine)
+    install_fts(engine)
+    enqueue_new_papers()  # 为尚无任务的论文 (包括旧库中的论文) 按现有字段补建任务
+    DuplicateDetector().backfill()  # 为尚无去重指纹的论文补建 MinHash/LSH 索引
@@ -0,0 +1,139 @@
+# src/research_agent/storage/repository.py
+import time
+from sqlalchemy import func, or_, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, select
+from loguru import logger
+from src.research_agent.storage.models import Paper, DbRevision, engine
+from src.research_agent.storage.blobs import blob_rows, upsert_blob_rows
+
+# SQLite 单条语句的绑定参数上限 (老版本为 999)，IN 查询按此分片
+SQLITE_MAX_VARIABLES = 900
+
+# Dashboard 上的平台名 -> Paper.source 的前缀 (Elsevier 论文的 source 形如 "elsevier:<期刊名>")
+SOURCE_ALIASES = {"sciencedirect": "elsevier"}
+
+# 列表视图只需要的列
+LISTING_COLUMNS = (Paper.id, Paper.title, Paper.published_date, Paper.source)
+
+# 论文已存在时允许被新抓取结果覆盖的字段；下载状态、分析报告等后续阶段产物不会被覆盖
+UPSERT_COLUMNS = [
+    "title", "abstract", "authors", "url", "published_date", "source",
+    "is_oa", "doi", "is_relevant", "relevance_reason",
+]
+
+
+def existing_paper_ids(ids: list[str]) -> set[str]:
+    """一次 (分片的) IN 查询返回数据库中已存在的论文 ID"""
+    unique_ids = list(dict.fromkeys(ids))
+    found = set()
+    with Session(engine) as session:
+        for i in range(0, len(unique_ids), SQLITE_MAX_VARIABLES):
+            chunk = unique_ids[i:i + SQLITE_MAX_VARIABLES]
+            found.update(session.exec(select(Paper.id).where(Paper.id.in_(chunk))).all())
+    return found
+
+
+def drop_known_papers(papers: list[Paper]) -> list[Paper]:
+    """去掉数据库中已存在的论文以及本批内重复的论文，保持原有顺序"""
+    known = existing_paper_ids([paper.id for paper in papers])
+    fresh = {}
+    skipped = 0
+    for paper in papers:
+        if paper.id in known:
+            skipped += 1
+        else:
+            fresh.setdefault(paper.id, paper)
+    duplicated = len(papers) - skipped - len(fresh)
+    logger.info(f"⏭️  去重: 共 {len(papers)} 篇，已存在 {skipped} 篇，批内重复 {duplicated} 篇，新论文 {len(fresh)} 篇")
+    return list(fresh.values())
+
+
+def _paper_row(paper: Paper) -> dict:
+    return {column.name: getattr(paper, column.name) for column in Paper.__table__.columns}
+
+
+def bulk_upsert_papers(papers: list[Paper], batch_size: int = 500) -> int:
+    """
+    以 INSERT ... ON CONFLICT DO UPDATE 批量写入论文 (及其压缩大字段)，每 batch_size 篇一个事务。
+    返回写入的论文数，并记录吞吐量 (篇/秒)。
+    """
+    if not papers:
+        return 0
+    table = Paper.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={name: stmt.excluded[name] for name in UPSERT_COLUMNS},
+    )
+    start = time.perf_counter()
+    written = 0
+    for i in range(0, len(papers), batch_size):
+        batch = papers[i:i + batch_size]
+        rows = [_paper_row(paper) for paper in batch]
+        with engine.begin() as conn:  # 每批一个事务 (executemany)，只 fsync 一次
+            conn.execute(stmt, rows)
+            upsert_blob_rows(conn, blob_rows(batch))
+        written += len(rows)
+    elapsed = time.perf_counter() - start
+    rate = written / elapsed if elapsed > 0 else float("inf")
+    logger.info(f"💾 批量写入 {written} 篇论文，耗时 {elapsed:.3f}s ({rate:.1f} 篇/秒，批大小 {batch_size})")
+    return written
+
+
+def install_revision_triggers(engine):
+    """为写入 paper / paperblob 的所有路径 (ORM、批量 upsert、手工 SQL) 安装变更计数触发器"""
+    with engine.begin() as conn:
+        conn.execute(text("INSERT OR IGNORE INTO dbrevision (id, value) VALUES (1, 0)"))
+        for table in ("paper", "paperblob"):
+            for op in ("INSERT", "UPDATE", "DELETE"):
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS trg_{table}_{op.lower()}_revision AFTER {op} ON {table} "
+                    f"BEGIN UPDATE dbrevision SET value = value + 1 WHERE id = 1; END"
+                ))
+
+
+def get_db_revision() -> int:
+    """当前数据库变更计数，值不变说明列表结果仍然有效"""
+    with Session(engine) as session:
+        revision = session.get(DbRevision, 1)
+        return revision.value if revision else 0
+
+
+def source_prefixes(sources: list[str]) -> list[str]:
+    """Dashboard 上选择的平台 -> Paper.source 前缀，匹配 source 等于前缀或以 "<前缀>:" 开头的论文"""
+    return [SOURCE_ALIASES.get(source, source) for source in sources]
+
+
+def _listing_filters(statement, only_relevant: bool, sources: list[str] | None):
+    # 同一工作的重复版本只显示最先入库的那篇，与搜索结果一致
+    statement = statement.where(Paper.canonical_id == None)
+    if only_relevant:
+        statement = statement.where(Paper.is_relevant == True)
+    if sources:
+        conditions = []
+        for prefix in source_prefixes(sources):
+            conditions += [Paper.source == prefix, Paper.source.like(f"{prefix}:%")]
+        statement = statement.where(or_(*conditions))
+    return statement
+
+
+def list_papers(page: int = 1, page_size: int = 50, only_relevant: bool = True,
+                sources: list[str] | None = None) -> tuple[list[dict], int]:
+    """
+    分页列出论文，只查询 id / title / published_date / source 四列。
+    返回 (当前页的行, 满足过滤条件的总数)。
+    """
+    page = max(page, 1)
+    with Session(engine) as session:
+        total = session.exec(_listing_filters(select(func.count()).select_from(Paper), only_relevant, sources)).one()
+        statement = _listing_filters(select(*LISTING_COLUMNS), only_relevant, sources)
+        statement = statement.order_by(Paper.published_date.desc(), Paper.id).offset((page - 1) * page_size).limit(page_size)
+        rows = [row._asdict() for row in session.exec(statement).all()]
+    return rows, total
+
+
+def get_paper(paper_id: str) -> Paper | None:
+    """读取单篇论文的元数据 (不包含大字段)"""
+    with Session(engine) as session:
+        return session.get(Paper, paper_id)
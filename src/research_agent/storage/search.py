@@ -0,0 +1,129 @@
+# src/research_agent/storage/search.py
+import argparse
+import re
+import time
+from sqlalchemy import DateTime, inspect, text
+from sqlmodel import Session, select
+from loguru import logger
+from src.research_agent.storage.models import PaperBlob, ANALYSIS_REPORT, FTS_TABLE, engine
+from src.research_agent.storage.repository import source_prefixes
+
+# bm25 列权重 (paper_id, title, abstract, analysis_report)：标题命中最重要
+BM25_WEIGHTS = (0.0, 10.0, 4.0, 1.0)
+
+# title / abstract 由触发器同步；analysis_report 压缩存放在 paperblob，由 models.py 中的 ORM 监听器同步
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        paper_id UNINDEXED, title, abstract, analysis_report,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_paper_fts_insert AFTER INSERT ON paper BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, paper_id, title, abstract, analysis_report)
+        VALUES (new.rowid, new.id, new.title, new.abstract, '');
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_paper_fts_update AFTER UPDATE OF title, abstract ON paper BEGIN
+        UPDATE {FTS_TABLE} SET title = new.title, abstract = new.abstract WHERE rowid = new.rowid;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_paper_fts_delete AFTER DELETE ON paper BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.rowid;
+    END""",
+]
+
+
+def install_fts(engine):
+    """创建 FTS5 表和同步触发器；首次创建时自动回填已有论文"""
+    with engine.connect() as conn:
+        created = FTS_TABLE not in inspect(conn).get_table_names()
+    with engine.begin() as conn:
+        for ddl in FTS_DDL:
+            conn.execute(text(ddl))
+    if created:
+        rebuild_fts()
+
+
+def rebuild_fts(batch_size: int = 200) -> int:
+    """一次性重建全文索引 (旧数据库回填或索引损坏时使用)，返回索引的论文数"""
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        count = conn.execute(text(
+            f"INSERT INTO {FTS_TABLE} (rowid, paper_id, title, abstract, analysis_report) "
+            f"SELECT rowid, id, title, abstract, '' FROM paper"
+        )).rowcount
+    with Session(engine) as session:
+        reports = session.exec(select(PaperBlob).where(PaperBlob.kind == ANALYSIS_REPORT)).partitions(batch_size)
+        for chunk in reports:
+            session.connection().execute(
+                text(f"UPDATE {FTS_TABLE} SET analysis_report = :report "
+                     f"WHERE rowid = (SELECT rowid FROM paper WHERE id = :paper_id)"),
+                [{"report": blob.text(), "paper_id": blob.paper_id} for blob in chunk],
+            )
+        session.commit()
+    with engine.begin() as conn:
+        conn.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"))
+    logger.info(f"🔎 全文索引重建完成: {count} 篇论文，耗时 {time.perf_counter() - start:.2f}s")
+    return count
+
+
+def to_fts_query(query: str) -> str:
+    """把用户输入转换为安全的 FTS5 查询：每个词加引号 (AND 语义)，最后一个词做前缀匹配"""
+    terms = [term.replace('"', "") for term in re.split(r"\s+", query.strip())]
+    terms = [term for term in terms if term]
+    if not terms:
+        return ""
+    return " ".join(f'"{term}"' for term in terms[:-1]) + (" " if len(terms) > 1 else "") + f'"{terms[-1]}"*'
+
+
+def search_papers(query: str, limit: int = 50, only_relevant: bool = False, sources: list[str] | None = None) -> list[dict]:
+    """
+    按 bm25 相关度搜索标题、摘要和分析报告，返回 id / title / published_date / source / snippet。
+    sources: 只返回这些平台的论文，与列表视图的来源过滤规则相同 (见 repository.source_prefixes)。
+    snippet 中命中的词用 Markdown 粗体标出。同一工作的重复版本 (canonical_id 非空) 不出现在结果中。
+    """
+    fts_query = to_fts_query(query)
+    if not fts_query:
+        return []
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    params = {"query": fts_query, "limit": limit}
+    filters = "AND p.canonical_id IS NULL"
+    if only_relevant:
+        filters += " AND p.is_relevant = 1"
+    if sources:
+        conditions = []
+        for i, prefix in enumerate(source_prefixes(sources)):
+            conditions.append(f"p.source = :source_{i} OR p.source LIKE :source_like_{i}")
+            params.update({f"source_{i}": prefix, f"source_like_{i}": f"{prefix}:%"})
+        filters += f" AND ({' OR '.join(conditions)})"
+    sql = f"""
+        SELECT p.id, p.title, p.published_date, p.source,
+               snippet({FTS_TABLE}, -1, '**', '**', ' … ', 16) AS snippet,
+               bm25({FTS_TABLE}, {weights}) AS rank
+        FROM {FTS_TABLE} JOIN paper AS p ON p.rowid = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH :query {filters}
+        ORDER BY rank
+        LIMIT :limit
+    """
+    with Session(engine) as session:
+        # 声明日期列类型，与列表视图一样返回 datetime
+        statement = text(sql).columns(published_date=DateTime)
+        rows = session.connection().execute(statement, params).mappings().all()
+    return [dict(row) for row in rows]
+
+
+if __name__ == "__main__":
+    from src.research_agent.storage.models import create_db_and_tables
+
+    parser = argparse.ArgumentParser(description="Paper 全文索引工具")
+    parser.add_argument("--rebuild", action="store_true", help="重建 (回填) 全文索引")
+    parser.add_argument("--query", help="执行一次搜索并打印结果")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    if args.rebuild:
+        rebuild_fts()
+    if args.query:
+        start = time.perf_counter()
+        results = search_papers(args.query)
+        logger.info(f"🔎 {len(results)} 条结果，耗时 {(time.perf_counter() - start) * 1000:.1f} ms")
+        for row in results:
+            print(f"[{row['rank']:.2f}] {row['id']} {row['title']}\n    {row['snippet']}")
@@ -0,0 +1,142 @@
+# src/research_agent/telemetry/prometheus.py
+"""
+把 pipeline_runs / stage_metrics 导出为 Prometheus 文本格式。
+数据来自数据库，因此流水线进程、调度进程和单独的导出进程看到的是同一份指标：
+
+    python -m src.research_agent.telemetry.prometheus --port 9108          # 提供 /metrics
+    python -m src.research_agent.telemetry.prometheus --write radar.prom   # 写文本文件 (textfile collector)
+    RADAR_METRICS_FILE=/var/lib/node_exporter/radar.prom python -m src.main_demo   # 每次运行结束后自动刷新
+"""
+import os
+import tempfile
+import threading
+from datetime import timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from loguru import logger
+from src.research_agent.telemetry import store
+
+PREFIX = "radar"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# stage_metrics 列 -> (指标名, 说明)；COUNTERS 为所有运行的累计值，LATEST 为最近一次运行的值
+COUNTERS = {
+    "calls": ("stage_calls_total", "Calls recorded per stage"),
+    "errors": ("stage_errors_total", "Failed calls per stage"),
+    "items": ("stage_items_total", "Items (papers, documents) processed per stage"),
+    "bytes": ("stage_bytes_total", "Bytes transferred or produced per stage"),
+    "seconds": ("stage_seconds_total", "Cumulative time spent per stage"),
+}
+LATEST = {
+    "p50": ("stage_latency_p50_seconds", "Median call latency in the most recent run"),
+    "p95": ("stage_latency_p95_seconds", "95th percentile call latency in the most recent run"),
+    "max_seconds": ("stage_latency_max_seconds", "Slowest call in the most recent run"),
+}
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _header(lines: list[str], name: str, kind: str, help_text: str):
+    lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+    lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+
+def render() -> str:
+    lines: list[str] = []
+    totals = store.stage_totals()
+    for column, (name, help_text) in COUNTERS.items():
+        _header(lines, name, "counter", help_text)
+        lines += [f"{PREFIX}_{name}{_labels(stage=row['stage'])} {row[column] or 0}" for row in totals]
+    _header(lines, "stage_tokens_total", "counter", "LLM tokens per stage")
+    for row in totals:
+        if row["prompt_tokens"] or row["completion_tokens"]:
+            for kind in ("prompt", "completion"):
+                lines.append(f"{PREFIX}_stage_tokens_total{_labels(stage=row['stage'], kind=kind)} {row[f'{kind}_tokens'] or 0}")
+
+    latest = store.latest_stage_metrics()
+    for column, (name, help_text) in LATEST.items():
+        _header(lines, name, "gauge", help_text)
+        lines += [f"{PREFIX}_{name}{_labels(stage=row['stage'])} {row[column]}" for row in latest if row[column] is not None]
+
+    runs = store.run_counts()
+    _header(lines, "runs_total", "counter", "Pipeline runs by name and final status")
+    lines += [f"{PREFIX}_runs_total{_labels(name=row['name'], status=row['status'])} {row['count']}" for row in runs]
+    succeeded = {row["name"]: row for row in runs if row["last_success"] is not None}
+    _header(lines, "run_last_success_timestamp_seconds", "gauge", "Unix time the last successful run finished")
+    lines += [f"{PREFIX}_run_last_success_timestamp_seconds{_labels(name=name)} "
+              f"{row['last_success'].replace(tzinfo=timezone.utc).timestamp():.0f}" for name, row in succeeded.items()]
+    _header(lines, "run_last_duration_seconds", "gauge", "Duration of the last successful run")
+    lines += [f"{PREFIX}_run_last_duration_seconds{_labels(name=name)} {row['last_duration'] or 0}"
+              for name, row in succeeded.items()]
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: str | Path):
+    """原子写入 (临时文件 + rename)，采集端不会读到写了一半的文件"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(render())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        try:
+            body, status = render().encode("utf-8"), 200
+        except Exception as e:
+            logger.error(f"导出指标失败: {e}")
+            body, status = str(e).encode("utf-8"), 500
+        self.send_response(status)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(host: str = "0.0.0.0", port: int = 9108, background: bool = False) -> ThreadingHTTPServer:
+    """提供 /metrics；background=True 时在守护线程中运行并立即返回"""
+    httpd = ThreadingHTTPServer((host, port), _Handler)
+    httpd.daemon_threads = True
+    logger.info(f"📡 Prometheus 指标: http://{host}:{httpd.server_address[1]}/metrics")
+    if background:
+        threading.Thread(target=httpd.serve_forever, name="metrics-http", daemon=True).start()
+    else:
+        httpd.serve_forever()
+    return httpd
+
+
+if __name__ == "__main__":
+    import argparse
+
+    cli = argparse.ArgumentParser(description="以 Prometheus 文本格式导出流水线指标")
+    cli.add_argument("--host", default="0.0.0.0")
+    cli.add_argument("--port", type=int, default=9108)
+    cli.add_argument("--write", metavar="PATH", help="写入文本文件后退出，而不是启动 HTTP 服务")
+    args = cli.parse_args()
+
+    if args.write:
+        write_textfile(args.write)
+        logger.success(f"✅ 指标已写入 {args.write}")
+    else:
+        try:
+            serve(args.host, args.port)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,203 @@
+# src/research_agent/telemetry/spans.py
+"""
+轻量的阶段计量：
+
+    with span("elsevier.request") as s:      # 也可以 async with
+        response = ...
+        s.add(nbytes=len(response.content))
+
+    with get_telemetry().run("main_demo"):   # 运行结束时写入 pipeline_runs / stage_metrics
+        ...
+
+阶段名使用 "<组件>.<动作>" 的形式，Dashboard 与 Prometheus 导出按阶段名聚合。
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from loguru import logger
+
+
+@dataclass
+class StageTotals:
+    calls: int = 0
+    errors: int = 0
+    items: int = 0
+    bytes: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    seconds: float = 0.0
+    durations: deque = field(default_factory=lambda: deque(maxlen=10000))  # 用于分位数
+
+    def percentile(self, q: float) -> float | None:
+        if not self.durations:
+            return None
+        ordered = sorted(self.durations)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def add(self, seconds: float | None, error: bool, items: int, nbytes: int, prompt_tokens: int, completion_tokens: int):
+        if seconds is not None:
+            self.calls += 1
+            self.seconds += seconds
+            self.durations.append(seconds)
+        self.errors += int(error)
+        self.items += items
+        self.bytes += nbytes
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+
+
+class Span:
+    """一次计时区间；退出时连同累加的计数一起记录，发生异常或调用 fail() 时记为失败"""
+
+    def __init__(self, telemetry: "Telemetry", stage: str):
+        self.telemetry = telemetry
+        self.stage = stage
+        self.items = 0
+        self.bytes = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.error = False
+        self._start = None
+
+    def add(self, items: int = 0, nbytes: int = 0, prompt_tokens: int = 0, completion_tokens: int = 0):
+        self.items += items
+        self.bytes += nbytes
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+
+    def fail(self):
+        self.error = True
+
+    def __enter__(self) -> "Span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.telemetry.record(self.stage, time.perf_counter() - self._start, error=self.error or exc_type is not None,
+                              items=self.items, nbytes=self.bytes, prompt_tokens=self.prompt_tokens,
+                              completion_tokens=self.completion_tokens)
+        return False
+
+    async def __aenter__(self) -> "Span":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+class Telemetry:
+    """
+    进程内的指标收集器 (线程安全)。
+    - lifetime: 进程启动以来的累计值
+    - run(): 一次运行期间的聚合，结束时写入数据库，并按需刷新 Prometheus 文本文件
+    """
+
+    def __init__(self, textfile: str | None = None):
+        """
+        textfile: 每次运行结束后写入的 Prometheus 文本文件 (node_exporter textfile collector)，
+                  默认读取环境变量 RADAR_METRICS_FILE，未设置时不写
+        """
+        self.textfile = textfile or os.getenv("RADAR_METRICS_FILE")
+        self.lifetime: dict[str, StageTotals] = {}
+        self._current: dict[str, StageTotals] | None = None
+        self._depth = 0
+        self.run_id: int | None = None
+        self._lock = threading.Lock()
+
+    def span(self, stage: str) -> Span:
+        return Span(self, stage)
+
+    def record(self, stage: str, seconds: float | None = None, error: bool = False, items: int = 0, nbytes: int = 0,
+               prompt_tokens: int = 0, completion_tokens: int = 0):
+        """直接记录一次调用；seconds=None 表示只累加计数 (如缓存命中数)"""
+        values = (seconds, error, items, nbytes, prompt_tokens, completion_tokens)
+        with self._lock:
+            self.lifetime.setdefault(stage, StageTotals()).add(*values)
+            if self._current is not None:
+                self._current.setdefault(stage, StageTotals()).add(*values)
+
+    @contextmanager
+    def run(self, name: str):
+        """
+        一次运行的边界：开始时写入 pipeline_runs，结束时把期间各阶段的聚合写入 stage_metrics。
+        嵌套调用时只有最外层生效 (例如调度周期包住入库与分析两个阶段)。
+        """
+        with self._lock:
+            self._depth += 1
+            outer = self._depth == 1
+            if outer:
+                self._current = {}
+        if not outer:
+            try:
+                yield self.run_id
+            finally:
+                with self._lock:
+                    self._depth -= 1
+            return
+
+        from src.research_agent.telemetry import store  # 延迟导入，避免计量模块依赖数据库
+        try:
+            self.run_id = store.start_run(name)
+        except Exception as e:
+            logger.warning(f"⚠️ 无法记录运行 {name}: {e}")
+            self.run_id = None
+        start = time.perf_counter()
+        status, error = "ok", None
+        try:
+            yield self.run_id
+        except BaseException as e:
+            status, error = "failed", f"{type(e).__name__}: {e}"[:500]
+            raise
+        finally:
+            with self._lock:
+                totals, self._current = self._current, None
+                self._depth -= 1
+            elapsed = time.perf_counter() - start
+            self._log_run(name, status, elapsed, totals)
+            try:
+                if self.run_id is not None:
+                    store.finish_run(self.run_id, status, elapsed, totals, error)
+                if self.textfile:
+                    from src.research_agent.telemetry.prometheus import write_textfile
+                    write_textfile(self.textfile)
+            except Exception as e:
+                logger.warning(f"⚠️ 无法保存运行指标: {e}")
+            self.run_id = None
+
+    def snapshot(self) -> dict[str, StageTotals]:
+        """当前运行 (无运行时为进程累计) 各阶段聚合的副本"""
+        with self._lock:
+            source = self._current if self._current is not None else self.lifetime
+            return {stage: StageTotals(**{**vars(totals), "durations": deque(totals.durations)})
+                    for stage, totals in source.items()}
+
+    @staticmethod
+    def _log_run(name: str, status: str, elapsed: float, totals: dict[str, StageTotals]):
+        for stage, t in sorted(totals.items()):
+            tokens = f" tokens {t.prompt_tokens} + {t.completion_tokens}" if t.prompt_tokens or t.completion_tokens else ""
+            size = f" {t.bytes / 2 ** 20:.1f} MB" if t.bytes else ""
+            p95 = t.percentile(0.95)
+            latency = f" 累计 {t.seconds:.1f}s p95 {p95:.2f}s" if p95 is not None else ""
+            logger.info(f"📊 [{stage}] {t.calls} 次 (失败 {t.errors}) {t.items} 项{size}{tokens}{latency}")
+        logger.info(f"🏁 运行 {name} 结束: {status}，耗时 {elapsed:.1f}s")
+
+
+_telemetry: Telemetry | None = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry() -> Telemetry:
+    """进程内共享的收集器"""
+    global _telemetry
+    if _telemetry is None:
+        with _telemetry_lock:
+            if _telemetry is None:
+                _telemetry = Telemetry()
+    return _telemetry
+
+
+def span(stage: str) -> Span:
+    return get_telemetry().span(stage)
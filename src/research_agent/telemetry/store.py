@@ -0,0 +1,96 @@
+# src/research_agent/telemetry/store.py
+"""pipeline_runs / stage_metrics 的读写"""
+from datetime import datetime
+from sqlalchemy import func
+from sqlmodel import Session, select
+from src.research_agent.storage.models import PipelineRun, StageMetric, engine
+from src.research_agent.telemetry.spans import StageTotals
+
+
+def start_run(name: str) -> int:
+    with Session(engine) as session:
+        run = PipelineRun(name=name)
+        session.add(run)
+        session.commit()
+        return run.id
+
+
+def finish_run(run_id: int, status: str, duration: float, totals: dict[str, StageTotals], error: str | None = None):
+    """一个事务内更新运行状态并写入各阶段的聚合"""
+    with Session(engine) as session:
+        run = session.get(PipelineRun, run_id)
+        if run is None:
+            return
+        run.status = status
+        run.finished_at = datetime.utcnow()
+        run.duration = duration
+        run.error = error
+        session.add(run)
+        for stage, t in totals.items():
+            session.merge(StageMetric(
+                run_id=run_id, stage=stage, calls=t.calls, errors=t.errors, items=t.items, bytes=t.bytes,
+                prompt_tokens=t.prompt_tokens, completion_tokens=t.completion_tokens, seconds=t.seconds,
+                p50=t.percentile(0.5), p95=t.percentile(0.95), max_seconds=max(t.durations, default=None),
+            ))
+        session.commit()
+
+
+def load_runs(limit: int = 50, name: str | None = None) -> list[dict]:
+    """最近的运行，按开始时间倒序"""
+    statement = select(PipelineRun).order_by(PipelineRun.started_at.desc()).limit(limit)
+    if name:
+        statement = statement.where(PipelineRun.name == name)
+    with Session(engine) as session:
+        return [run.model_dump() for run in session.exec(statement).all()]
+
+
+def load_stage_history(limit_runs: int = 50, name: str | None = None) -> list[dict]:
+    """最近 limit_runs 次运行的各阶段指标，每行附带运行的名称与开始时间，按时间正序 (便于画趋势图)"""
+    run_ids = [run["id"] for run in load_runs(limit_runs, name)]
+    if not run_ids:
+        return []
+    statement = select(StageMetric, PipelineRun.name, PipelineRun.started_at).join(
+        PipelineRun, PipelineRun.id == StageMetric.run_id
+    ).where(StageMetric.run_id.in_(run_ids)).order_by(PipelineRun.started_at, StageMetric.stage)
+    with Session(engine) as session:
+        return [{**metric.model_dump(), "run_name": run_name, "started_at": started_at}
+                for metric, run_name, started_at in session.exec(statement).all()]
+
+
+def stage_totals() -> list[dict]:
+    """所有运行累计的各阶段计数 (Prometheus counter)"""
+    columns = [func.sum(getattr(StageMetric, c)).label(c) for c in
+               ("calls", "errors", "items", "bytes", "prompt_tokens", "completion_tokens", "seconds")]
+    statement = select(StageMetric.stage, *columns).group_by(StageMetric.stage).order_by(StageMetric.stage)
+    with Session(engine) as session:
+        return [row._asdict() for row in session.exec(statement).all()]
+
+
+def run_counts() -> list[dict]:
+    """按 (运行名称, 状态) 统计的运行次数，以及每种运行最近一次成功的时间与耗时"""
+    with Session(engine) as session:
+        counts = session.exec(
+            select(PipelineRun.name, PipelineRun.status, func.count()).group_by(PipelineRun.name, PipelineRun.status)
+        ).all()
+        latest = {}
+        for name in {name for name, _, _ in counts}:
+            latest[name] = session.exec(
+                select(PipelineRun).where(PipelineRun.name == name, PipelineRun.status == "ok")
+                .order_by(PipelineRun.started_at.desc()).limit(1)
+            ).first()
+    return [
+        {"name": name, "status": status, "count": count,
+         "last_success": latest[name].finished_at if latest[name] else None,
+         "last_duration": latest[name].duration if latest[name] else None}
+        for name, status, count in counts
+    ]
+
+
+def latest_stage_metrics() -> list[dict]:
+    """每个阶段最近一次运行中的指标 (Prometheus gauge)"""
+    latest = select(StageMetric.stage, func.max(StageMetric.run_id).label("run_id")).group_by(StageMetric.stage).subquery()
+    statement = select(StageMetric).join(
+        latest, (StageMetric.stage == latest.c.stage) & (StageMetric.run_id == latest.c.run_id)
+    ).order_by(StageMetric.stage)
+    with Session(engine) as session:
+        return [metric.model_dump() for metric in session.exec(statement).all()]
@@ -0,0 +1,213 @@
+# src/scheduler.py
+"""
+常驻调度进程：按 user_config.yaml 的 update_frequency 周期性执行增量入库与分析。
+
+    python -m src.scheduler                      # 启动后先跑一轮，之后按配置的频率
+    python -m src.scheduler --no-initial-run --jitter 0.05
+    python -m src.scheduler --interval "Every 2 hours" --ingest-only
+    python -m src.scheduler --once               # 只跑一轮后退出 (交给 cron / systemd timer 调度)
+
+- 各 Agent、HTTP 连接池与 LLM 客户端在进程内只创建一次，多轮之间复用
+- 每轮的开始时间加入随机抖动，避免多个实例同时打到上游
+- 到点时上一轮仍未结束则跳过本轮，不排队、不重叠
+- 修改 update_frequency 后无需重启，按新的频率重新安排下一轮
+- SIGINT / SIGTERM：不再开始新的一轮，等当前一轮结束 (最多 shutdown_timeout 秒) 后释放连接退出；
+  再次收到信号时立即取消当前一轮
+"""
+import asyncio
+import random
+import signal
+import time
+from datetime import datetime, timedelta
+from loguru import logger
+from src.main_demo import build_analysis_pipeline, build_ingestion_agents, ingest
+from src.research_agent.config.settings import UserConfig, get_settings, parse_frequency
+from src.research_agent.llm.gateway import get_gateway
+from src.research_agent.storage.models import create_db_and_tables
+from src.research_agent.telemetry.spans import get_telemetry
+
+
+class Scheduler:
+    def __init__(self, interval: float | None = None, jitter: float = 0.1, initial_run: bool = True,
+                 analysis: bool = True, shutdown_timeout: float = 600.0):
+        """
+        interval: 两轮开始之间的秒数，None 表示读取 update_frequency (修改配置后即时生效)
+        jitter: 随机抖动占间隔的比例 (0.1 表示 ±10%)
+        initial_run: 启动后立即执行一轮
+        analysis: 每轮入库之后是否执行分析阶段
+        shutdown_timeout: 退出时等待当前一轮结束的最长秒数，超时后取消
+        """
+        self._interval = interval
+        self.jitter = jitter
+        self.initial_run = initial_run
+        self.analysis = analysis
+        self.shutdown_timeout = shutdown_timeout
+        # 常驻期间复用的 Agent 与流水线 (连接池、arXiv 限速状态、筛选缓存统计)
+        self.arxiv_scout, self.elsevier_scout, self.triage = build_ingestion_agents()
+        self.pipeline = build_analysis_pipeline(self.elsevier_scout)
+        self.cycles = 0
+        self.skipped = 0
+        self._cycle: asyncio.Task | None = None
+        self._scheduled_interval: float | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stop: asyncio.Event | None = None
+        self._reschedule: asyncio.Event | None = None
+
+    @property
+    def interval(self) -> float:
+        if self._interval is not None:
+            return self._interval
+        return get_settings().user.get().update_interval
+
+    def _next_delay(self) -> float:
+        self._scheduled_interval = self.interval
+        return max(0.0, self._scheduled_interval * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    # ---------- 一轮 ----------
+
+    async def run_cycle(self) -> list:
+        """入库 + 分析，返回本轮入库的新论文；失败只记录日志，不影响后续轮次"""
+        self.cycles += 1
+        number = self.cycles
+        logger.info(f"🔁 第 {number} 轮开始")
+        start = time.perf_counter()
+        papers = []
+        try:
+            with get_telemetry().run("cycle"):
+                papers = await ingest(self.arxiv_scout, self.elsevier_scout, self.triage)
+                if self.analysis:
+                    await self.pipeline.run(close=False)
+        except asyncio.CancelledError:
+            logger.warning(f"🛑 第 {number} 轮已取消")
+            raise
+        except Exception as e:
+            logger.exception(f"❌ 第 {number} 轮失败: {e}")
+        else:
+            logger.success(f"✅ 第 {number} 轮完成: 新论文 {len(papers)} 篇，耗时 {time.perf_counter() - start:.1f}s")
+        finally:
+            # 解析进程池在两轮之间的长时间空闲里只占内存，每轮结束释放 (下一轮按需重建)；HTTP 连接池保留
+            await asyncio.to_thread(self.pipeline.parser.close)
+        return papers
+
+    def _trigger(self):
+        if self._cycle is not None and not self._cycle.done():
+            self.skipped += 1
+            get_telemetry().record("scheduler.skipped", items=1)
+            logger.warning(f"⏭️ 第 {self.cycles} 轮仍在运行，跳过本轮")
+            return
+        self._cycle = asyncio.create_task(self.run_cycle(), name=f"cycle-{self.cycles + 1}")
+
+    # ---------- 主循环 ----------
+
+    def stop(self):
+        """第一次调用：不再开始新的一轮；再次调用：取消正在运行的一轮"""
+        if self._stop.is_set():
+            if self._cycle is not None and not self._cycle.done():
+                logger.warning("🛑 再次收到退出信号，取消当前一轮")
+                self._cycle.cancel()
+            return
+        logger.info("🛑 收到退出信号，不再开始新的一轮")
+        self._stop.set()
+        self.pipeline.drain()  # 当前一轮只处理完已领取的任务
+
+    def _on_user_config(self, config: UserConfig):
+        # 配置监听线程中回调；只有更新频率变化才需要重新安排
+        if self._interval is None and self._loop is not None and config.update_interval != self._scheduled_interval:
+            self._loop.call_soon_threadsafe(self._reschedule.set)
+
+    async def _sleep(self, seconds: float):
+        """睡到超时、收到退出信号或需要重新安排为止"""
+        waiters = [asyncio.create_task(self._stop.wait()), asyncio.create_task(self._reschedule.wait())]
+        await asyncio.wait(waiters, timeout=seconds, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in waiters:
+            waiter.cancel()
+
+    def _install_signal_handlers(self):
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self._loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows 或非主线程：退回默认的 KeyboardInterrupt
+
+    async def serve(self, once: bool = False):
+        """运行直到收到退出信号 (once=True 时只跑一轮)"""
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._reschedule = asyncio.Event()
+        self._install_signal_handlers()
+        await asyncio.to_thread(create_db_and_tables)
+
+        settings = get_settings()
+        settings.watch()  # 空闲期间也能感知配置文件的修改
+        settings.user.subscribe(self._on_user_config)
+        try:
+            if once:
+                self._cycle = asyncio.create_task(self.run_cycle())
+                await asyncio.wait({self._cycle})
+                return
+            anchor = time.monotonic()
+            due = anchor if self.initial_run else anchor + self._next_delay()
+            while not self._stop.is_set():
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    logger.info(f"⏰ 下一轮: {datetime.now() + timedelta(seconds=remaining):%Y-%m-%d %H:%M:%S} "
+                                f"(间隔 {timedelta(seconds=round(self.interval))}，抖动 ±{self.jitter:.0%})")
+                    await self._sleep(remaining)
+                    if self._reschedule.is_set():
+                        self._reschedule.clear()
+                        due = anchor + self._next_delay()
+                        logger.info("🔧 更新频率已修改，重新安排下一轮")
+                        continue
+                    if self._stop.is_set():
+                        break
+                    if time.monotonic() < due:
+                        continue
+                anchor = time.monotonic()
+                self._trigger()
+                due = anchor + self._next_delay()
+        finally:
+            settings.user.unsubscribe(self._on_user_config)
+            await self._shutdown()
+
+    async def _shutdown(self):
+        if self._cycle is not None and not self._cycle.done():
+            logger.info(f"⏳ 等待第 {self.cycles} 轮结束 (最多 {self.shutdown_timeout:.0f}s) ...")
+            await asyncio.wait({self._cycle}, timeout=self.shutdown_timeout)
+            if not self._cycle.done():
+                logger.warning("⌛ 等待超时，取消当前一轮")
+                self._cycle.cancel()
+            await asyncio.gather(self._cycle, return_exceptions=True)
+        await self.elsevier_scout.aclose()
+        await self.pipeline.aclose()
+        await get_gateway().aclose()
+        get_settings().stop_watching()
+        get_gateway().metrics.log_summary()
+        logger.info(f"👋 调度器已退出: 完成 {self.cycles} 轮，跳过 {self.skipped} 次")
+
+
+def _parse_interval(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        seconds = parse_frequency(value)
+        if seconds is None:
+            raise ValueError(f"无法识别的间隔: {value}")
+        return seconds
+
+
+if __name__ == "__main__":
+    import argparse
+
+    cli = argparse.ArgumentParser(description="按 update_frequency 周期性执行入库与分析的常驻进程")
+    cli.add_argument("--interval", type=_parse_interval, default=None,
+                     help='覆盖 update_frequency：秒数或 "Every 6 hours" 这样的描述')
+    cli.add_argument("--jitter", type=float, default=0.1, help="随机抖动占间隔的比例 (默认 0.1)")
+    cli.add_argument("--no-initial-run", dest="initial_run", action="store_false", help="启动后等到第一个周期再运行")
+    cli.add_argument("--ingest-only", dest="analysis", action="store_false", help="只做入库，不执行分析阶段")
+    cli.add_argument("--shutdown-timeout", type=float, default=600.0, help="退出时等待当前一轮结束的最长秒数")
+    cli.add_argument("--once", action="store_true", help="只运行一轮后退出")
+    args = cli.parse_args()
+
+    scheduler = Scheduler(interval=args.interval, jitter=args.jitter, initial_run=args.initial_run,
+                          analysis=args.analysis, shutdown_timeout=args.shutdown_timeout)
+    asyncio.run(scheduler.serve(once=args.once))
@@ -0,0 +1,244 @@
+# tools/benchmark/corpus.py
+"""
+合成基准语料：arXiv Atom 检索结果、Elsevier 检索 / 文章 JSON 与全文 XML、不同页数的 PDF。
+内容由固定随机种子生成，同样的参数每次得到同样的语料，不同提交之间的结果可以直接比较。
+"""
+import datetime as dt
+import random
+from dataclasses import dataclass, field
+from xml.sax.saxutils import escape
+import pymupdf
+
+VOCABULARY = (
+    "tunnel deformation prediction structural health monitoring digital twin large language model "
+    "transformer graph neural network finite element settlement lining crack detection sensor fusion "
+    "reinforcement learning diffusion model video generation segmentation benchmark dataset baseline "
+    "ablation robustness uncertainty calibration construction automation bridge inspection point cloud "
+    "retrieval augmented generation fine tuning evaluation latency throughput optimisation"
+).split()
+
+SECTION_TITLES = ("Introduction", "Related Work", "Method", "Experiments", "Results", "Discussion", "Conclusion")
+
+ATOM_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/" xmlns:arxiv="http://arxiv.org/schemas/atom">
+  <id>{base_url}/api/query</id>
+  <title>arXiv Query: synthetic benchmark</title>
+  <updated>{updated}</updated>
+  <opensearch:totalResults>{total}</opensearch:totalResults>
+  <opensearch:startIndex>{start}</opensearch:startIndex>
+  <opensearch:itemsPerPage>{page_size}</opensearch:itemsPerPage>
+"""
+
+ATOM_ENTRY = """  <entry>
+    <id>{base_url}/abs/{arxiv_id}</id>
+    <updated>{published}</updated>
+    <published>{published}</published>
+    <title>{title}</title>
+    <summary>{abstract}</summary>
+{authors}
+    <link href="{base_url}/abs/{arxiv_id}" rel="alternate" type="text/html"/>
+    <link title="pdf" href="{base_url}/pdf/{arxiv_id}" rel="related" type="application/pdf"/>
+    <arxiv:primary_category term="cs.AI" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.AI" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.CE" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>
+"""
+
+ELSEVIER_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<full-text-retrieval-response xmlns="http://www.elsevier.com/xml/svapi/article/dtd" xmlns:ce="http://www.elsevier.com/xml/common/dtd" xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:prism="http://prismstandard.org/namespaces/basic/2.0/" xmlns:xocs="http://www.elsevier.com/xml/xocs/dtd">
+  <coredata>
+    <prism:doi>{doi}</prism:doi>
+    <dc:title>{title}</dc:title>
+    <dc:description>{abstract}</dc:description>
+  </coredata>
+  <originalText>
+    <xocs:doc>
+      <xocs:meta><xocs:doi>{doi}</xocs:doi></xocs:meta>
+      <xocs:serial-item>
+        <article>
+          <head>
+            <ce:title>{title}</ce:title>
+            <ce:author-group>{authors}</ce:author-group>
+            <ce:abstract><ce:section-title>Abstract</ce:section-title><ce:abstract-sec><ce:simple-para>{abstract}</ce:simple-para></ce:abstract-sec></ce:abstract>
+          </head>
+          <body><ce:sections>
+{sections}
+          </ce:sections></body>
+          <tail><ce:bibliography><ce:section-title>References</ce:section-title>
+{references}
+          </ce:bibliography></tail>
+        </article>
+      </xocs:serial-item>
+    </xocs:doc>
+  </originalText>
+</full-text-retrieval-response>
+"""
+
+
+@dataclass(frozen=True)
+class SyntheticPaper:
+    key: str                 # arXiv ID (如 2601.00001v1) 或 Elsevier DOI
+    title: str
+    abstract: str
+    authors: tuple[str, ...]
+    published: dt.datetime
+    journal: str | None = None  # Elsevier 论文所属期刊
+    pages: int = 0              # arXiv 论文的 PDF 页数
+
+
+@dataclass
+class SyntheticCorpus:
+    """
+    arxiv_papers: arXiv 检索结果总数
+    journals / per_journal: Elsevier 期刊列表及每个期刊的检索结果数
+    pdf_pages: PDF 页数档位，arXiv 论文依次轮流分配
+    sections / paragraphs: Elsevier 全文的章节数与每章段落数
+    """
+    arxiv_papers: int = 200
+    journals: tuple[str, ...] = ("Automation in Construction", "Tunnelling and Underground Space Technology")
+    per_journal: int = 25
+    pdf_pages: tuple[int, ...] = (2, 8, 24)
+    sections: int = 6
+    paragraphs: int = 4
+    seed: int = 42
+    year: int = 2026
+    arxiv: list[SyntheticPaper] = field(init=False)
+    elsevier: dict[str, list[SyntheticPaper]] = field(init=False)
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+        newest = dt.datetime(self.year, 6, 30, 12, 0, tzinfo=dt.timezone.utc)
+        # 与真实 API 一致：按提交时间倒序
+        self.arxiv = [
+            self._paper(f"{self.year % 100:02d}01.{i + 1:05d}v1", newest - dt.timedelta(minutes=7 * i),
+                        pages=self.pdf_pages[i % len(self.pdf_pages)])
+            for i in range(self.arxiv_papers)
+        ]
+        self.elsevier = {
+            journal: [
+                self._paper(f"10.1016/j.bench.{j}.{i:05d}", newest - dt.timedelta(days=i), journal=journal)
+                for i in range(self.per_journal)
+            ]
+            for j, journal in enumerate(self.journals)
+        }
+        self._by_doi = {p.key: p for papers in self.elsevier.values() for p in papers}
+        self._by_arxiv_id = {p.key: p for p in self.arxiv}
+        # 预先生成各档位的 PDF，避免把生成耗时计入下载阶段
+        self._pdf_cache: dict[int, bytes] = {}
+        for pages in set(self.pdf_pages):
+            self.pdf_for_pages(pages)
+
+    # ---------- 文本 ----------
+
+    def _words(self, n: int, rng: random.Random | None = None) -> str:
+        return " ".join((rng or self._rng).choice(VOCABULARY) for _ in range(n))
+
+    def _sentences(self, n: int, rng: random.Random) -> str:
+        return " ".join(f"{self._words(rng.randint(10, 20), rng).capitalize()}." for _ in range(n))
+
+    def _paper(self, key: str, published: dt.datetime, journal: str | None = None, pages: int = 0) -> SyntheticPaper:
+        rng = self._rng
+        return SyntheticPaper(
+            key=key,
+            title=self._words(rng.randint(6, 12)).title(),
+            abstract=self._sentences(rng.randint(5, 9), rng),
+            authors=tuple(f"{rng.choice('ABCDEFGHJKLMN')}. Author{rng.randint(1, 999)}" for _ in range(rng.randint(1, 6))),
+            published=published,
+            journal=journal,
+            pages=pages,
+        )
+
+    def _body(self, key: str) -> list[tuple[str, list[str]]]:
+        """(章节标题, 段落列表)，按 key 生成，与调用顺序无关"""
+        rng = random.Random(f"{self.seed}:{key}")
+        titles = [SECTION_TITLES[i % len(SECTION_TITLES)] for i in range(self.sections)]
+        return [(title, [self._sentences(rng.randint(4, 8), rng) for _ in range(self.paragraphs)]) for title in titles]
+
+    # ---------- arXiv ----------
+
+    def atom_feed(self, base_url: str, start: int = 0, max_results: int = 100) -> str:
+        page = self.arxiv[start:start + max_results]
+        entries = "".join(
+            ATOM_ENTRY.format(
+                base_url=base_url, arxiv_id=p.key, published=p.published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                title=escape(p.title), abstract=escape(p.abstract),
+                authors="\n".join(f"    <author><name>{escape(a)}</name></author>" for a in p.authors),
+            )
+            for p in page
+        )
+        header = ATOM_HEADER.format(base_url=base_url, updated=dt.datetime.now(dt.timezone.utc).isoformat(),
+                                    total=len(self.arxiv), start=start, page_size=len(page))
+        return header + entries + "</feed>\n"
+
+    def pdf(self, arxiv_id: str) -> bytes | None:
+        paper = self._by_arxiv_id.get(arxiv_id.removesuffix(".pdf"))
+        if paper is None:
+            return None
+        return self.pdf_for_pages(paper.pages)
+
+    def pdf_for_pages(self, pages: int) -> bytes:
+        """同一页数档位的 PDF 只生成一次 (基准测试不开启解析缓存，内容相同不影响测量)"""
+        if pages in self._pdf_cache:
+            return self._pdf_cache[pages]
+        doc = pymupdf.open()
+        rng = random.Random(f"{self.seed}:pdf:{pages}")
+        for number in range(pages):
+            page = doc.new_page()
+            text = f"{SECTION_TITLES[number % len(SECTION_TITLES)]}\n\n" + "\n\n".join(
+                self._sentences(rng.randint(4, 6), rng) for _ in range(5))
+            page.insert_textbox(pymupdf.Rect(56, 56, page.rect.width - 56, page.rect.height - 56), text, fontsize=10)
+        data = doc.tobytes(garbage=3, deflate=True)
+        doc.close()
+        self._pdf_cache[pages] = data
+        return data
+
+    # ---------- Elsevier ----------
+
+    def search_json(self, journal: str, base_url: str, count: int) -> dict:
+        entries = [
+            {
+                "dc:identifier": f"DOI:{p.key}",
+                "dc:title": p.title,
+                "prism:doi": p.key,
+                "prism:coverDate": p.published.strftime("%Y-%m-%d"),
+                "prism:publicationName": journal,
+                "authors": {"author": [{"$": a} for a in p.authors]},
+                "link": [
+                    {"@ref": "self", "@href": f"{base_url}/content/article/doi/{p.key}"},
+                    {"@ref": "scidir", "@href": f"{base_url}/science/article/pii/{p.key.rsplit('.', 1)[-1]}"},
+                ],
+            }
+            for p in self.elsevier.get(journal, [])[:count]
+        ]
+        return {"search-results": {"opensearch:totalResults": str(len(entries)), "entry": entries}}
+
+    def article_json(self, doi: str) -> dict | None:
+        paper = self._by_doi.get(doi)
+        if paper is None:
+            return None
+        return {"full-text-retrieval-response": {"coredata": {
+            "prism:doi": doi, "dc:title": paper.title, "dc:description": paper.abstract,
+            "prism:publicationName": paper.journal, "prism:coverDate": paper.published.strftime("%Y-%m-%d"),
+        }}}
+
+    def article_xml(self, doi: str) -> str | None:
+        paper = self._by_doi.get(doi)
+        if paper is None:
+            return None
+        sections = "\n".join(
+            f"            <ce:section><ce:label>{i + 1}</ce:label><ce:section-title>{title}</ce:section-title>"
+            + "".join(f"<ce:para>{escape(p)}</ce:para>" for p in paras) + "</ce:section>"
+            for i, (title, paras) in enumerate(self._body(doi))
+        )
+        rng = random.Random(f"{self.seed}:refs:{doi}")
+        references = "\n".join(
+            f"            <ce:bib-reference><ce:label>[{i + 1}]</ce:label>{escape(self._words(12, rng))}</ce:bib-reference>"
+            for i in range(20)
+        )
+        authors = "".join(f"<ce:author><ce:surname>{escape(a)}</ce:surname></ce:author>" for a in paper.authors)
+        return ELSEVIER_XML.format(doi=escape(doi), title=escape(paper.title), abstract=escape(paper.abstract),
+                                   authors=authors, sections=sections, references=references)
+
+    @property
+    def total_papers(self) -> int:
+        return len(self.arxiv) + len(self._by_doi)
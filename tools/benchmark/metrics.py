@@ -0,0 +1,113 @@
+# tools/benchmark/metrics.py
+"""基准测试的计量工具：阶段结果、分位数与峰值 RSS 采样"""
+import math
+import os
+import resource
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _children(pid: int) -> list[int]:
+    pids = []
+    for task in Path(f"/proc/{pid}/task").iterdir():
+        children = (task / "children").read_text().split()
+        pids.extend(int(child) for child in children)
+    return pids
+
+
+def current_rss(pid: int | None = None) -> int:
+    """进程及其所有子进程 (如解析进程池) 当前的 RSS 之和 (字节)，依赖 Linux /proc"""
+    pid = pid or os.getpid()
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * PAGE_SIZE
+            stack.extend(_children(current))
+        except (OSError, ValueError):
+            continue  # 子进程可能在采样期间退出
+    return total
+
+
+class PeakRSS:
+    """在后台线程中定期采样 RSS，记录阶段内的峰值；无 /proc 时退回到 getrusage 的历史峰值"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._supported = Path("/proc/self/statm").exists()
+
+    def _sample(self):
+        self.peak = max(self.peak, current_rss())
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        if self._supported:
+            self._sample()
+            self._thread = threading.Thread(target=self._loop, name="rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+        else:
+            # ru_maxrss 在 Linux 上单位为 KiB，macOS 上为字节
+            scale = 1 if sys.platform == "darwin" else 1024
+            self.peak = max(resource.getrusage(who).ru_maxrss * scale
+                            for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+
+    @property
+    def peak_mb(self) -> float:
+        return self.peak / 2 ** 20
+
+
+# ---------- 结果 ----------
+
+def percentile(samples: list[float], q: float) -> float:
+    """最近秩法分位数"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1))]
+
+
+@dataclass
+class StageResult:
+    name: str
+    latency_unit: str            # 延迟样本对应的单位，例如 "paper" 或 "triage call"
+    items: int = 0               # 成功处理的论文数
+    failed: int = 0
+    seconds: float = 0.0
+    peak_rss_mb: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    extra: dict = field(default_factory=dict)
+
+    @property
+    def papers_per_sec(self) -> float:
+        return self.items / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "items": self.items, "failed": self.failed, "seconds": round(self.seconds, 4),
+            "papers_per_sec": round(self.papers_per_sec, 3),
+            "latency_unit": self.latency_unit, "samples": len(self.latencies),
+            "latency_p50": round(percentile(self.latencies, 0.5), 4),
+            "latency_p95": round(percentile(self.latencies, 0.95), 4),
+            "latency_max": round(max(self.latencies, default=0.0), 4),
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+            **self.extra,
+        }
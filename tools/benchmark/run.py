@@ -0,0 +1,117 @@
+# tools/benchmark/run.py
+"""
+端到端基准测试：合成语料 + 本地 arXiv / Elsevier 替身服务 + stub LLM，
+依次测量入库 (ingestion)、下载、解析、评审四个阶段的吞吐 (篇/秒)、单篇延迟 p50 / p95 与峰值 RSS，
+结果写入 JSON，便于比较不同提交的性能。
+
+    python -m tools.benchmark.run
+    python -m tools.benchmark.run --arxiv 500 --per-journal 50 --llm-latency 0.5 --compare bench_results/<上次>.json
+
+所有数据库、PDF 与缓存都写在临时工作目录中，不会影响项目自身的 database.db。
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from loguru import logger
+from tools.benchmark.corpus import SyntheticCorpus
+
+RESULTS_DIR = Path("bench_results")
+
+
+def compare(current: dict, baseline_path: Path):
+    """打印与上一次结果的对比 (吞吐越高越好，延迟与内存越低越好)"""
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    print(f"\n对比基线 {baseline_path} ({(baseline.get('git') or {}).get('commit', '')[:10]})")
+    if baseline.get("params") != current["params"]:
+        print("  ⚠️ 两次运行的参数不同，结果不能直接比较")
+    for name, stage in current["stages"].items():
+        old = baseline.get("stages", {}).get(name)
+        if not old:
+            continue
+        changes = []
+        for key in ("papers_per_sec", "latency_p50", "latency_p95", "peak_rss_mb"):
+            before, after = old.get(key), stage.get(key)
+            if before:
+                changes.append(f"{key} {before} -> {after} ({(after - before) / before:+.1%})")
+        print(f"  {name:<10} " + " | ".join(changes))
+
+
+def print_summary(report: dict):
+    print(f"\n{'stage':<10} {'papers':>7} {'failed':>7} {'seconds':>9} {'papers/s':>9} {'p50':>8} {'p95':>8} {'rss MB':>8}")
+    for name, s in report["stages"].items():
+        print(f"{name:<10} {s['items']:>7} {s['failed']:>7} {s['seconds']:>9.2f} {s['papers_per_sec']:>9.2f} "
+              f"{s['latency_p50']:>8.3f} {s['latency_p95']:>8.3f} {s['peak_rss_mb']:>8.1f}")
+
+
+def main(argv: list[str] | None = None):
+    cli = argparse.ArgumentParser(description="研究雷达端到端基准测试 (合成语料 + 本地替身服务)")
+    corpus = cli.add_argument_group("语料")
+    corpus.add_argument("--arxiv", type=int, default=200, help="arXiv 论文数")
+    corpus.add_argument("--journals", nargs="+", default=list(SyntheticCorpus.journals))
+    corpus.add_argument("--per-journal", type=int, default=25, help="每个 Elsevier 期刊的论文数")
+    corpus.add_argument("--pdf-pages", type=int, nargs="+", default=[2, 8, 24], help="PDF 页数档位")
+    corpus.add_argument("--sections", type=int, default=6, help="Elsevier 全文的章节数")
+    corpus.add_argument("--seed", type=int, default=42)
+    upstreams = cli.add_argument_group("替身服务")
+    upstreams.add_argument("--upstream-latency", type=float, default=0.02, help="arXiv / Elsevier 每次请求的延迟 (秒)")
+    upstreams.add_argument("--bandwidth", type=float, default=None, help="PDF 下行速率 (字节/秒)")
+    upstreams.add_argument("--llm-latency", type=float, default=0.2, help="stub LLM 每次调用的延迟 (秒)")
+    upstreams.add_argument("--llm-jitter", type=float, default=0.05)
+    upstreams.add_argument("--relevant-ratio", type=float, default=1.0, help="判定为相关的比例，决定进入分析阶段的论文数")
+    workers = cli.add_argument_group("并发")
+    workers.add_argument("--page-size", type=int, default=100, help="arXiv 每页条目数")
+    workers.add_argument("--elsevier-concurrency", type=int, default=8)
+    workers.add_argument("--eager-full-text", action="store_true", help="入库时即抓取 Elsevier 全文 XML (旧行为)，用于对比")
+    workers.add_argument("--prefilter-threshold", type=float, default=None, help="本地预筛选阈值，默认关闭")
+    workers.add_argument("--download-workers", type=int, default=4)
+    workers.add_argument("--per-host-limit", type=int, default=2)
+    workers.add_argument("--parse-workers", type=int, default=None, help="默认等于 CPU 核数")
+    workers.add_argument("--review-workers", type=int, default=4)
+    cli.add_argument("--output", type=Path, default=None, help=f"结果 JSON 路径，默认写入 {RESULTS_DIR}/")
+    cli.add_argument("--compare", type=Path, default=None, help="与之前的结果 JSON 对比")
+    cli.add_argument("--workdir", type=Path, default=None, help="工作目录 (默认使用临时目录并在结束后删除)")
+    cli.add_argument("--verbose", action="store_true", help="保留各模块的日志输出 (会影响测量)")
+    args = cli.parse_args(argv)
+
+    if not args.verbose:
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+
+    # 相对路径按启动目录解析，之后才切换到工作目录
+    output = (args.output or RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json").resolve()
+    baseline = args.compare.resolve() if args.compare else None
+    workdir = args.workdir.resolve() if args.workdir else None
+    args.workdir = str(workdir) if workdir else None
+
+    cwd = os.getcwd()
+    with contextlib.ExitStack() as stack:
+        if workdir is None:
+            workdir = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="radar-bench-")))
+        workdir.mkdir(parents=True, exist_ok=True)
+        os.chdir(workdir)
+        if not args.verbose:
+            # 各模块会逐篇 print 进度，测量时屏蔽标准输出
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        try:
+            # storage.models 在导入时把 database.db 解析为当前目录下的绝对路径，所以切换目录后再导入
+            from tools.benchmark.stages import run_benchmark
+            report = run_benchmark(args)
+        finally:
+            os.chdir(cwd)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print_summary(report)
+    if baseline:
+        compare(report, baseline)
+    print(f"\n结果已写入 {output}")
+
+
+if __name__ == "__main__":
+    main()
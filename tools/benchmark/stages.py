@@ -0,0 +1,185 @@
+# tools/benchmark/stages.py
+"""
+各阶段的测量：复用 main_demo 的入库流程与 AnalysisPipeline 的处理函数，上游全部指向本地替身服务。
+注意：storage.models 在导入时按当前目录确定 database.db 的绝对路径，
+因此本模块必须在切换到基准测试的工作目录之后再导入 (见 run.py)。
+"""
+import asyncio
+import datetime as dt
+import os
+import platform
+import subprocess
+import time
+from pathlib import Path
+from loguru import logger
+from src.main_demo import run_ingestion_pipeline
+from src.research_agent.agents.scout.arxiv_scout import ArxivScout
+from src.research_agent.agents.scout.elsevier_scout import ElsevierScout
+from src.research_agent.agents.filter.triage_agent import RelevanceFilter
+from src.research_agent.acquisition.downloader import DownloadManager
+from src.research_agent.agents.analysis.batch_parser import BatchPDFParser
+from src.research_agent.pipeline.analysis import AnalysisPipeline
+from src.research_agent.llm.gateway import LLMGateway, get_gateway, set_gateway
+from src.research_agent.llm.stub_server import StubBehavior, StubServer
+from src.research_agent.telemetry.spans import get_telemetry
+from tools.benchmark.corpus import SyntheticCorpus
+from tools.benchmark.metrics import PeakRSS, StageResult
+from tools.benchmark.upstreams import UpstreamBehavior, UpstreamServer
+
+RESULT_VERSION = 1
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def build_elsevier_scout(args, corpus: SyntheticCorpus, upstream_url: str) -> ElsevierScout:
+    scout = ElsevierScout(journals=list(corpus.journals), max_results=corpus.per_journal, year=corpus.year,
+                          concurrency=args.elsevier_concurrency, eager_full_text=args.eager_full_text)
+    scout.search_base_url = f"{upstream_url}/content/search/sciencedirect"
+    scout.article_base_url = f"{upstream_url}/content/article/doi"
+    return scout
+
+
+def _elsevier_traffic() -> tuple[int, int]:
+    """进程累计的 Elsevier API 请求数与下行字节数"""
+    totals = get_telemetry().snapshot().get("elsevier.request")
+    return (totals.calls, totals.bytes) if totals else (0, 0)
+
+
+def _add_elsevier_traffic(result: StageResult, before: tuple[int, int]):
+    calls, nbytes = _elsevier_traffic()
+    result.extra["elsevier_requests"] = calls - before[0]
+    result.extra["elsevier_bytes"] = nbytes - before[1]
+
+
+def bench_ingestion(args, corpus: SyntheticCorpus, upstream_url: str, gateway: LLMGateway) -> StageResult:
+    arxiv_scout = ArxivScout(query="cat:cs.AI OR cat:cs.CE", max_results=corpus.arxiv_papers, page_size=args.page_size)
+    arxiv_scout.client.query_url_format = f"{upstream_url}/api/query?{{}}"
+    arxiv_scout.client.delay_seconds = 0  # 替身服务不需要礼貌性的翻页间隔
+    elsevier_scout = build_elsevier_scout(args, corpus, upstream_url)
+    triage = RelevanceFilter(research_interests="", prefilter_threshold=args.prefilter_threshold)
+
+    result = StageResult("ingestion", latency_unit="triage call")
+    gateway.metrics.reset()
+    traffic = _elsevier_traffic()
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        papers = run_ingestion_pipeline(arxiv_scout, elsevier_scout, triage)
+        result.seconds = time.perf_counter() - start
+    result.peak_rss_mb = rss.peak_mb
+    _add_elsevier_traffic(result, traffic)
+    result.items = len(papers)
+    result.failed = corpus.total_papers - len(papers)
+    result.latencies = gateway.metrics.latencies("triage")
+    result.extra["relevant"] = sum(1 for p in papers if p.is_relevant)
+    return result
+
+
+async def _drive(stage: StageResult, handler, jobs: list, workers: int) -> list:
+    """以 workers 的并发度对 jobs 逐个执行 handler，记录单篇耗时；返回成功的任务"""
+    sem = asyncio.Semaphore(workers)
+
+    async def _one(job):
+        async with sem:
+            start = time.perf_counter()
+            try:
+                output = await handler(job)
+            except Exception as e:
+                logger.error(f"[{stage.name}] 论文 {job.paper_id} 处理异常: {e}")
+                output = None
+            stage.latencies.append(time.perf_counter() - start)
+            return output
+
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        outputs = await asyncio.gather(*(_one(job) for job in jobs))
+        stage.seconds = time.perf_counter() - start
+    stage.peak_rss_mb = rss.peak_mb
+    done = [output for output in outputs if output is not None]
+    stage.items, stage.failed = len(done), len(jobs) - len(done)
+    return done
+
+
+async def bench_analysis(args, pipeline: AnalysisPipeline) -> list[StageResult]:
+    """
+    复用 AnalysisPipeline 各阶段的处理函数，但逐阶段串行执行，
+    这样每个阶段的吞吐、延迟和内存可以单独归因 (流水线并行时各阶段相互重叠)。
+    """
+    jobs = await asyncio.to_thread(pipeline.pending_jobs)
+    # 已有全文 XML 的 Elsevier 论文不需要下载，直接进入解析 (元数据优先模式下在下载阶段抓取全文 XML)
+    to_download, ready = [], []
+    for job in jobs:
+        (to_download if job.source == "arxiv" or not job.has_full_text else ready).append(job)
+
+    download = StageResult("download", latency_unit="paper")
+    traffic = _elsevier_traffic()
+    try:
+        downloaded = await _drive(download, pipeline._download, to_download, args.download_workers)
+    finally:
+        await pipeline.downloader.aclose()
+        await pipeline.downloader.elsevier.aclose()
+    _add_elsevier_traffic(download, traffic)
+    download.extra["bytes"] = sum(os.path.getsize(job.pdf_path) for job in downloaded if job.pdf_path)
+
+    parse = StageResult("parse", latency_unit="paper")
+    parse_jobs = downloaded + ready
+    try:
+        parsed = await _drive(parse, pipeline._parse, parse_jobs, pipeline.parse_workers)
+    finally:
+        pipeline.parser.close()
+    parse.extra["pdf"] = sum(1 for job in parse_jobs if job.pdf_path)
+    parse.extra["xml"] = sum(1 for job in parse_jobs if not job.pdf_path)
+
+    review = StageResult("review", latency_unit="paper")
+    try:
+        await _drive(review, pipeline._review, parsed, args.review_workers)
+    finally:
+        await get_gateway().aclose()
+    return [download, parse, review]
+
+
+
+def _git_revision() -> dict:
+    def _git(*cmd) -> str:
+        return subprocess.run(["git", *cmd], cwd=REPO_ROOT, capture_output=True, text=True, timeout=10).stdout.strip()
+    try:
+        return {"commit": _git("rev-parse", "HEAD"), "dirty": bool(_git("status", "--porcelain", "--untracked-files=no"))}
+    except (OSError, subprocess.SubprocessError):
+        return {"commit": None, "dirty": None}
+
+
+def run_benchmark(args) -> dict:
+    corpus = SyntheticCorpus(
+        arxiv_papers=args.arxiv, journals=tuple(args.journals), per_journal=args.per_journal,
+        pdf_pages=tuple(args.pdf_pages), sections=args.sections, seed=args.seed,
+    )
+    upstream = UpstreamServer(corpus, behavior=UpstreamBehavior(latency=args.upstream_latency,
+                                                               bandwidth=args.bandwidth))
+    llm = StubServer(behavior=StubBehavior(latency=args.llm_latency, jitter=args.llm_jitter,
+                                          relevant_ratio=args.relevant_ratio))
+    os.environ.setdefault("ELSEVIER_API_KEY", "benchmark")
+    gateway = LLMGateway(base_url=llm.base_url, api_key="sk-benchmark")
+    set_gateway(gateway)
+
+    started_at = dt.datetime.now(dt.timezone.utc)
+    with upstream, llm:
+        stages = [bench_ingestion(args, corpus, upstream.base_url, gateway)]
+        pipeline = AnalysisPipeline(
+            downloader=DownloadManager(per_host_limit=args.per_host_limit,
+                                       elsevier=build_elsevier_scout(args, corpus, upstream.base_url)),
+            parser=BatchPDFParser(workers=args.parse_workers, use_cache=False),  # 测量真实的解析耗时
+            download_workers=args.download_workers, review_workers=args.review_workers,
+        )
+        stages += asyncio.run(bench_analysis(args, pipeline))
+
+    total_seconds = sum(stage.seconds for stage in stages)
+    return {
+        "version": RESULT_VERSION,
+        "started_at": started_at.isoformat(),
+        "git": _git_revision(),
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "params": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "verbose")},
+        "corpus": {"arxiv": len(corpus.arxiv), "elsevier": corpus.total_papers - len(corpus.arxiv),
+                   "pdf_bytes": {pages: len(corpus.pdf_for_pages(pages)) for pages in sorted(set(corpus.pdf_pages))}},
+        "stages": {stage.name: stage.to_dict() for stage in stages},
+        "total": {"seconds": round(total_seconds, 4), "peak_rss_mb": round(max(s.peak_rss_mb for s in stages), 1)},
+        "llm": gateway.metrics.snapshot(),
+    }
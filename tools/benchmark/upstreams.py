@@ -0,0 +1,125 @@
+# tools/benchmark/upstreams.py
+"""
+本地的 arXiv / Elsevier 替身服务，从 SyntheticCorpus 返回检索结果、文章详情与 PDF：
+
+    GET /api/query?search_query=...&start=0&max_results=100     arXiv Atom 检索
+    GET /content/search/sciencedirect?query=SRCTITLE(...)...    Elsevier 检索 (JSON)
+    GET /content/article/doi/<doi>                              文章详情 (按 Accept 返回 JSON 或全文 XML)
+    GET /pdf/<arxiv_id>.pdf                                     PDF
+"""
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+from tools.benchmark.corpus import SyntheticCorpus
+
+JOURNAL_PATTERN = re.compile(r"SRCTITLE\((.+?)\)")
+
+
+@dataclass
+class UpstreamBehavior:
+    latency: float = 0.02            # 每次请求的基础延迟 (秒)
+    jitter: float = 0.01
+    bandwidth: float | None = None   # PDF 下行速率 (字节/秒)，None 表示不限速
+    chunk_size: int = 64 * 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "BenchUpstream/1.0"
+    protocol_version = "HTTP/1.1"  # 保持连接，与真实服务一致地复用连接池
+    corpus: SyntheticCorpus
+    behavior: UpstreamBehavior
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.behavior.bandwidth and content_type == "application/pdf":
+            # 按限速分块发送，模拟真实的下载耗时
+            step = self.behavior.chunk_size
+            for i in range(0, len(body), step):
+                self.wfile.write(body[i:i + step])
+                time.sleep(step / self.behavior.bandwidth)
+        else:
+            self.wfile.write(body)
+
+    def _not_found(self):
+        self._send(404, b'{"error": "not found"}', "application/json")
+
+    def do_GET(self):
+        behavior = self.behavior
+        time.sleep(max(0.0, behavior.latency + random.uniform(-behavior.jitter, behavior.jitter)))
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/api/query":
+            feed = self.corpus.atom_feed(self.base_url, int(query.get("start", 0)), int(query.get("max_results", 100)))
+            self._send(200, feed.encode("utf-8"), "application/atom+xml")
+        elif url.path == "/content/search/sciencedirect":
+            match = JOURNAL_PATTERN.search(query.get("query", ""))
+            payload = self.corpus.search_json(match.group(1) if match else "", self.base_url, int(query.get("count", 25)))
+            self._send(200, json.dumps(payload).encode("utf-8"), "application/json")
+        elif url.path.startswith("/content/article/doi/"):
+            doi = unquote(url.path.removeprefix("/content/article/doi/"))
+            if "xml" in (self.headers.get("Accept") or ""):
+                xml = self.corpus.article_xml(doi)
+                body, content_type = (xml.encode("utf-8") if xml else None), "text/xml"
+            else:
+                data = self.corpus.article_json(doi)
+                body, content_type = (json.dumps(data).encode("utf-8") if data else None), "application/json"
+            if body is None:
+                self._not_found()
+            else:
+                self._send(200, body, content_type)
+        elif url.path.startswith("/pdf/"):
+            pdf = self.corpus.pdf(url.path.removeprefix("/pdf/"))
+            if pdf is None:
+                self._not_found()
+            else:
+                self._send(200, pdf, "application/pdf")
+        else:
+            self._not_found()
+
+
+class UpstreamServer:
+    """在后台线程中运行的替身服务，port=0 时自动分配端口 (用法同 llm.stub_server.StubServer)"""
+
+    def __init__(self, corpus: SyntheticCorpus, host: str = "127.0.0.1", port: int = 0,
+                 behavior: UpstreamBehavior | None = None):
+        handler = type("UpstreamHandler", (_Handler,), {"corpus": corpus, "behavior": behavior or UpstreamBehavior()})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "UpstreamServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="bench-upstream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()